@@ -0,0 +1,110 @@
+"""An in-process stand-in for the LangGraph API, serving the endpoints the cron scheduler calls.
+
+Requests get a configurable latency and fail with 503 at a configurable rate. The time each run was received is
+recorded, so that benchmarks can measure how late runs were dispatched.
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Dict, List
+from uuid import NAMESPACE_URL, uuid4, uuid5
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from langgraph_sdk.client import LangGraphClient
+
+
+def assistant_id_of(graph_id: str) -> str:
+    """The ID of the assistant the fake server has for a graph"""
+    return str(uuid5(NAMESPACE_URL, f"langgraph.fake/{graph_id}"))
+
+
+class FakeLangGraph:
+    """A fake LangGraph server
+
+    :param latency: seconds to wait before answering each request
+    :param error_rate: fraction of requests answered with 503
+    :param seed: seed of the error sampling, for reproducible runs
+    """
+
+    def __init__(self, *, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.runs: List[Dict[str, Any]] = []
+        self.requests = 0
+        self.errors = 0
+        self.app = self._create_app()
+
+    def reset(self) -> None:
+        self.runs.clear()
+        self.requests = 0
+        self.errors = 0
+
+    def client(self) -> LangGraphClient:
+        """Create a LangGraph client that talks to this server without going through the network"""
+        http_client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=self.app),
+            base_url="http://langgraph.fake",
+            timeout=httpx.Timeout(30.0),
+        )
+        return LangGraphClient(http_client)
+
+    async def _answer(self) -> JSONResponse | None:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            return JSONResponse({"detail": "Service unavailable"}, status_code=503)
+        return None
+
+    def _create_run(self, payload: Dict[str, Any], thread_id: str | None = None) -> Dict[str, Any]:
+        run = {
+            "run_id": str(uuid4()),
+            "thread_id": thread_id or str(uuid4()),
+            "assistant_id": payload.get("assistant_id"),
+            "input": payload.get("input"),
+            "status": "pending",
+            "metadata": payload.get("metadata") or {},
+            "multitask_strategy": payload.get("multitask_strategy"),
+            "received_at": time.time(),
+        }
+        self.runs.append(run)
+        return run
+
+    def _create_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.get("/assistants/{assistant_id}")
+        async def get_assistant(assistant_id: str) -> Any:
+            return await self._answer() or {"assistant_id": assistant_id, "graph_id": "unknown"}
+
+        @app.post("/assistants/search")
+        async def search_assistants(request: Request) -> Any:
+            body = await request.json()
+            error = await self._answer()
+            if error is not None:
+                return error
+            graph_id = body.get("graph_id") or "agent"
+            return [{"assistant_id": assistant_id_of(graph_id), "graph_id": graph_id}]
+
+        @app.post("/runs")
+        async def create_stateless_run(request: Request) -> Any:
+            payload = await request.json()
+            return await self._answer() or self._create_run(payload)
+
+        @app.post("/threads/{thread_id}/runs")
+        async def create_run(thread_id: str, request: Request) -> Any:
+            payload = await request.json()
+            return await self._answer() or self._create_run(payload, thread_id)
+
+        @app.post("/runs/batch")
+        async def create_runs(request: Request) -> Any:
+            payloads = await request.json()
+            return await self._answer() or [self._create_run(payload) for payload in payloads]
+
+        return app
+
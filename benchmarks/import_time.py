@@ -0,0 +1,92 @@
+"""Measure the cold import time of the package's entry points, and guard which backends they load.
+
+Each module in ``ENTRY_POINTS`` is imported in a fresh interpreter, several times, and the best wall time is
+reported as JSON along with the heavy packages the import loaded. The script exits with status 1 when an entry
+point loads a package it must not, or when ``--budget`` is given and an import takes longer.
+
+Usage::
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 10 --budget 0.5 --output import_time.json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Packages that only some deployments use, or that only the API needs
+HEAVY_PACKAGES = ("fastapi", "starlette", "sqlalchemy", "redis", "asyncpg", "psycopg2", "langgraph_sdk", "httpx")
+
+# Entry point -> heavy packages that importing it must not load
+ENTRY_POINTS: Dict[str, tuple[str, ...]] = {
+    "langgraph_lite_cron": HEAVY_PACKAGES,
+    "langgraph_lite_cron.scheduler": HEAVY_PACKAGES,
+    "langgraph_lite_cron.shcemas": ("fastapi", "starlette", "sqlalchemy", "redis", "asyncpg", "psycopg2"),
+    "langgraph_lite_cron.scheduler.datastores.memory": HEAVY_PACKAGES,
+    "langgraph_lite_cron.crons": ("sqlalchemy", "redis", "asyncpg", "psycopg2"),
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = sorted({{name.partition(".")[0] for name in sys.modules}} & set({heavy!r}))
+print(json.dumps({{"seconds": elapsed, "loaded": loaded}}))
+"""
+
+
+def _probe(module: str) -> Dict[str, Any]:
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_PACKAGES)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def measure(module: str, forbidden: tuple[str, ...], repeat: int, budget: float | None) -> Dict[str, Any]:
+    samples = [_probe(module) for _ in range(repeat)]
+    seconds = [sample["seconds"] for sample in samples]
+    loaded = samples[0]["loaded"]
+    violations = [f"loads {name}" for name in loaded if name in forbidden]
+    if budget is not None and min(seconds) > budget:
+        violations.append(f"takes {min(seconds):.3f}s, over the budget of {budget:.3f}s")
+
+    return {
+        "module": module,
+        "best": min(seconds),
+        "median": sorted(seconds)[len(seconds) // 2],
+        "loaded": loaded,
+        "violations": violations,
+    }
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per entry point")
+    parser.add_argument("--budget", type=float, help="seconds an import may take at best (default: no limit)")
+    parser.add_argument("--output", type=Path, help="file to write the JSON results to (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(args: argparse.Namespace) -> int:
+    results = [measure(module, forbidden, args.repeat, args.budget) for module, forbidden in ENTRY_POINTS.items()]
+    report = json.dumps({"python": sys.version.split()[0], "results": results}, indent=2)
+    if args.output:
+        args.output.write_text(report + "\n")
+    else:
+        print(report)
+
+    failed = [result for result in results if result["violations"]]
+    for result in failed:
+        print(f"{result['module']}: {', '.join(result['violations'])}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -1,4 +1,7 @@
-from .crons import router as crons_router
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .crons import router as crons_router
 
 __all__ = [
     "crons_router",
@@ -6,3 +9,12 @@ __all__ = [
 ]
 
 __version__ = "0.0.1"
+
+
+def __getattr__(name: str) -> Any:
+    # The router pulls in FastAPI and the scheduler, so only import it when asked for
+    if name == "crons_router":
+        from .crons import router
+
+        return router
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,92 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+_K = TypeVar("_K", bound=Hashable)
+_V = TypeVar("_V")
+
+_MISSING = object()
+
+
+class AsyncTTLCache(Generic[_K, _V]):
+    """An async LRU cache whose entries expire after ``ttl`` seconds (``math.inf`` never expires).
+
+    Concurrent misses for the same key share a single call to the loader. Failed loads are not cached.
+    """
+
+    def __init__(self, *, ttl: float, maxsize: int) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict[_K, tuple[float, _V]] = OrderedDict()
+        self._in_flight: dict[_K, asyncio.Future[_V]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get(self, key: _K) -> _V | object:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return _MISSING
+
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, key: _K, value: _V) -> None:
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, key: _K) -> _V | None:
+        """Return the cached value for ``key``, or ``None`` if it is not cached."""
+        value = self._get(key)
+        return None if value is _MISSING else value  # type: ignore[return-value]
+
+    def put(self, key: _K, value: _V) -> None:
+        """Cache a value loaded outside of :meth:`get_or_load`, such as one of a batch."""
+        self._set(key, value)
+
+    async def get_or_load(self, key: _K, loader: Callable[[], Awaitable[_V]]) -> _V:
+        """Return the cached value for ``key``, calling ``loader`` at most once across concurrent misses."""
+        value = self._get(key)
+        if value is not _MISSING:
+            return value  # type: ignore[return-value]
+
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(loader())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda f: self._on_loaded(key, f))
+
+        # Shield the shared load so that one cancelled caller does not fail the others
+        return await asyncio.shield(future)
+
+    def _on_loaded(self, key: _K, future: asyncio.Future[_V]) -> None:
+        # A load that is no longer in flight was invalidated while running, so its result may be stale
+        if self._in_flight.get(key) is not future:
+            return
+
+        del self._in_flight[key]
+        if future.cancelled() or future.exception() is not None:
+            return
+
+        self._set(key, future.result())
+
+    def invalidate(self, key: _K | None = None) -> None:
+        """Drop ``key`` from the cache, or every entry if no key is given."""
+        if key is None:
+            self._entries.clear()
+            self._in_flight.clear()
+        else:
+            self._entries.pop(key, None)
+            self._in_flight.pop(key, None)
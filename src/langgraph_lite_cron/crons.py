@@ -1,23 +1,47 @@
+import asyncio
+from collections.abc import AsyncIterator
 from datetime import datetime
-from typing import Annotated, List, cast
+from typing import TYPE_CHECKING, Annotated, List, cast
 from uuid import UUID
 
-from apscheduler import AsyncScheduler
-from fastapi import APIRouter, Body, Depends, HTTPException, Path, status
+from apscheduler import AsyncScheduler, ScheduleLookupError
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Response, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic_core import to_json
 
-from langgraph_lite_cron.scheduler.datastores.sqlalchemy import (
-    LanggraphSQLAlchemyDataStore,
+from langgraph_lite_cron.metrics import REGISTRY
+from langgraph_lite_cron.scheduler.models import (
+    PUBLIC_CRON_FIELDS,
+    CronCursor,
+    ScheduleChangedError,
+)
+from langgraph_lite_cron.shcemas import (
+    CronBulkDelete,
+    CronBulkDeleteResult,
+    CronCount,
+    CronCreate,
+    CronExport,
+    CronPublic,
+    CronSearch,
+    CronUpdate,
+    ThreadCronCreate,
 )
-from langgraph_lite_cron.scheduler.models import Cron
-from langgraph_lite_cron.shcemas import CronCreate, CronPublic, CronSearch
 from langgraph_lite_cron.utils import (
     create_cron_job,
+    create_cron_jobs,
     get_now,
     get_scheduler,
+    observe_request,
     resolve_assistant_id,
+    update_cron_job,
 )
 
-router = APIRouter(tags=["Crons (lite tier)"])
+if TYPE_CHECKING:
+    from langgraph_lite_cron.scheduler.datastores.sqlalchemy import (
+        LanggraphSQLAlchemyDataStore,
+    )
+
+router = APIRouter(tags=["Crons (lite tier)"], dependencies=[Depends(observe_request)])
 
 
 @router.post("/threads/{thread_id}/runs/crons")
@@ -64,30 +88,159 @@ async def create_cron(
     )
 
 
+@router.post("/runs/crons/batch", response_model=List[CronPublic])
+async def create_crons_batch(
+    crons: Annotated[List[ThreadCronCreate], Body(title="Payloads for creating cron jobs")],
+    scheduler: Annotated[AsyncScheduler, Depends(get_scheduler)],
+    now: Annotated[datetime, Depends(get_now)],
+):
+    """Create many crons at once, each on its own thread or on new threads."""
+    graph_or_assistant_ids = list({cron.assistant_id for cron in crons})
+    try:
+        resolved = await asyncio.gather(
+            *(
+                resolve_assistant_id(graph_id_or_assistant_id=graph_or_assistant_id)
+                for graph_or_assistant_id in graph_or_assistant_ids
+            )
+        )
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    assistant_ids = dict(zip(graph_or_assistant_ids, resolved))
+    return await create_cron_jobs(
+        scheduler=scheduler,
+        jobs=[
+            (cron.thread_id, assistant_ids[cron.assistant_id], cron)
+            for cron in crons
+        ],
+        now=now,
+    )
+
+
 @router.post("/runs/crons/search", response_model=List[CronPublic])
 async def search_crons(
     query: Annotated[CronSearch, Body(title="Payload for listing crons")],
     scheduler: Annotated[AsyncScheduler, Depends(get_scheduler)],
-) -> List[CronPublic]:
-    """Search all active crons"""
+) -> Response:
+    """Search all active crons.
 
-    try:
-        assistant_id = await resolve_assistant_id(graph_id_or_assistant_id=query.assistant_id)
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    When a full page is returned, the X-Next-Cursor response header holds a cursor
+    to pass back in the next search to fetch the following page.
+    """
 
-    data_store = cast(LanggraphSQLAlchemyDataStore, scheduler.data_store)
+    after: CronCursor | None = None
+    if query.cursor:
+        try:
+            after = CronCursor.decode(query.cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if (after.sort_by, after.sort_order) != (query.sort_by, query.sort_order):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor does not match the requested sort_by and sort_order",
+            )
 
-    crons: list[Cron] = await data_store.get_crons(
+    assistant_id = None
+    if query.assistant_id is not None:
+        try:
+            assistant_id = await resolve_assistant_id(graph_id_or_assistant_id=query.assistant_id)
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    data_store = cast("LanggraphSQLAlchemyDataStore", scheduler.data_store)
+
+    # Rows come straight from the data store and are serialized without revalidation
+    rows = await data_store.get_public_crons(
         assistant_id=assistant_id,
         thread_id=query.thread_id,
         limit=query.limit,
         offset=query.offset,
         sort_by=query.sort_by,
         sort_order=query.sort_order,
+        after=after,
+    )
+
+    headers = {}
+    if len(rows) == query.limit:
+        headers["X-Next-Cursor"] = CronCursor.after(
+            rows[-1],
+            sort_by=query.sort_by,
+            sort_order=query.sort_order,
+        ).encode()
+
+    content = to_json([{name: row[name] for name in PUBLIC_CRON_FIELDS} for row in rows])
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+@router.post("/runs/crons/count", response_model=int)
+async def count_crons(
+    query: Annotated[CronCount, Body(title="Payload for counting crons")],
+    scheduler: Annotated[AsyncScheduler, Depends(get_scheduler)],
+) -> int:
+    """Count all active crons."""
+    assistant_id = None
+    if query.assistant_id is not None:
+        try:
+            assistant_id = await resolve_assistant_id(graph_id_or_assistant_id=query.assistant_id)
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    data_store = cast("LanggraphSQLAlchemyDataStore", scheduler.data_store)
+    return await data_store.count_crons(assistant_id=assistant_id, thread_id=query.thread_id)
+
+
+@router.post("/runs/crons/export", response_class=StreamingResponse)
+async def export_crons(
+    query: Annotated[CronExport, Body(title="Payload for exporting crons")],
+    scheduler: Annotated[AsyncScheduler, Depends(get_scheduler)],
+) -> StreamingResponse:
+    """Export all crons as newline-delimited JSON of their public fields and assistant ID, ordered by cron ID.
+
+    Crons are read and sent in batches as the response streams, so any number of
+    crons can be exported in one request.
+    """
+    assistant_id = None
+    if query.assistant_id is not None:
+        try:
+            assistant_id = await resolve_assistant_id(graph_id_or_assistant_id=query.assistant_id)
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    data_store = cast("LanggraphSQLAlchemyDataStore", scheduler.data_store)
+
+    async def lines() -> AsyncIterator[bytes]:
+        async for rows in data_store.iter_crons(assistant_id=assistant_id, thread_id=query.thread_id):
+            yield b"".join(to_json(row) + b"\n" for row in rows)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.post("/runs/crons/bulk_delete", response_model=CronBulkDeleteResult)
+async def bulk_delete_crons(
+    query: Annotated[CronBulkDelete, Body(title="Payload for deleting crons")],
+    scheduler: Annotated[AsyncScheduler, Depends(get_scheduler)],
+) -> CronBulkDeleteResult:
+    """Delete every cron matching all of the given filters at once."""
+    assistant_id = None
+    if query.assistant_id is not None:
+        try:
+            assistant_id = await resolve_assistant_id(graph_id_or_assistant_id=query.assistant_id)
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    data_store = cast("LanggraphSQLAlchemyDataStore", scheduler.data_store)
+    deleted = await data_store.delete_crons(
+        assistant_id=assistant_id,
+        thread_id=query.thread_id,
+        cron_ids=query.cron_ids,
     )
+    return CronBulkDeleteResult(deleted=deleted)
+
 
-    return [CronPublic.model_validate(cron) for cron in crons]
+@router.get("/runs/crons/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """Get scheduler metrics in the Prometheus text format."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 
 @router.delete("/runs/crons/{cron_id}")
@@ -97,3 +250,23 @@ async def delete_cron(
 ) -> None:
     """Delete a cron by ID."""
     await scheduler.remove_schedule(id=str(cron_id))
+
+
+@router.patch("/runs/crons/{cron_id}", response_model=CronPublic)
+async def update_cron(
+    cron_id: Annotated[UUID, Path(title="The ID of the cron.")],
+    update: Annotated[CronUpdate, Body(title="Changes to the cron job")],
+    scheduler: Annotated[AsyncScheduler, Depends(get_scheduler)],
+) -> CronPublic:
+    """Update the schedule, end time or input of a cron in place, keeping its ID."""
+    try:
+        return await update_cron_job(scheduler=scheduler, cron_id=cron_id, update=update)
+    except ScheduleLookupError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Cron {cron_id} not found")
+    except ScheduleChangedError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Cron {cron_id} is being run, retry the update later",
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
@@ -0,0 +1,252 @@
+"""In-process metrics in the Prometheus text format, and optional OpenTelemetry spans.
+
+Metrics are plain counters updated on the event loop, without locks or background work. Spans are only recorded
+when the ``opentelemetry-api`` package is installed and a tracer provider is configured.
+"""
+
+import math
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Dict, List, Tuple
+
+try:
+    from opentelemetry import trace
+except ImportError:  # pragma: no cover
+    trace = None
+
+_DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric(ABC):
+    """A metric with a child value per combination of label values"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        if not self.labelnames:
+            self.labels()
+
+    def labels(self, *values: Any) -> Any:
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    @abstractmethod
+    def _new_child(self) -> Any:
+        """Create the value of a new combination of label values"""
+
+    @abstractmethod
+    def _samples(self) -> Iterator[str]:
+        """Yield the sample lines of every child"""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in self._children.items():
+            yield f"{self.name}_total{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in self._children.items():
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = _DEFAULT_BUCKETS,
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), child.counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+FIRE_LAG = REGISTRY.register(
+    Histogram(
+        "langgraph_cron_fire_lag_seconds",
+        "Delay between the scheduled fire time of a cron (plus its jitter) and the start of its run.",
+    )
+)
+RUNS = REGISTRY.register(
+    Counter("langgraph_cron_runs", "Cron runs dispatched to the LangGraph server, by outcome.", ["outcome"])
+)
+RUNS_IN_FLIGHT = REGISTRY.register(
+    Gauge("langgraph_cron_runs_in_flight", "Cron runs being dispatched to the LangGraph server.")
+)
+RUNS_CREATE_LATENCY = REGISTRY.register(
+    Histogram(
+        "langgraph_cron_runs_create_seconds",
+        "Latency of runs.create and runs.create_batch requests, by outcome.",
+        ["outcome"],
+    )
+)
+DISPATCH_RETRIES = REGISTRY.register(
+    Counter("langgraph_cron_dispatch_retries", "Requests to the LangGraph server sent again after overload.")
+)
+DISPATCH_CONCURRENCY_LIMIT = REGISTRY.register(
+    Gauge("langgraph_cron_dispatch_concurrency_limit", "Current adaptive limit of concurrent requests.")
+)
+CIRCUIT_OPEN = REGISTRY.register(
+    Gauge("langgraph_cron_dispatch_circuit_open", "Whether dispatch is paused by the circuit breaker (1) or not (0).")
+)
+CRON_TABLE_FLUSH_LATENCY = REGISTRY.register(
+    Histogram("langgraph_cron_table_flush_seconds", "Time taken to write buffered updates to the cron table.")
+)
+CRON_TABLE_FLUSH_FAILURES = REGISTRY.register(
+    Counter("langgraph_cron_table_flush_failures", "Failed writes of buffered updates to the cron table.")
+)
+CRON_TABLE_PENDING_UPDATES = REGISTRY.register(
+    Gauge("langgraph_cron_table_pending_updates", "Cron updates waiting to be written to the cron table.")
+)
+CRON_SEARCH_LATENCY = REGISTRY.register(
+    Histogram("langgraph_cron_search_seconds", "Time taken by data stores to search crons, by store.", ["store"])
+)
+CRON_SEARCH_CACHE = REGISTRY.register(
+    Counter("langgraph_cron_search_cache", "Cron search cache lookups, by result.", ["result"])
+)
+API_REQUEST_LATENCY = REGISTRY.register(
+    Histogram("langgraph_cron_api_request_seconds", "Time taken to handle cron API requests, by endpoint.", ["endpoint"])
+)
+
+
+def span(name: str, **attributes: Any) -> ContextManager[Any]:
+    """Start an OpenTelemetry span if OpenTelemetry is installed, or do nothing otherwise"""
+    if trace is None:
+        return nullcontext()
+    return trace.get_tracer(__name__).start_as_current_span(
+        name,
+        attributes={
+            key: value if isinstance(value, (str, bool, int, float)) else str(value)
+            for key, value in attributes.items()
+            if value is not None
+        },
+    )
+
+
+@contextmanager
+def timed(histogram: Any) -> Iterator[None]:
+    """Observe how long the block takes in the given histogram (or histogram child)"""
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - started_at)
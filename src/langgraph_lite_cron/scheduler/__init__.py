@@ -1,3 +1,21 @@
-from langgraph_lite_cron.scheduler.utils import create_scheduler
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
 
-__all__ = ["create_scheduler"]
+if TYPE_CHECKING:
+    from langgraph_lite_cron.scheduler.scheduler import LanggraphAsyncScheduler
+    from langgraph_lite_cron.scheduler.utils import create_scheduler
+
+__all__ = ["LanggraphAsyncScheduler", "create_scheduler"]
+
+_LAZY_ATTRIBUTES = {
+    "LanggraphAsyncScheduler": "langgraph_lite_cron.scheduler.scheduler",
+    "create_scheduler": "langgraph_lite_cron.scheduler.utils",
+}
+
+
+def __getattr__(name: str) -> Any:
+    # Importing a submodule such as the memory data store should not load every backend
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(module), name)
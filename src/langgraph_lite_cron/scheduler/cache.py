@@ -0,0 +1,167 @@
+import time
+from collections import OrderedDict
+from collections.abc import Hashable, Mapping, Sequence
+from typing import Any, Dict, List, Set, Tuple
+from uuid import UUID
+
+from apscheduler import Event, ScheduleAdded, ScheduleRemoved, ScheduleUpdated
+
+from langgraph_lite_cron.scheduler.models import (
+    Cron,
+    Scope,
+    cron_fields,
+    cron_id_of,
+    cron_scopes,
+)
+
+# Cached results hold crons, or plain rows of cron fields for the public fast path
+_CronRow = Cron | Mapping[str, Any]
+
+# Tags name what a cached result depends on: ("cron", cron_id) for every cron in it,
+# ("members", scope) for the crons in its scope and ("order", scope) for the
+# next run dates it is sorted by. A scope of "*" stands for every scope.
+_Tag = Tuple[str, Any]
+_ANY_SCOPE = "*"
+
+# Sort fields that change whenever a schedule fires
+_VOLATILE_SORT_FIELDS = ("next_run_date", "updated_at")
+
+# How long (in seconds) invalidation times are kept around for searches still running
+_MAX_SEARCH_TIME = 60.0
+
+
+class CronSearchCache:
+    """A cache of cron search results, invalidated by schedule events.
+
+    A change to a cron drops the cached results of the assistant and thread it belongs
+    to, or of every scope if its assistant and thread are not known. Results are not
+    cached for ``settle_delay`` seconds after a change that affects them, so that
+    writes which are still being flushed to the database do not get cached stale.
+    """
+
+    def __init__(self, *, ttl: float, maxsize: int, settle_delay: float = 0.0) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.settle_delay = settle_delay
+        self._entries: OrderedDict[Hashable, Tuple[float, List[_Tag], List[_CronRow]]] = OrderedDict()
+        self._keys_by_tag: Dict[_Tag, Set[Hashable]] = {}
+        self._cron_scopes: Dict[UUID, List[Scope]] = {}
+        self._invalidated_at: Dict[_Tag, float] = {}
+        self._pruned_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> List[_CronRow] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, _, crons = entry
+        if expires_at <= time.monotonic():
+            self._drop(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return list(crons)
+
+    def put(
+        self,
+        key: Hashable,
+        crons: List[_CronRow],
+        *,
+        scopes: Sequence[Scope],
+        sort_by: str,
+        started_at: float,
+    ) -> None:
+        """Cache the result of a search that started at ``started_at`` (monotonic time)."""
+        tags: List[_Tag] = [("members", scope) for scope in scopes]
+        if sort_by in _VOLATILE_SORT_FIELDS:
+            tags.extend(("order", scope) for scope in scopes)
+        cron_ids = [cron_fields(cron)["cron_id"] for cron in crons]
+        tags.extend(("cron", cron_id) for cron_id in cron_ids)
+
+        # Skip results that may predate a change, or that may not include it yet
+        cutoff = started_at - self.settle_delay
+        for kind, value in tags:
+            if self._invalidated_at.get((kind, value), cutoff) > cutoff:
+                return
+            if kind != "cron" and self._invalidated_at.get((kind, _ANY_SCOPE), cutoff) > cutoff:
+                return
+
+        self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, tags, crons)
+        for tag in tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+        for cron_id, cron in zip(cron_ids, crons):
+            self._cron_scopes[cron_id] = cron_scopes(cron)
+
+        while len(self._entries) > self.maxsize:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        for tag in entry[1]:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+                    if tag[0] == "cron":
+                        self._cron_scopes.pop(tag[1], None)
+
+    def _invalidate_tag(self, tag: _Tag, now: float) -> None:
+        self._invalidated_at[tag] = now
+        if tag[1] == _ANY_SCOPE:
+            keys = {key for (kind, _), tag_keys in self._keys_by_tag.items() if kind == tag[0] for key in tag_keys}
+        else:
+            keys = self._keys_by_tag.get(tag, set()).copy()
+        for key in keys:
+            self._drop(key)
+
+    def invalidate_cron(
+        self,
+        cron_id: UUID,
+        *,
+        members: bool,
+        scopes: Sequence[Scope] | None = None,
+    ) -> None:
+        """Drop the cached results that a change to a cron may affect.
+
+        :param members: whether the cron was added or removed, rather than rescheduled
+        :param scopes: the scopes of the cron, if known
+        """
+        now = time.monotonic()
+        if scopes is None:
+            scopes = self._cron_scopes.get(cron_id)
+
+        kind = "members" if members else "order"
+        self._invalidate_tag(("cron", cron_id), now)
+        if scopes is None:
+            self._invalidate_tag((kind, _ANY_SCOPE), now)
+        else:
+            for scope in scopes:
+                self._invalidate_tag((kind, scope), now)
+
+        # Invalidation times only matter for as long as results are kept from being cached
+        if now - self._pruned_at > max(self.settle_delay, 1.0):
+            cutoff = now - self.settle_delay - _MAX_SEARCH_TIME
+            self._invalidated_at = {tag: at for tag, at in self._invalidated_at.items() if at > cutoff}
+            self._pruned_at = now
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys_by_tag.clear()
+        self._cron_scopes.clear()
+
+    def handle_event(self, event: Event) -> None:
+        """Invalidate results affected by a schedule event, which may come from another scheduler."""
+        if not isinstance(event, (ScheduleAdded, ScheduleUpdated, ScheduleRemoved)):
+            return
+
+        cron_id = cron_id_of(event.schedule_id)
+        if cron_id is not None:
+            self.invalidate_cron(cron_id, members=not isinstance(event, ScheduleUpdated))
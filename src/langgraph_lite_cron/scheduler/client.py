@@ -0,0 +1,72 @@
+import os
+
+import httpx
+import langgraph_sdk
+from langgraph_sdk import get_client
+from langgraph_sdk.client import LangGraphClient
+
+_client: LangGraphClient | None = None
+
+
+def create_langgraph_client(
+    *,
+    url: str | None = None,
+    max_connections: int | None = None,
+    max_keepalive_connections: int | None = None,
+    keepalive_expiry: float | None = None,
+) -> LangGraphClient:
+    """Create a LangGraph client with a pooled HTTP transport.
+
+    The client talks to ``url``, defaulting to ``LANGGRAPH_API_URL``. Without either, it is the client that
+    ``langgraph_sdk.get_client`` creates, which talks to the LangGraph server it runs in over an in-process transport
+    with no connections to pool.
+
+    Limits default to ``LANGGRAPH_MAX_CONNECTIONS`` (100), ``LANGGRAPH_MAX_KEEPALIVE_CONNECTIONS`` (20) and
+    ``LANGGRAPH_KEEPALIVE_EXPIRY`` (60 seconds).
+    """
+    if url is None:
+        url = os.getenv("LANGGRAPH_API_URL") or None
+    if url is None:
+        return get_client()
+
+    if max_connections is None:
+        max_connections = int(os.getenv("LANGGRAPH_MAX_CONNECTIONS", "100"))
+    if max_keepalive_connections is None:
+        max_keepalive_connections = int(os.getenv("LANGGRAPH_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    if keepalive_expiry is None:
+        keepalive_expiry = float(os.getenv("LANGGRAPH_KEEPALIVE_EXPIRY", "60"))
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+    headers = {"User-Agent": f"langgraph-sdk-py/{langgraph_sdk.__version__}"}
+    # The API key that langgraph_sdk.get_client reads, by its documented precedence
+    api_key = next(
+        (key for key in map(os.getenv, ("LANGGRAPH_API_KEY", "LANGSMITH_API_KEY", "LANGCHAIN_API_KEY")) if key),
+        None,
+    )
+    if api_key:
+        headers["x-api-key"] = api_key.strip().strip("\"'")
+    return LangGraphClient(
+        httpx.AsyncClient(
+            base_url=url,
+            headers=headers,
+            # The timeouts of langgraph_sdk.get_client
+            timeout=httpx.Timeout(connect=5, read=300, write=300, pool=5),
+            transport=httpx.AsyncHTTPTransport(retries=5, limits=limits),
+        )
+    )
+
+
+def get_langgraph_client() -> LangGraphClient:
+    """Return the process-wide LangGraph client, creating one if no scheduler has installed it."""
+    global _client
+    if _client is None:
+        _client = create_langgraph_client()
+    return _client
+
+
+def set_langgraph_client(client: LangGraphClient | None) -> None:
+    global _client
+    _client = client
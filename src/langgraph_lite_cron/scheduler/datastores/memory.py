@@ -1,24 +1,157 @@
+import math
+import struct
+import time
+from bisect import bisect_left, bisect_right, insort, insort_right
+from collections import Counter, deque
+from collections.abc import AsyncIterator, Iterable, Sequence
 from contextlib import AsyncExitStack
-from datetime import datetime
+from copy import deepcopy
+from datetime import datetime, timedelta, timezone
 from logging import Logger
-from operator import attrgetter
-from typing import Any, Dict, List
+from operator import itemgetter
+from typing import Any, Deque, Dict, List, NamedTuple, Set, Tuple
 from uuid import UUID
 
 import attrs
-from apscheduler import Schedule, ScheduleAdded, ScheduleRemoved, ScheduleUpdated
-from apscheduler.abc import EventBroker
+from anyio import create_task_group, sleep, to_thread
+from apscheduler import (
+    ConflictPolicy,
+    DeserializationError,
+    Schedule,
+    ScheduleLookupError,
+    ScheduleResult,
+    ScheduleUpdated,
+    SerializationError,
+    Task,
+)
+from apscheduler.abc import EventBroker, Serializer
 from apscheduler.datastores.memory import MemoryDataStore
+from apscheduler.serializers.cbor import CBORSerializer
 
-from langgraph_lite_cron.scheduler.models import Cron
+from langgraph_lite_cron.metrics import CRON_SEARCH_LATENCY, timed
+from langgraph_lite_cron.scheduler.datastores.snapshot import ChangeLog
+from langgraph_lite_cron.scheduler.models import (
+    ALL_CRONS,
+    EXPORTED_CRON_FIELDS,
+    PUBLIC_CRON_FIELDS,
+    Cron,
+    CronCursor,
+    ScheduleChangedError,
+    Scope,
+    cron_id_of,
+    cron_scopes,
+)
+from langgraph_lite_cron.scheduler.payloads import split_payload
+
+_SORT_FIELDS = ("cron_id", "assistant_id", "thread_id", "next_run_date", "end_time", "created_at", "updated_at")
+
+# Sort keys order null values last and break ties by cron ID, ending with the cron ID itself.
+# UUIDs are compared as integers, in the same order but without calling into Python.
+_SortKey = Tuple[int, Any, int, UUID]
+
+# Change log records since the last snapshot that trigger compaction, unless the
+# snapshot holds even more records
+_MIN_COMPACTION_CHANGES = 10_000
+
+# Persisted schedules start with what restoring them needs without decoding the rest: the next
+# fire time as a timestamp (infinite once exhausted), the payload digest and flags, followed by
+# the indexed fields of the cron, with UUIDs as bytes and datetimes in ISO format
+_SCHEDULE_HEAD = struct.Struct(">d64sB")
+_CRON_INDEX = struct.Struct(">16s16s48s48s48s48s")
+_SCHEDULE_SUMMARY_SIZE = _SCHEDULE_HEAD.size + _CRON_INDEX.size
+_HAS_CRON, _HAS_ASSISTANT, _HAS_THREAD = 1, 2, 4
+
+
+def _key(value: Any, cron_id: UUID) -> _SortKey:
+    if value is None:
+        return 1, None, cron_id.int, cron_id
+    return 0, value.int if isinstance(value, UUID) else value, cron_id.int, cron_id
+
+
+class _CronRow(NamedTuple):
+    """The fields of a cron that are indexed"""
+
+    cron_id: UUID
+    assistant_id: UUID | None
+    thread_id: UUID | None
+    next_run_date: datetime | None
+    end_time: datetime | None
+    created_at: datetime | None
+    updated_at: datetime | None
+
+    @classmethod
+    def of(cls, cron: Cron) -> "_CronRow":
+        return cls(
+            cron.cron_id,
+            cron.assistant_id,
+            cron.thread_id,
+            cron.next_run_date,
+            cron.end_time,
+            cron.created_at,
+            cron.updated_at,
+        )
+
+
+def _sort_key(row: _CronRow, field: str) -> _SortKey:
+    return _key(getattr(row, field), row.cron_id)
+
+
+def _cursor_key(cursor: CronCursor) -> _SortKey:
+    return _key(cursor.value, cursor.cron_id)
+
+
+def _encode_time(value: datetime | None) -> bytes:
+    return value.isoformat().encode() if value is not None else b""
+
+
+def _decode_time(encoded: bytes) -> datetime | None:
+    return datetime.fromisoformat(encoded.rstrip(b"\0").decode()) if encoded[0] else None
 
 
 @attrs.define(eq=False, repr=False)
 class LanggraphMemoryDataStore(MemoryDataStore):
-    """Memory-based data store that extends APScheduler's MemoryDataStore with cron table functionality."""
+    """Memory-based data store that extends APScheduler's MemoryDataStore with cron table functionality.
+
+    Restoring schedules on demand and updating them in place go through the private
+    schedule indexes of MemoryDataStore (``_schedules``, ``_schedules_by_id``,
+    ``_schedules_by_task_id``, ``_find_schedule_index()``) and its ``_tasks``, as the
+    public methods would publish events for schedules that do not change. These are
+    not a stable API, so APScheduler is pinned to an exact version, and
+    ``tests/test_snapshot.py`` checks both the pin and these internals.
 
-    # In-memory cron storage
+    :param persistence_path: directory to persist tasks, schedules and crons in, so
+        that they survive restarts; every change is appended to a change log, which
+        is compacted into a snapshot once it outgrows it. The latest encoded record
+        of every schedule is kept in memory for compaction, and restored schedules
+        and crons are only decoded once needed.
+    :param serializer: serializer of the persisted records
+    :param sync_interval: how often (in seconds) persisted changes are flushed to disk
+    """
+
+    persistence_path: str | None = attrs.field(kw_only=True, default=None)
+    serializer: Serializer = attrs.field(kw_only=True, factory=CBORSerializer)
+    sync_interval: float = attrs.field(
+        kw_only=True, validator=attrs.validators.gt(0), default=1.0
+    )
+
+    # In-memory cron storage; the crons of stored schedules are only built once returned
     _crons: Dict[UUID, Cron] = attrs.field(factory=dict, init=False)
+    # The indexed fields of every cron, including those of stored schedules once indexed
+    _cron_rows: Dict[UUID, _CronRow] = attrs.field(factory=dict, init=False)
+    # Secondary indexes: cron IDs per assistant/thread scope
+    _cron_ids_by_scope: Dict[Scope, Set[UUID]] = attrs.field(factory=dict, init=False)
+    # Sorted keys per scope and sort field, built on first use and then kept up to date
+    _cron_orders: Dict[Scope, Dict[str, List[_SortKey]]] = attrs.field(factory=dict, init=False)
+    # Payloads by digest, and how many schedules refer to each
+    _payloads: Dict[str, Dict[str, Any]] = attrs.field(factory=dict, init=False)
+    _payload_references: Dict[str, int] = attrs.field(factory=dict, init=False)
+    _change_log: ChangeLog | None = attrs.field(init=False, default=None)
+    # Restored schedules that are not unmarshalled yet: their encoded records, and their
+    # fire timestamps and IDs in fire order, which may still hold IDs unmarshalled since
+    _stored_schedules: Dict[str, bytes] = attrs.field(factory=dict, init=False)
+    _stored_order: Deque[Tuple[float, str]] = attrs.field(factory=deque, init=False)
+    # Whether the crons of stored schedules are in the indexes
+    _stored_crons_indexed: bool = attrs.field(init=False, default=True)
 
     async def start(
         self,
@@ -26,18 +159,440 @@ class LanggraphMemoryDataStore(MemoryDataStore):
         event_broker: EventBroker,
         logger: Logger,
     ) -> None:
-        """Start the data store and subscribe to schedule events."""
+        """Start the data store."""
         await super().start(exit_stack, event_broker, logger)
 
-        # Subscribe to schedule events to sync with cron data
-        event_broker.subscribe(
-            self._handle_schedule_event,
-            event_types={ScheduleAdded, ScheduleUpdated, ScheduleRemoved},
-            is_async=True,
-        )
+        if self.persistence_path:
+            self._change_log = ChangeLog(self.persistence_path)
+            self._restore()
+            # Exit in reverse order: stop syncing, then flush and close the change log
+            exit_stack.callback(self._change_log.close)
+            task_group = await exit_stack.enter_async_context(create_task_group())
+            exit_stack.callback(task_group.cancel_scope.cancel)
+            task_group.start_soon(self._sync_periodically)
 
         logger.info("Langgraph Memory DataStore started with cron storage")
 
+    def _restore(self) -> None:
+        """Load the persisted tasks and payloads, leaving schedules to unmarshal on first use."""
+        assert self._change_log is not None
+        started_at = time.perf_counter()
+
+        payloads: Dict[str, bytes] = {}
+        references: Counter[bytes] = Counter()
+        order: List[Tuple[float, str]] = []
+        for kind, key, value in self._change_log.load():
+            if kind == "schedule":
+                next_fire_time, digest, _ = _SCHEDULE_HEAD.unpack_from(value)
+                self._stored_schedules[key] = value
+                order.append((next_fire_time, key))
+                references[digest] += 1
+            elif kind == "payload":
+                payloads[key] = value
+            elif kind == "task":
+                task = Task.unmarshal(self.serializer, self.serializer.deserialize(value))
+                task.running_jobs = 0
+                self._tasks[task.id] = task
+
+        if self._change_log.dropped:
+            self._logger.warning(
+                f"Dropped {self._change_log.dropped} bytes of a change record cut short or garbled in {self.persistence_path}"
+            )
+
+        for encoded_digest, count in references.items():
+            digest = encoded_digest.rstrip(b"\0").decode()
+            if digest in payloads:
+                self._payloads[digest] = self.serializer.deserialize(payloads[digest])
+                self._payload_references[digest] = count
+
+        # Schedules that fire at the same time can be unmarshalled in any order
+        order.sort(key=itemgetter(0))
+        self._stored_order = deque(order)
+        self._stored_crons_indexed = not self._stored_schedules
+        # Exhausted schedules are only left for the cleanup to remove
+        while self._stored_order and self._stored_order[-1][0] == math.inf:
+            self._load_schedule(self._stored_order.pop()[1])
+
+        self._persist([("payload", digest, None) for digest in payloads.keys() - self._payloads.keys()])
+        self._logger.info(
+            f"Restored {len(self._tasks)} tasks and {len(self._stored_schedules) + len(self._schedules)} schedules "
+            f"from {self.persistence_path} in {time.perf_counter() - started_at:.2f}s"
+        )
+
+    def _load_schedule(self, schedule_id: str) -> None:
+        """Unmarshal a restored schedule along with its cron, unless that is done already."""
+        value = self._stored_schedules.pop(schedule_id, None)
+        if value is None:
+            return
+
+        try:
+            marshalled, cron = self.serializer.deserialize(value[_SCHEDULE_SUMMARY_SIZE:])
+            schedule = Schedule.unmarshal(self.serializer, marshalled)
+        except DeserializationError as e:
+            self._logger.error(f"Failed to restore schedule {schedule_id}: {e}")
+            if cron_id := cron_id_of(schedule_id):
+                self._pop_cron(cron_id)
+            self._release_payload(_SCHEDULE_HEAD.unpack_from(value)[1].rstrip(b"\0").decode())
+            return
+
+        self._schedules_by_id[schedule.id] = schedule
+        self._schedules_by_task_id[schedule.task_id].add(schedule)
+        insort_right(self._schedules, schedule)
+        if cron is not None:
+            self._put_cron(self._restored_cron(cron))
+
+    def _restored_cron(self, cron: Dict[str, Any]) -> Cron:
+        digest = (cron["metadata"] or {}).get("payload_digest")
+        if digest in self._payloads:
+            cron = {**cron, "payload": self._payloads[digest]}
+        return Cron.model_validate(cron)
+
+    def _next_stored_schedule(self) -> Tuple[float, str] | None:
+        """Return the fire timestamp and ID of the first stored schedule to fire, if any."""
+        while self._stored_order and self._stored_order[0][1] not in self._stored_schedules:
+            self._stored_order.popleft()
+        return self._stored_order[0] if self._stored_order else None
+
+    def _index_stored_crons(self) -> None:
+        """Add the crons of the stored schedules to the indexes, from the summaries of their records.
+
+        The crons themselves are only built from the records once returned.
+        """
+        if self._stored_crons_indexed:
+            return
+
+        self._stored_crons_indexed = True
+        uuids: Dict[bytes, UUID] = {}
+        for schedule_id, value in self._stored_schedules.items():
+            flags = _SCHEDULE_HEAD.unpack_from(value)[2]
+            if not flags & _HAS_CRON:
+                continue
+
+            assistant_id, thread_id, next_run_date, end_time, created_at, updated_at = _CRON_INDEX.unpack_from(
+                value, _SCHEDULE_HEAD.size
+            )
+            cron_id = UUID(schedule_id)
+            row = _CronRow(
+                cron_id,
+                (
+                    uuids.get(assistant_id) or uuids.setdefault(assistant_id, UUID(bytes=assistant_id))
+                    if flags & _HAS_ASSISTANT
+                    else None
+                ),
+                (
+                    uuids.get(thread_id) or uuids.setdefault(thread_id, UUID(bytes=thread_id))
+                    if flags & _HAS_THREAD
+                    else None
+                ),
+                _decode_time(next_run_date),
+                _decode_time(end_time),
+                _decode_time(created_at),
+                _decode_time(updated_at),
+            )
+            # Sort orders are only built once the crons are indexed, so only scopes need updating
+            self._cron_rows[cron_id] = row
+            if row.assistant_id is not None:
+                self._cron_ids_by_scope.setdefault(("assistant_id", row.assistant_id), set()).add(cron_id)
+            if row.thread_id is not None:
+                self._cron_ids_by_scope.setdefault(("thread_id", row.thread_id), set()).add(cron_id)
+
+    def _cron(self, cron_id: UUID) -> Cron | None:
+        """Return a cron, building it from the record of its stored schedule if it is not built yet."""
+        cron = self._crons.get(cron_id)
+        if cron is None and (value := self._stored_schedules.get(str(cron_id))) is not None:
+            _, stored = self.serializer.deserialize(value[_SCHEDULE_SUMMARY_SIZE:])
+            if stored is not None:
+                cron = self._crons[cron_id] = self._restored_cron(stored)
+        return cron
+
+    async def _sync_periodically(self) -> None:
+        assert self._change_log is not None
+        while True:
+            await sleep(self.sync_interval)
+            try:
+                await to_thread.run_sync(self._change_log.sync)
+                if self._change_log.changes > max(_MIN_COMPACTION_CHANGES, len(self._change_log)):
+                    records = self._change_log.start_compaction()
+                    await to_thread.run_sync(self._change_log.write_snapshot, records)
+                    self._logger.info(f"Wrote a snapshot of {len(records)} records")
+            except OSError as e:
+                self._logger.error(f"Failed to sync persisted changes: {e}")
+
+    def _persist(self, records: List[Tuple[str, str, Any]]) -> None:
+        """Encode changes and append them to the change log, if persistence is enabled.
+
+        A change is a kind, a key and a task, payload or schedule, or ``None`` for a removal.
+        """
+        if self._change_log is None or not records:
+            return
+
+        try:
+            self._change_log.append(
+                [(kind, key, None if value is None else self._encode(kind, value)) for kind, key, value in records]
+            )
+        except (OSError, SerializationError) as e:
+            self._logger.error(f"Failed to persist {len(records)} changes: {e}")
+
+    def _encode(self, kind: str, value: Any) -> bytes:
+        if kind == "schedule":
+            return self._encode_schedule(value)
+        if kind == "task":
+            value = value.marshal(self.serializer)
+        return self.serializer.serialize(value)
+
+    def _encode_schedule(self, schedule: Schedule) -> bytes:
+        """Encode a schedule and its cron behind their summary."""
+        cron = self._cron(cron_id) if (cron_id := cron_id_of(schedule.id)) else None
+        digest = (schedule.metadata or {}).get("payload_digest")
+        # Payloads are persisted on their own, once per digest
+        body = self.serializer.serialize(
+            [
+                schedule.marshal(self.serializer),
+                cron.model_dump(mode="json", exclude={"payload"} if digest else None) if cron else None,
+            ]
+        )
+
+        flags = 0
+        index = bytes(_CRON_INDEX.size)
+        if cron is not None:
+            flags |= _HAS_CRON
+            if cron.assistant_id:
+                flags |= _HAS_ASSISTANT
+            if cron.thread_id:
+                flags |= _HAS_THREAD
+            index = _CRON_INDEX.pack(
+                cron.assistant_id.bytes if cron.assistant_id else b"",
+                cron.thread_id.bytes if cron.thread_id else b"",
+                _encode_time(cron.next_run_date),
+                _encode_time(cron.end_time),
+                _encode_time(cron.created_at),
+                _encode_time(cron.updated_at),
+            )
+        next_fire_time = schedule.next_fire_time.timestamp() if schedule.next_fire_time else math.inf
+        return _SCHEDULE_HEAD.pack(next_fire_time, (digest or "").encode(), flags) + index + body
+
+    def _take_payload(self, schedule: Schedule) -> None:
+        """Move the payload out of the metadata of a new schedule and add a reference to it."""
+        schedule.metadata, digest, payload = split_payload(schedule.metadata or {})
+        if digest is None:
+            return
+
+        references = self._payload_references.get(digest, 0)
+        if not references and payload is not None:
+            self._payloads[digest] = payload
+            self._persist([("payload", digest, payload)])
+        if references or payload is not None:
+            self._payload_references[digest] = references + 1
+
+    def _release_payload(self, digest: str | None) -> None:
+        """Remove a reference of a schedule to the payload under a digest, dropping it along with the last one."""
+        references = self._payload_references.get(digest)
+        if references is None:
+            return
+
+        if references > 1:
+            self._payload_references[digest] = references - 1
+        else:
+            del self._payload_references[digest], self._payloads[digest]
+            self._persist([("payload", digest, None)])
+
+    async def add_task(self, task: Task) -> None:
+        """Add or update a task, persisting it if enabled."""
+        await super().add_task(task)
+        self._persist([("task", task.id, task)])
+
+    async def remove_task(self, task_id: str) -> None:
+        """Remove a task, persisting the removal if enabled."""
+        await super().remove_task(task_id)
+        self._persist([("task", task_id, None)])
+
+    async def get_schedules(self, ids: set[str] | None = None) -> list[Schedule]:
+        """Get schedules, unmarshalling the restored ones among them first."""
+        for schedule_id in list(self._stored_schedules) if ids is None else ids:
+            self._load_schedule(schedule_id)
+        return await super().get_schedules(ids)
+
+    async def add_schedule(
+        self, schedule: Schedule, conflict_policy: ConflictPolicy
+    ) -> None:
+        """Add a schedule and store its cron entry along with it."""
+        self._load_schedule(schedule.id)
+        # Store the cron before the schedule events go out, unless the schedule is rejected
+        if schedule.id not in self._schedules_by_id or conflict_policy is ConflictPolicy.replace:
+            self._take_payload(schedule)
+            if (replaced := self._schedules_by_id.get(schedule.id)) is not None:
+                self._release_payload((replaced.metadata or {}).get("payload_digest"))
+
+            cron = self._cron_from_schedule(schedule, schedule.next_fire_time, datetime.now())
+            old = self._cron_rows.get(cron.cron_id)
+            if old is not None:
+                cron = cron.model_copy(update={"created_at": old.created_at})
+            self._put_cron(cron)
+
+        await super().add_schedule(schedule, conflict_policy)
+        if self._schedules_by_id.get(schedule.id) is schedule:
+            self._persist([("schedule", schedule.id, schedule)])
+
+    async def acquire_schedules(
+        self, scheduler_id: str, lease_duration: timedelta, limit: int
+    ) -> list[Schedule]:
+        """Acquire due schedules, first unmarshalling as many due restored ones as could be acquired."""
+        now = datetime.now(timezone.utc).timestamp()
+        for _ in range(limit):
+            stored = self._next_stored_schedule()
+            if stored is None or stored[0] > now:
+                break
+            self._load_schedule(self._stored_order.popleft()[1])
+
+        return await super().acquire_schedules(scheduler_id, lease_duration, limit)
+
+    async def get_next_schedule_run_time(self) -> datetime | None:
+        next_fire_time = await super().get_next_schedule_run_time()
+        if (stored := self._next_stored_schedule()) is not None:
+            stored_fire_time = datetime.fromtimestamp(stored[0], timezone.utc)
+            if next_fire_time is None or stored_fire_time < next_fire_time:
+                return stored_fire_time
+        return next_fire_time
+
+    async def release_schedules(
+        self, scheduler_id: str, results: Sequence[ScheduleResult]
+    ) -> None:
+        """Release schedules and update the next run dates of their crons."""
+        now = datetime.now()
+        for result in results:
+            cron = self._cron(cron_id) if (cron_id := cron_id_of(result.schedule_id)) else None
+            if cron is not None:
+                self._put_cron(
+                    cron.model_copy(
+                        update={"next_run_date": result.next_fire_time, "updated_at": now}
+                    )
+                )
+
+        await super().release_schedules(scheduler_id, results)
+        if self._change_log is not None:
+            self._persist(
+                [
+                    ("schedule", result.schedule_id, self._schedules_by_id[result.schedule_id])
+                    for result in results
+                    if result.schedule_id in self._schedules_by_id
+                ]
+            )
+
+    async def remove_schedules(
+        self, ids: Iterable[str], *, finished: bool = False
+    ) -> None:
+        """Remove schedules together with their cron entries."""
+        ids = list(ids)
+        for schedule_id in ids:
+            self._load_schedule(schedule_id)
+
+        ids = [schedule_id for schedule_id in ids if schedule_id in self._schedules_by_id]
+        for schedule_id in ids:
+            if cron_id := cron_id_of(schedule_id):
+                self._pop_cron(cron_id)
+
+        removed = [self._schedules_by_id[schedule_id] for schedule_id in ids]
+        await super().remove_schedules(ids, finished=finished)
+        self._persist([("schedule", schedule_id, None) for schedule_id in ids])
+        for schedule in removed:
+            self._release_payload((schedule.metadata or {}).get("payload_digest"))
+
+    async def update_schedule(self, schedule: Schedule) -> Cron:
+        """Update an existing schedule and its cron entry in place.
+
+        The creation time and the assistant and thread of the cron are left as they are.
+
+        :return: the updated cron
+        :raises ScheduleLookupError: if the schedule does not exist
+        :raises ScheduleChangedError: if the schedule is acquired by a scheduler, or was
+            released with a new fire time since it was read
+        """
+        self._load_schedule(schedule.id)
+        old_schedule = self._schedules_by_id.get(schedule.id)
+        if old_schedule is None:
+            raise ScheduleLookupError(schedule.id)
+
+        # Releasing a schedule overwrites its trigger and fire times
+        acquired_until = old_schedule.acquired_until
+        if (acquired_until is not None and acquired_until >= datetime.now(timezone.utc)) or (
+            old_schedule.last_fire_time != schedule.last_fire_time
+        ):
+            raise ScheduleChangedError(schedule.id)
+
+        self._take_payload(schedule)
+        self._release_payload((old_schedule.metadata or {}).get("payload_digest"))
+        schedule.acquired_by = schedule.acquired_until = None
+
+        del self._schedules[self._find_schedule_index(old_schedule)]
+        self._schedules_by_task_id[old_schedule.task_id].discard(old_schedule)
+        self._schedules_by_id[schedule.id] = schedule
+        self._schedules_by_task_id[schedule.task_id].add(schedule)
+        insort_right(self._schedules, schedule)
+
+        cron = self._cron_from_schedule(schedule, schedule.next_fire_time, datetime.now())
+        old = self._cron_rows.get(cron.cron_id)
+        if old is not None:
+            cron = cron.model_copy(update={"created_at": old.created_at})
+        self._put_cron(cron)
+
+        self._persist([("schedule", schedule.id, schedule)])
+        await self._event_broker.publish(
+            ScheduleUpdated(
+                schedule_id=schedule.id,
+                task_id=schedule.task_id,
+                next_fire_time=schedule.next_fire_time,
+            )
+        )
+        return cron
+
+    async def delete_crons(
+        self,
+        *,
+        assistant_id: UUID | None = None,
+        thread_id: UUID | None = None,
+        cron_ids: Sequence[UUID] | None = None,
+    ) -> int:
+        """Delete the crons matching every given filter, with their schedules, at once.
+
+        :return: the number of deleted crons
+        """
+        self._index_stored_crons()
+        if cron_ids is not None:
+            candidates: Iterable[UUID] = dict.fromkeys(cron_ids)
+        elif assistant_id:
+            candidates = list(self._cron_ids_by_scope.get(("assistant_id", assistant_id), ()))
+        elif thread_id:
+            candidates = list(self._cron_ids_by_scope.get(("thread_id", thread_id), ()))
+        else:
+            candidates = list(self._cron_rows)
+
+        ids: List[str] = []
+        for cron_id in candidates:
+            row = self._cron_rows.get(cron_id)
+            if row is None:
+                continue
+            if (
+                (str(cron_id) in self._schedules_by_id or str(cron_id) in self._stored_schedules)
+                and (not assistant_id or row.assistant_id == assistant_id)
+                and (not thread_id or row.thread_id == thread_id)
+            ):
+                ids.append(str(cron_id))
+
+        await self.remove_schedules(ids)
+        return len(ids)
+
+    async def get_payload(self, digest: str) -> Dict[str, Any] | None:
+        """Return a copy of the payload stored under a digest, or ``None`` if there is none."""
+        payload = self._payloads.get(digest)
+        return None if payload is None else deepcopy(payload)
+
+    async def add_schedules(self, schedules: Sequence[Schedule]) -> None:
+        """Add many schedules together with their cron entries."""
+        for schedule in schedules:
+            await self.add_schedule(schedule, ConflictPolicy.exception)
+
+        self._logger.info(f"Added {len(schedules)} schedules to cron storage")
+
     async def get_crons(
         self,
         *,
@@ -47,95 +602,235 @@ class LanggraphMemoryDataStore(MemoryDataStore):
         offset: int,
         sort_by: str,
         sort_order: str,
+        after: CronCursor | None = None,
+    ) -> List[Cron]:
+        """Get crons with filtering, sorting, and pagination.
+
+        When ``after`` is given, results resume right after the cursor position.
+        """
+        with timed(CRON_SEARCH_LATENCY.labels("memory")):
+            return self._find_crons(
+                assistant_id=assistant_id,
+                thread_id=thread_id,
+                limit=limit,
+                offset=offset,
+                sort_by=sort_by,
+                sort_order=sort_order,
+                after=after,
+            )
+
+    def _find_crons(
+        self,
+        *,
+        assistant_id: UUID | None,
+        thread_id: UUID | None,
+        limit: int,
+        offset: int,
+        sort_by: str,
+        sort_order: str,
+        after: CronCursor | None,
     ) -> List[Cron]:
-        """Get crons with filtering, sorting, and pagination."""
-        # FIXME
-        # Filter crons based on criteria
-        filtered_crons = []
-        for cron in self._crons.values():
-            if assistant_id and cron.assistant_id != assistant_id:
+        self._index_stored_crons()
+        sort_field = sort_by if sort_by in _SORT_FIELDS else "created_at"
+        descending = sort_order.lower() == "desc"
+
+        # Walk the smallest matching scope, checking the other filter if both are given
+        scope = ALL_CRONS
+        other_filter: tuple[str, UUID] | None = None
+        if assistant_id and thread_id:
+            by_assistant = ("assistant_id", assistant_id)
+            by_thread = ("thread_id", thread_id)
+            if self._scope_size(by_assistant) <= self._scope_size(by_thread):
+                scope, other_filter = by_assistant, by_thread
+            else:
+                scope, other_filter = by_thread, by_assistant
+        elif assistant_id:
+            scope = ("assistant_id", assistant_id)
+        elif thread_id:
+            scope = ("thread_id", thread_id)
+
+        keys = self._cron_order(scope, sort_field)
+
+        # Positions are found by bisection, so deep pages cost the same as the first
+        if descending:
+            end = bisect_left(keys, _cursor_key(after)) if after else len(keys)
+            positions = range(end - 1, -1, -1)
+        else:
+            start = bisect_right(keys, _cursor_key(after)) if after else 0
+            positions = range(start, len(keys))
+
+        if other_filter is None:
+            return [self._cron(keys[i][3]) for i in positions[offset:offset + limit]]
+
+        field, value = other_filter
+        crons: List[Cron] = []
+        skipped = 0
+        for i in positions:
+            if getattr(self._cron_rows[keys[i][3]], field) != value:
                 continue
-            if thread_id and cron.thread_id != thread_id:
+            if skipped < offset:
+                skipped += 1
                 continue
-            filtered_crons.append(cron)
+            crons.append(self._cron(keys[i][3]))
+            if len(crons) == limit:
+                break
 
-        # 정렬
-        valid_fields = {"cron_id", "assistant_id", "thread_id", "next_run_date", "end_time", "created_at", "updated_at"}
-        sort_field = sort_by if sort_by in valid_fields else "created_at"
-        sort_key = attrgetter(sort_field)
-        reverse = sort_order.lower() == "desc"
-        filtered_crons.sort(key=sort_key, reverse=reverse)
+        return crons
+
+    async def get_public_crons(
+        self,
+        *,
+        assistant_id: UUID | None,
+        thread_id: UUID | None,
+        limit: int,
+        offset: int,
+        sort_by: str,
+        sort_order: str,
+        after: CronCursor | None = None,
+    ) -> List[Dict[str, Any]]:
+        """Like :meth:`get_crons`, but return plain rows of the public cron fields, ``assistant_id`` and the sort field."""
+        crons = await self.get_crons(
+            assistant_id=assistant_id,
+            thread_id=thread_id,
+            limit=limit,
+            offset=offset,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            after=after,
+        )
+        names = dict.fromkeys((*PUBLIC_CRON_FIELDS, "assistant_id", sort_by))
+        return [{name: getattr(cron, name) for name in names} for cron in crons]
 
-        # 페이징
-        return filtered_crons[offset:offset + limit]
+    async def iter_crons(
+        self,
+        *,
+        assistant_id: UUID | None = None,
+        thread_id: UUID | None = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Iterate over every cron, in batches of rows of the exported cron fields ordered by cron ID.
 
-    async def _handle_schedule_event(self, event: Any) -> None:
-        """Handle schedule events and sync to cron storage."""
-        self._logger.info(f"Handling schedule event: {event}")
-        try:
-            if isinstance(event, ScheduleAdded):
-                await self._add_cron(event)
-            elif isinstance(event, ScheduleUpdated):
-                await self._update_cron(event)
-            elif isinstance(event, ScheduleRemoved):
-                await self._remove_cron(event)
-        except Exception as e:
-            self._logger.error(f"Failed to sync schedule to cron: {e}")
-
-    async def _add_cron(self, event: ScheduleAdded) -> None:
-        """Add new schedule to cron storage."""
-        # Get the full schedule object to access all details
-        schedules = await self.get_schedules({event.schedule_id})
-        if not schedules:
-            self._logger.warning(f"Schedule {event.schedule_id} not found")
-            return
+        Each batch resumes after the last cron ID of the previous one, so crons may be
+        added or removed while the iteration is suspended.
+        """
+        after: CronCursor | None = None
+        while True:
+            crons = self._find_crons(
+                assistant_id=assistant_id,
+                thread_id=thread_id,
+                limit=batch_size,
+                offset=0,
+                sort_by="cron_id",
+                sort_order="asc",
+                after=after,
+            )
+            if crons:
+                yield [{name: getattr(cron, name) for name in EXPORTED_CRON_FIELDS} for cron in crons]
+            if len(crons) < batch_size:
+                return
+            after = CronCursor.after(crons[-1], sort_by="cron_id", sort_order="asc")
 
-        schedule: Schedule = schedules[0]
+    async def count_crons(self, *, assistant_id: UUID | None, thread_id: UUID | None) -> int:
+        """Count crons, optionally of an assistant and/or a thread, from the sizes of the scope indexes."""
+        self._index_stored_crons()
+        if assistant_id and thread_id:
+            by_assistant = ("assistant_id", assistant_id)
+            by_thread = ("thread_id", thread_id)
+            if self._scope_size(by_assistant) <= self._scope_size(by_thread):
+                scope, (field, value) = by_assistant, by_thread
+            else:
+                scope, (field, value) = by_thread, by_assistant
+            cron_ids = self._cron_ids_by_scope.get(scope, ())
+            return sum(1 for cron_id in cron_ids if getattr(self._cron_rows[cron_id], field) == value)
 
+        if assistant_id:
+            return self._scope_size(("assistant_id", assistant_id))
+        if thread_id:
+            return self._scope_size(("thread_id", thread_id))
+        return self._scope_size(ALL_CRONS)
+
+    def _scope_size(self, scope: Scope) -> int:
+        if scope == ALL_CRONS:
+            return len(self._cron_rows)
+        return len(self._cron_ids_by_scope.get(scope, ()))
+
+    def _cron_order(self, scope: Scope, field: str) -> List[_SortKey]:
+        """Return the sorted keys of a scope for a sort field, building them if needed."""
+        if scope == ALL_CRONS:
+            cron_ids = self._cron_rows.keys()
+        else:
+            cron_ids = self._cron_ids_by_scope.get(scope)
+            if not cron_ids:
+                return []
+
+        orders = self._cron_orders.setdefault(scope, {})
+        keys = orders.get(field)
+        if keys is None:
+            keys = orders[field] = sorted(_sort_key(self._cron_rows[cron_id], field) for cron_id in cron_ids)
+        return keys
+
+    def _put_cron(self, cron: Cron) -> None:
+        """Store a new or changed cron and update the indexes."""
+        old = self._cron_rows.get(cron.cron_id)
+        self._crons[cron.cron_id] = cron
+        new = self._cron_rows[cron.cron_id] = _CronRow.of(cron)
+        self._reindex_cron(old, new)
+
+    def _pop_cron(self, cron_id: UUID) -> None:
+        """Remove a cron and drop it from the indexes."""
+        self._crons.pop(cron_id, None)
+        row = self._cron_rows.pop(cron_id, None)
+        if row is not None:
+            self._reindex_cron(row, None)
+
+    def _reindex_cron(self, old: _CronRow | None, new: _CronRow | None) -> None:
+        old_scopes = cron_scopes(old._asdict()) if old else []
+        new_scopes = cron_scopes(new._asdict()) if new else []
+
+        for scope in new_scopes:
+            if scope != ALL_CRONS:
+                self._cron_ids_by_scope.setdefault(scope, set()).add(new.cron_id)
+
+        for scope in dict.fromkeys(old_scopes + new_scopes):
+            orders = self._cron_orders.get(scope)
+            if orders:
+                for field, keys in orders.items():
+                    old_key = _sort_key(old, field) if scope in old_scopes else None
+                    new_key = _sort_key(new, field) if scope in new_scopes else None
+                    if old_key == new_key:
+                        continue
+                    if old_key is not None:
+                        del keys[bisect_left(keys, old_key)]
+                    if new_key is not None:
+                        insort(keys, new_key)
+
+            if scope in old_scopes and scope not in new_scopes and scope != ALL_CRONS:
+                cron_ids = self._cron_ids_by_scope[scope]
+                cron_ids.discard(old.cron_id)
+                if not cron_ids:
+                    del self._cron_ids_by_scope[scope]
+                    self._cron_orders.pop(scope, None)
+
+    def _cron_from_schedule(
+        self,
+        schedule: Schedule,
+        next_run_date: datetime | None,
+        now: datetime,
+    ) -> Cron:
+        """Build the cron entry mirroring the given schedule."""
         # Extract metadata from schedule
         metadata = schedule.metadata or {}
 
-        # Create cron object
-        now = datetime.now()
-        cron = Cron(
+        return Cron(
             cron_id=UUID(schedule.id),
             assistant_id=metadata.get("assistant_id"),
             thread_id=metadata.get("thread_id"),
             user_id=metadata.get("user_id"),
-            payload=metadata.get("payload"),
+            payload=self._payloads.get(metadata.get("payload_digest")) or metadata.get("payload") or {},
             schedule=metadata.get("schedule"),
-            next_run_date=event.next_fire_time,
+            next_run_date=next_run_date,
             end_time=getattr(schedule.trigger, "end_time"),
             created_at=now,
             updated_at=now,
             metadata=metadata,
         )
-
-        # Store in memory
-        self._crons[cron.cron_id] = cron
-        self._logger.info(f"Added schedule {schedule.id} to cron storage")
-
-    async def _update_cron(self, event: ScheduleUpdated) -> None:
-        """Update existing schedule in cron storage."""
-        cron_id = UUID(event.schedule_id)
-        if cron_id in self._crons:
-            cron = self._crons[cron_id]
-            # Create updated cron with new data
-            updated_cron = attrs.evolve(
-                cron,
-                next_run_date=event.next_fire_time,
-                updated_at=datetime.now()
-            )
-            self._crons[cron_id] = updated_cron
-            self._logger.debug(f"Updated schedule {event.schedule_id} in cron storage")
-        else:
-            self._logger.warning(f"Cron {event.schedule_id} not found for update")
-
-    async def _remove_cron(self, event: ScheduleRemoved) -> None:
-        """Remove schedule from cron storage."""
-        cron_id = UUID(event.schedule_id)
-        if cron_id in self._crons:
-            del self._crons[cron_id]
-            self._logger.info(f"Removed schedule {event.schedule_id} from cron storage")
-        else:
-            self._logger.warning(f"Cron {event.schedule_id} not found for removal")
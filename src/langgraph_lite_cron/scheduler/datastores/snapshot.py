@@ -0,0 +1,227 @@
+"""Append-only persistence of the memory data store.
+
+Every change is appended to a change log as one record, and the records of the
+current state are periodically compacted into a snapshot. Both are sequences of
+CBOR arrays of a kind, a key, a value encoded by the data store and the CRC-32 of
+the three, where a null value stands for a removal. Replaying the snapshot and then
+the change logs in order restores the latest state without decoding any value, so
+the data store can decode values on demand.
+
+Change logs are numbered by generation. A snapshot starts with the generation of
+the first change log written after it, and a crash while compacting leaves the
+previous snapshot and every change log since in place. A crash while appending can
+leave the last record of the last change log cut short or garbled, which its CRC
+reveals; that record is dropped on the next load.
+"""
+
+import mmap
+import os
+import re
+import zlib
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from cbor2 import CBORDecodeError, CBORDecoder, dumps
+
+_SNAPSHOT_FILE = "snapshot.cbor"
+_CHANGES_FILE = re.compile(r"changes-(\d+)\.cbor")
+
+# A kind, a key and an encoded value, which is None for a removal
+Record = Tuple[str, str, bytes | None]
+
+
+class ChangeLogCorruptedError(Exception):
+    """Raised when a snapshot, or a change log followed by others, holds a record that is not intact.
+
+    Unlike the end of the last change log, these files were complete when written, so skipping the record would
+    restore a state that never existed.
+    """
+
+    def __init__(self, path: Path, offset: int):
+        super().__init__(f"Corrupted record at offset {offset} of {path}")
+        self.path = path
+        self.offset = offset
+
+
+def _changes_file(generation: int) -> str:
+    return f"changes-{generation}.cbor"
+
+
+def _checksum(kind: str, key: str, value: bytes | None) -> int:
+    return zlib.crc32(value or b"", zlib.crc32(key.encode(), zlib.crc32(kind.encode())))
+
+
+def _frame(kind: str, key: str, value: bytes | None) -> bytes:
+    return dumps([kind, key, value, _checksum(kind, key, value)])
+
+
+def _fsync_directory(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class ChangeLog:
+    """A snapshot and change logs in a directory, holding the records of a data store.
+
+    The encoded latest value of every key is kept in memory, so compacting only writes
+    out bytes and can run in a worker thread.
+
+    :param path: the directory holding the files, created if missing
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        # Encoded values by kind and key
+        self._latest: Dict[Tuple[str, str], bytes] = {}
+        self._generation = 0
+        self._fd: int | None = None
+        self._dirty = False
+        # Records appended since the last snapshot
+        self.changes = 0
+        # Bytes dropped from the end of the last change log on load
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+    def load(self) -> Iterator[Record]:
+        """Replay the snapshot and change logs, then open the change log for appending.
+
+        :return: the kind, key and encoded value of every record of the latest state
+        :raises ChangeLogCorruptedError: if a record that is not the last one of the
+            last change log is not intact
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        snapshot_path = self.path / _SNAPSHOT_FILE
+        if snapshot_path.exists():
+            generation, records, intact, size = self._replay(snapshot_path, header=True)
+            if intact < size:
+                raise ChangeLogCorruptedError(snapshot_path, intact)
+            self._generation = generation
+
+        generations = sorted(
+            int(match.group(1))
+            for name in os.listdir(self.path)
+            if (match := _CHANGES_FILE.fullmatch(name)) and int(match.group(1)) >= self._generation
+        )
+        intact = 0
+        for i, generation in enumerate(generations):
+            path = self.path / _changes_file(generation)
+            _, records, intact, size = self._replay(path)
+            if intact < size and i < len(generations) - 1:
+                raise ChangeLogCorruptedError(path, intact)
+            self.changes += records
+            self.dropped = size - intact
+
+        if generations:
+            self._generation = generations[-1]
+        self._fd = os.open(self.path / _changes_file(self._generation), os.O_WRONLY | os.O_CREAT, 0o644)
+        # Drop a record cut short by a crash, so that new records follow intact ones
+        os.ftruncate(self._fd, intact)
+        os.lseek(self._fd, intact, os.SEEK_SET)
+
+        for (kind, key), value in self._latest.items():
+            yield kind, key, value
+
+    def _replay(self, path: Path, header: bool = False) -> Tuple[int, int, int, int]:
+        """Replay the records of a file into the latest state, up to the first record that is not intact.
+
+        :param header: whether the file starts with the generation of a snapshot
+        :return: the generation (0 without header), the number of records, the length
+            of the intact part of the file and the length of the file
+        """
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if not size:
+                return 0, 0, 0, 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                decoder = CBORDecoder(data)
+                generation = 0
+                records = intact = 0
+                latest = self._latest
+                try:
+                    if header:
+                        generation = decoder.decode()
+                        intact = data.tell()
+                    while intact < size:
+                        kind, key, value, checksum = decoder.decode()
+                        if checksum != _checksum(kind, key, value):
+                            break
+                        if value is None:
+                            latest.pop((kind, key), None)
+                        else:
+                            latest[kind, key] = value
+                        intact = data.tell()
+                        records += 1
+                except (CBORDecodeError, ValueError, TypeError, AttributeError):
+                    # Cut short, or garbled into something other than a record
+                    pass
+
+                return generation, records, intact, size
+
+    def append(self, records: Iterable[Record]) -> None:
+        """Append records to the change log with a single write."""
+        frames: List[bytes] = []
+        for kind, key, value in records:
+            if value is None:
+                self._latest.pop((kind, key), None)
+            else:
+                self._latest[kind, key] = value
+            frames.append(_frame(kind, key, value))
+
+        if frames:
+            assert self._fd is not None
+            os.write(self._fd, b"".join(frames))
+            self.changes += len(frames)
+            self._dirty = True
+
+    def sync(self) -> None:
+        """Flush appended records to disk."""
+        if self._fd is not None and self._dirty:
+            self._dirty = False
+            os.fsync(self._fd)
+
+    def start_compaction(self) -> List[Tuple[Tuple[str, str], bytes]]:
+        """Switch to a new change log and return the records that the snapshot must hold.
+
+        The returned records are then written with :meth:`write_snapshot`, which can
+        run in a worker thread while new records go to the new change log.
+        """
+        assert self._fd is not None
+        records = list(self._latest.items())
+        self.sync()
+        os.close(self._fd)
+        self._generation += 1
+        self._fd = os.open(
+            self.path / _changes_file(self._generation), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644
+        )
+        self.changes = 0
+        return records
+
+    def write_snapshot(self, records: List[Tuple[Tuple[str, str], bytes]]) -> None:
+        """Write a snapshot of the given records, then delete the change logs it replaces."""
+        generation = self._generation
+        temp_path = self.path / f"{_SNAPSHOT_FILE}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(dumps(generation))
+            for (kind, key), value in records:
+                f.write(_frame(kind, key, value))
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temp_path, self.path / _SNAPSHOT_FILE)
+        _fsync_directory(self.path)
+        for name in os.listdir(self.path):
+            match = _CHANGES_FILE.fullmatch(name)
+            if match and int(match.group(1)) < generation:
+                os.remove(self.path / name)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            self.sync()
+            os.close(self._fd)
+            self._fd = None
@@ -1,69 +1,449 @@
+import json
+import math
+import os
+import socket
+import time
+import zlib
+from collections import Counter
+from collections.abc import AsyncIterator, Iterable, Mapping, Sequence
 from contextlib import AsyncExitStack
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from logging import Logger
 from typing import Any
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import attrs
-from apscheduler import Schedule, ScheduleAdded, ScheduleRemoved, ScheduleUpdated
+from anyio import Event, create_task_group, move_on_after, sleep, to_thread
+from apscheduler import (
+    ConflictingIdError,
+    ConflictPolicy,
+    Schedule,
+    ScheduleAdded,
+    ScheduleLookupError,
+    ScheduleRemoved,
+    ScheduleResult,
+    ScheduleUpdated,
+)
 from apscheduler.abc import EventBroker
-from apscheduler.datastores.sqlalchemy import SQLAlchemyDataStore
-from sqlalchemy import MetaData, Table, asc, desc
-from sqlalchemy.ext.asyncio import AsyncEngine
+from apscheduler.datastores.sqlalchemy import EmulatedTimestampTZ, SQLAlchemyDataStore
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    Column,
+    ColumnElement,
+    DateTime,
+    Index,
+    Integer,
+    LargeBinary,
+    MetaData,
+    Table,
+    Unicode,
+    Uuid,
+    and_,
+    asc,
+    bindparam,
+    cast,
+    column,
+    desc,
+    false,
+    func,
+    inspect,
+    literal,
+    or_,
+    select,
+    text,
+    tuple_,
+    values,
+)
+from sqlalchemy.engine import URL, Connection
+from sqlalchemy.event import listens_for
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.sql.type_api import TypeEngine
 
-from langgraph_lite_cron.scheduler.models import Cron
+from langgraph_lite_cron.cache import AsyncTTLCache
+from langgraph_lite_cron.metrics import (
+    CRON_SEARCH_CACHE,
+    CRON_SEARCH_LATENCY,
+    CRON_TABLE_FLUSH_FAILURES,
+    CRON_TABLE_FLUSH_LATENCY,
+    CRON_TABLE_PENDING_UPDATES,
+    span,
+    timed,
+)
+from langgraph_lite_cron.scheduler.cache import CronSearchCache
+from langgraph_lite_cron.scheduler.models import (
+    ALL_CRONS,
+    EXPORTED_CRON_FIELDS,
+    PUBLIC_CRON_FIELDS,
+    Cron,
+    CronCursor,
+    ScheduleChangedError,
+    Scope,
+    cron_id_of,
+    cron_scopes,
+)
+from langgraph_lite_cron.scheduler.payloads import (
+    canonical_json,
+    compress_payload,
+    decompress_payload,
+    split_payload,
+)
+
+# Columns of the cron table indexed along with cron_id as a tiebreaker
+_INDEXED_CRON_COLUMNS = ("created_at", "next_run_date", "end_time", "assistant_id", "thread_id")
+
+
+def _utc(value: datetime | None) -> datetime | None:
+    return value.astimezone(timezone.utc) if value is not None else None
+
+
+def _uuid(value: UUID | str | None) -> UUID | None:
+    return UUID(str(value)) if value is not None else None
+
+
+def _count_changes(
+    added: Iterable[Mapping[str, Any]],
+    removed: Iterable[Mapping[str, Any]] = (),
+) -> dict[Scope, int]:
+    """Return by how much the cron count of each assistant and thread changes when adding and removing cron rows.
+
+    There is no count of all crons, which every write would have to lock; it is the sum of the counts per assistant.
+    """
+    changes: Counter[Scope] = Counter()
+    for row in added:
+        changes.update(cron_scopes(row))
+    for row in removed:
+        changes.subtract(cron_scopes(row))
+    return {scope: change for scope, change in changes.items() if change and scope != ALL_CRONS}
+
+
+def shard_key(schedule_id: str) -> int:
+    """Hash a schedule ID to a stable non-negative 31-bit integer; its shard is this key modulo the shard count."""
+    return zlib.crc32(schedule_id.encode()) & 0x7FFFFFFF
+
+
+def _default_node_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:8]}"
 
 
 @attrs.define(eq=False, repr=False)
 class LanggraphSQLAlchemyDataStore(SQLAlchemyDataStore):
+    """
+    SQLAlchemy data store that mirrors APScheduler schedules into a ``cron`` table.
+
+    The cron table is created on startup along with indexes for the filters and the
+    common sort orders of searches. An existing cron table gets any missing columns
+    and indexes added, and indexes it no longer needs dropped.
+
+    Updates to ``next_run_date`` are buffered, keeping only the latest one per cron,
+    and written in bulk once ``cron_update_batch_size`` crons are pending or
+    ``cron_update_max_delay`` has passed, and when the data store stops.
+
+    :param json_indexes: also create GIN indexes on the cron ``metadata`` and
+        ``payload`` columns (PostgreSQL only)
+    :param cron_update_batch_size: number of pending cron updates that triggers
+        an immediate flush
+    :param cron_update_max_delay: maximum time (in seconds) a cron update stays
+        buffered before being written
+    :param search_cache_ttl: how long (in seconds) cron search results are cached;
+        0 disables the cache. Cached results are dropped on schedule events, which
+        reach every scheduler sharing the event broker.
+    :param search_cache_maxsize: maximum number of cached cron searches
+    :param shards: number of shards schedules are partitioned into; 0 disables
+        partitioning. Each node sharing the database leases a share of the shards and
+        only polls and acquires the schedules in them. The ``shard_key`` column is only
+        added to APScheduler's ``schedules`` table, and filled in, when partitioning is
+        enabled. With SQLite, transactions must take the write lock when they begin,
+        which the data store arranges on the engine it creates from a URL; a SQLite
+        engine passed in must be configured so by its owner.
+    :param shard_lease_duration: how long (in seconds) a node keeps its shards
+        without renewing their leases, which it does three times per lease
+    :param node_id: identifies this node in shard leases
+    :param payload_compression_threshold: size (in bytes) above which payloads are
+        stored compressed; 0 disables compression
+    :param payload_cache_size: maximum number of payloads kept in memory
+    """
+
+    json_indexes: bool = attrs.field(kw_only=True, default=False)
+    cron_update_batch_size: int = attrs.field(
+        kw_only=True, validator=attrs.validators.ge(1), default=1000
+    )
+    cron_update_max_delay: float = attrs.field(
+        kw_only=True, validator=attrs.validators.gt(0), default=1.0
+    )
+    search_cache_ttl: float = attrs.field(
+        kw_only=True, validator=attrs.validators.ge(0), default=0
+    )
+    search_cache_maxsize: int = attrs.field(
+        kw_only=True, validator=attrs.validators.ge(1), default=256
+    )
+    shards: int = attrs.field(kw_only=True, validator=attrs.validators.ge(0), default=0)
+    shard_lease_duration: float = attrs.field(
+        kw_only=True, validator=attrs.validators.gt(0), default=30.0
+    )
+    node_id: str = attrs.field(kw_only=True, factory=_default_node_id)
+    payload_compression_threshold: int = attrs.field(
+        kw_only=True, validator=attrs.validators.ge(0), default=1024
+    )
+    payload_cache_size: int = attrs.field(
+        kw_only=True, validator=attrs.validators.ge(1), default=256
+    )
+
     _t_cron: Table = attrs.field(init=False)
+    _t_cron_counts: Table = attrs.field(init=False)
+    _t_payloads: Table = attrs.field(init=False)
+    # Canonical JSON of payloads by digest, decoded for every caller as payloads are mutable
+    _payload_cache: AsyncTTLCache[str, bytes] = attrs.field(init=False)
+    # Latest (next_run_date, updated_at) per cron, waiting to be flushed
+    _pending_cron_updates: dict[UUID, tuple[datetime | None, datetime]] = attrs.field(
+        init=False, factory=dict
+    )
+    _cron_updates_full: Event = attrs.field(init=False)
+    _search_cache: CronSearchCache | None = attrs.field(init=False, default=None)
+    _t_shards: Table = attrs.field(init=False)
+    _t_nodes: Table = attrs.field(init=False)
+    # Shards leased by this node, and until when the leases are known to hold
+    _owned_shards: frozenset[int] = attrs.field(init=False, factory=frozenset)
+    _shards_leased_until: float = attrs.field(init=False, default=0.0)
 
     def __attrs_post_init__(self) -> None:
         super().__attrs_post_init__()
+        prefix = f"{self.schema}." if self.schema else ""
+        self._t_cron = self._metadata.tables[prefix + "cron"]
+        self._t_cron_counts = self._metadata.tables[prefix + "cron_counts"]
+        self._t_payloads = self._metadata.tables[prefix + "cron_payloads"]
+        # Payloads never change under a digest, so they only leave the cache to make room
+        self._payload_cache = AsyncTTLCache(ttl=math.inf, maxsize=self.payload_cache_size)
+        self._t_shards = self._metadata.tables[prefix + "scheduler_shards"]
+        self._t_nodes = self._metadata.tables[prefix + "scheduler_nodes"]
+        # Listeners are only added to an engine of our own, as they change every transaction
+        if self.shards and self._engine.dialect.name == "sqlite" and isinstance(self.engine_or_url, (str, URL)):
+            self._serialize_sqlite_transactions()
+
+    def _serialize_sqlite_transactions(self) -> None:
+        """Take the SQLite write lock when transactions begin.
+
+        pysqlite only begins a transaction at the first write, so two nodes could both read the same jobs as
+        available before either marks them acquired. SQLite has no row locks to prevent that otherwise.
+        """
+        sync_engine = self._engine.sync_engine if isinstance(self._engine, AsyncEngine) else self._engine
+
+        @listens_for(sync_engine, "connect")
+        def disable_pysqlite_transactions(dbapi_connection: Any, connection_record: Any) -> None:
+            dbapi_connection.isolation_level = None
+
+        @listens_for(sync_engine, "begin")
+        def begin_immediate(conn: Connection) -> None:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
 
     def get_table_definitions(self) -> MetaData:
         metadata = super().get_table_definitions()
-        Table("cron", metadata, schema=self.schema)
+
+        if self._supports_tzaware_timestamps:
+            timestamp_type: TypeEngine[datetime] = DateTime(timezone=True)
+        else:
+            timestamp_type = EmulatedTimestampTZ()
+
+        if self._engine.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import JSONB
+
+            json_type = JSONB
+        else:
+            json_type = JSON
+
+        cron = Table(
+            "cron",
+            metadata,
+            Column("cron_id", Uuid, primary_key=True),
+            Column("assistant_id", Uuid),
+            Column("thread_id", Uuid),
+            Column("user_id", Unicode(500)),
+            # Only crons added before payloads were stored by digest have their payload here
+            Column("payload", json_type, nullable=False),
+            Column("payload_digest", Unicode(64)),
+            Column("schedule", Unicode(500), nullable=False),
+            Column("next_run_date", timestamp_type),
+            Column("end_time", timestamp_type),
+            Column("created_at", timestamp_type, nullable=False),
+            Column("updated_at", timestamp_type, nullable=False),
+            Column("metadata", json_type, nullable=False),
+        )
+
+        # Only what the search, export, count and delete queries read is indexed, as
+        # every index is written on each insert and on each change of its columns:
+        # - created_at: the default sort of searches
+        # - next_run_date: searches for the crons due next; the only index written when
+        #   a cron fires
+        # - end_time: searches sorted by end time, written only on creation and PATCH
+        # - assistant_id, thread_id: searches, exports, counts and deletes filtered by
+        #   either ID (or both, through thread_id, which has the fewer crons), also
+        #   serving sorts by the ID and exports in cron_id order. Crons filtered this
+        #   way are sorted by other columns after they are read.
+        # Sorting all crons by updated_at, which changes on every fire, sorts the table.
+        for name in _INDEXED_CRON_COLUMNS:
+            Index(f"ix_cron_{name}", cron.c[name], cron.c.cron_id)
+
+        if self.json_indexes and self._engine.dialect.name == "postgresql":
+            Index("ix_cron_metadata", cron.c.metadata, postgresql_using="gin")
+            Index("ix_cron_payload", cron.c.payload, postgresql_using="gin")
+
+        # Payloads by digest, referenced by the schedules and cron rows holding the digest
+        Table(
+            "cron_payloads",
+            metadata,
+            Column("digest", Unicode(64), primary_key=True),
+            Column("data", LargeBinary, nullable=False),
+            Column("compressed", Boolean, nullable=False),
+            Column("refcount", BigInteger, nullable=False),
+        )
+
+        # Number of crons per assistant and thread, kept up to date along with the
+        # cron table
+        Table(
+            "cron_counts",
+            metadata,
+            Column("scope", Unicode(20), primary_key=True),
+            Column("scope_id", Uuid, primary_key=True),
+            Column("crons", BigInteger, nullable=False),
+        )
+
+        # Partitioning: schedules fall into shard shard_key % shards, which nodes lease
+        if self.shards:
+            prefix = f"{self.schema}." if self.schema else ""
+            metadata.tables[prefix + "schedules"].append_column(Column("shard_key", Integer))
+        Table(
+            "scheduler_shards",
+            metadata,
+            Column("shard", Integer, primary_key=True),
+            Column("owner", Unicode(500)),
+            Column("lease_until", timestamp_type),
+        )
+        Table(
+            "scheduler_nodes",
+            metadata,
+            Column("node_id", Unicode(500), primary_key=True),
+            Column("seen_until", timestamp_type, nullable=False),
+        )
+
         return metadata
 
+    def _convert_incoming_fire_times(self, data: dict[str, Any]) -> dict[str, Any]:
+        # The shard key, if partitioning is enabled, is not a field of schedules
+        data.pop("shard_key", None)
+        return super()._convert_incoming_fire_times(data)
+
     async def start(
         self,
         exit_stack: AsyncExitStack,
         event_broker: EventBroker,
         logger: Logger,
     ) -> None:
-        """Start the data store and subscribe to schedule events."""
+        """Start the data store, migrate the cron table and start flushing cron updates."""
         await super().start(exit_stack, event_broker, logger)
 
-        if isinstance(self._engine, AsyncEngine):
-            async with self._engine.connect() as aconn:
-                def _do_reflect(sync_conn):
-                    if "cron" in self._metadata.tables:
-                        self._metadata.remove(self._metadata.tables["cron"])
-                    self._metadata.reflect(
-                        bind=sync_conn,
-                        schema=self.schema,
-                        only=["cron"],
-                    )
+        async for attempt in self._retry():
+            with attempt:
+                async with self._begin_transaction() as conn:
+                    if isinstance(conn, AsyncConnection):
+                        await conn.run_sync(self._migrate_tables)
+                    else:
+                        await to_thread.run_sync(self._migrate_tables, conn)
 
-                await aconn.run_sync(_do_reflect)
-        else:
-            with self._engine.connect() as conn:
-                if "cron" in self._metadata.tables:
-                    self._metadata.remove(self._metadata.tables["cron"])
-                self._metadata.reflect(bind=conn, schema=self.schema, only=["cron"])
+        if self.shards:
+            await self._backfill_shard_keys()
+        await self._count_existing_crons()
 
-        prefix = f"{self.schema}." if self.schema else ""
-        self._t_cron = self._metadata.tables[prefix + "cron"]
+        # Exit in reverse order: stop the background loops, hand over the shards, then
+        # flush what is left
+        self._cron_updates_full = Event()
+        exit_stack.push_async_callback(self._flush_cron_updates)
+        if self.shards:
+            # Hold shards before the scheduler starts polling
+            await self._create_shards()
+            await self._rebalance_shards()
+            exit_stack.push_async_callback(self._leave_shards)
 
-        event_broker.subscribe(
-            self._handle_schedule_event,
-            event_types={ScheduleAdded, ScheduleUpdated, ScheduleRemoved},
-            is_async=True,
-        )
+        task_group = await exit_stack.enter_async_context(create_task_group())
+        exit_stack.callback(task_group.cancel_scope.cancel)
+        task_group.start_soon(self._flush_cron_updates_periodically)
+        if self.shards:
+            task_group.start_soon(self._rebalance_shards_periodically)
+
+        if self.search_cache_ttl:
+            # Results read before buffered updates are flushed must not be cached
+            self._search_cache = CronSearchCache(
+                ttl=self.search_cache_ttl,
+                maxsize=self.search_cache_maxsize,
+                settle_delay=self.cron_update_max_delay,
+            )
+            event_broker.subscribe(
+                self._search_cache.handle_event,
+                event_types={ScheduleAdded, ScheduleUpdated, ScheduleRemoved},
+                is_async=False,
+            )
 
         logger.info("Langgraph SQL Alchemy DataStore started with cron table sync")
 
+    def _migrate_tables(self, conn: Connection) -> None:
+        """Add missing columns to the cron table, and to the schedules table when partitioned, and missing
+        indexes to the cron table.
+
+        Indexes of the cron table named like the ones created here, but no longer defined, are dropped. Safe to run
+        on every startup: only what is missing gets created.
+        """
+        preparer = conn.dialect.identifier_preparer
+        for t in (self._t_cron, self._t_schedules) if self.shards else (self._t_cron,):
+            existing = {col["name"] for col in inspect(conn).get_columns(t.name, schema=t.schema)}
+            for col in t.columns:
+                if col.name not in existing:
+                    conn.execute(
+                        text(
+                            f"ALTER TABLE {preparer.format_table(t)} "
+                            f"ADD COLUMN {preparer.format_column(col)} "
+                            f"{col.type.compile(dialect=conn.dialect)}"
+                        )
+                    )
+                    self._logger.info(f"Added missing column {col.name!r} to {t.name} table")
+
+        defined = {index.name for index in self._t_cron.indexes}
+        # Indexes to drop are bound to a copy of the table, leaving its definition alone
+        detached = self._t_cron.to_metadata(MetaData())
+        for index in inspect(conn).get_indexes(self._t_cron.name, schema=self._t_cron.schema):
+            name = index["name"]
+            if name and name.startswith("ix_cron_") and name not in defined:
+                Index(name, detached.c.cron_id).drop(conn)
+                self._logger.info(f"Dropped index {name!r} of cron table")
+
+        for index in self._t_cron.indexes:
+            index.create(conn, checkfirst=True)
+
+    async def _backfill_shard_keys(self) -> None:
+        """Set the shard key of schedules added before shard keys existed"""
+        t = self._t_schedules
+        async for attempt in self._retry():
+            with attempt:
+                async with self._begin_transaction() as conn:
+                    query = select(t.c.id).where(t.c.shard_key.is_(None))
+                    ids = list((await self._execute(conn, query)).scalars())
+                    if not ids:
+                        return
+
+                    update = (
+                        t.update()
+                        .where(t.c.id == bindparam("b_id"))
+                        .values(shard_key=bindparam("b_shard_key"))
+                    )
+                    for i in range(0, len(ids), self.cron_update_batch_size):
+                        rows = [
+                            {"b_id": schedule_id, "b_shard_key": shard_key(schedule_id)}
+                            for schedule_id in ids[i : i + self.cron_update_batch_size]
+                        ]
+                        await self._execute(conn, update, rows)
+
+        self._logger.info(f"Set the shard key of {len(ids)} schedules")
+
     async def get_crons(
         self,
         *,
@@ -73,10 +453,88 @@ class LanggraphSQLAlchemyDataStore(SQLAlchemyDataStore):
         offset: int,
         sort_by: str,
         sort_order: str,
+        after: CronCursor | None = None,
     ) -> list[Cron]:
+        """Get crons with filtering, sorting, and pagination.
+
+        When ``after`` is given, results resume right after the cursor position using a
+        keyset predicate instead of skipping over earlier rows.
+        """
+        with timed(CRON_SEARCH_LATENCY.labels("sqlalchemy")):
+            return await self._search_crons(
+                public=False,
+                assistant_id=assistant_id,
+                thread_id=thread_id,
+                limit=limit,
+                offset=offset,
+                sort_by=sort_by,
+                sort_order=sort_order,
+                after=after,
+            )
+
+    async def get_public_crons(
+        self,
+        *,
+        assistant_id: UUID | None,
+        thread_id: UUID | None,
+        limit: int,
+        offset: int,
+        sort_by: str,
+        sort_order: str,
+        after: CronCursor | None = None,
+    ) -> list[dict[str, Any]]:
+        """Like :meth:`get_crons`, but return plain rows of the public cron fields.
 
+        Only the public fields, ``assistant_id`` and the sort field are selected, and
+        the rows are returned as they come from the database, without validation.
+        """
+        with timed(CRON_SEARCH_LATENCY.labels("sqlalchemy")):
+            return await self._search_crons(
+                public=True,
+                assistant_id=assistant_id,
+                thread_id=thread_id,
+                limit=limit,
+                offset=offset,
+                sort_by=sort_by,
+                sort_order=sort_order,
+                after=after,
+            )
+
+    async def _search_crons(
+        self,
+        *,
+        public: bool,
+        assistant_id: UUID | None,
+        thread_id: UUID | None,
+        limit: int,
+        offset: int,
+        sort_by: str,
+        sort_order: str,
+        after: CronCursor | None,
+    ) -> list[Any]:
+        cache_key = (
+            public,
+            assistant_id,
+            thread_id,
+            limit,
+            offset,
+            sort_by,
+            sort_order,
+            (after.value, after.cron_id) if after else None,
+        )
+        if self._search_cache is not None:
+            crons = self._search_cache.get(cache_key)
+            CRON_SEARCH_CACHE.labels("miss" if crons is None else "hit").inc()
+            if crons is not None:
+                return crons
+
+        started_at = time.monotonic()
         t = self._t_cron
-        query = t.select()
+        if public:
+            names = dict.fromkeys((*PUBLIC_CRON_FIELDS, "payload_digest", "assistant_id", sort_by))
+            query = select(*(t.c[name] for name in names))
+        else:
+            query = t.select()
 
         if assistant_id:
             query = query.where(self._t_cron.c.assistant_id == assistant_id)
@@ -94,101 +552,1047 @@ class LanggraphSQLAlchemyDataStore(SQLAlchemyDataStore):
         }
 
         sort_col = sort_col_map[sort_by]
-        query = query.order_by(asc(sort_col) if sort_order == "asc" else desc(sort_col))
-        query = query.offset(offset).limit(limit)
+        descending = sort_order == "desc"
+        if after:
+            query = query.where(self._after_cursor(sort_col, after, descending))
+
+        # Null values sort last and ties are broken by cron_id, as in the memory store
+        if sort_col is t.c.cron_id:
+            order_by = [desc(sort_col) if descending else asc(sort_col)]
+        elif descending:
+            order_by = [desc(sort_col).nulls_first(), desc(t.c.cron_id)]
+        else:
+            order_by = [asc(sort_col).nulls_last(), asc(t.c.cron_id)]
+
+        query = query.order_by(*order_by).offset(offset).limit(limit)
 
         async for attempt in self._retry():
             with attempt:
                 async with self._begin_transaction() as conn:
                     result = await self._execute(conn, query)
-                    rows = result.mappings().all()
+                    rows = [dict(row) for row in result.mappings()]
+
+        await self._resolve_payloads(rows)
+        if public:
+            crons: list[Any] = rows
+        else:
+            crons = [Cron.from_mapping(row) for row in rows]
+
+        if self._search_cache is not None:
+            scopes: list[Scope] = []
+            if assistant_id:
+                scopes.append(("assistant_id", assistant_id))
+            if thread_id:
+                scopes.append(("thread_id", thread_id))
+            self._search_cache.put(
+                cache_key,
+                crons,
+                scopes=scopes or [ALL_CRONS],
+                sort_by=sort_by,
+                started_at=started_at,
+            )
+
+        return crons
+
+    def _after_cursor(
+        self,
+        sort_col: ColumnElement,
+        cursor: CronCursor,
+        descending: bool,
+    ) -> ColumnElement[bool]:
+        """Build the keyset predicate selecting the rows that follow the cursor."""
+        id_col = self._t_cron.c.cron_id
+        if sort_col is id_col:
+            return id_col < cursor.cron_id if descending else id_col > cursor.cron_id
 
-        return [Cron.from_mapping(row) for row in rows]
+        if cursor.value is None:
+            if descending:
+                return or_(
+                    and_(sort_col.is_(None), id_col < cursor.cron_id),
+                    sort_col.is_not(None),
+                )
+            return and_(sort_col.is_(None), id_col > cursor.cron_id)
 
-    async def _handle_schedule_event(self, event: Any) -> None:
-        """Handle schedule events and sync to cron table."""
-        self._logger.info(f"Handling schedule event: {event}")
+        # Bind with the column types, which tuple_() does not infer on its own
+        key = tuple_(sort_col, id_col)
+        cursor_key = tuple_(literal(cursor.value, sort_col.type), literal(cursor.cron_id, id_col.type))
+        if descending:
+            return key < cursor_key
+        return or_(key > cursor_key, sort_col.is_(None))
+
+    async def iter_crons(
+        self,
+        *,
+        assistant_id: UUID | None = None,
+        thread_id: UUID | None = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Iterate over every cron, in batches of rows of the exported cron fields ordered by cron ID.
+
+        Rows are read through a server-side cursor, so memory use does not grow with
+        the number of crons. SQLite, which would keep writers locked out until the end
+        of the read, and synchronous engines read one keyset page per batch instead.
+        """
+        # Include next run dates still waiting in the buffer
+        await self._flush_cron_updates()
+
+        t = self._t_cron
+        query = select(*(t.c[name] for name in (*EXPORTED_CRON_FIELDS, "payload_digest"))).order_by(t.c.cron_id)
+        if assistant_id:
+            query = query.where(t.c.assistant_id == assistant_id)
+        if thread_id:
+            query = query.where(t.c.thread_id == thread_id)
+
+        if self._engine.dialect.name == "sqlite" or not isinstance(self._engine, AsyncEngine):
+            last_id: UUID | None = None
+            while True:
+                page = query.limit(batch_size)
+                if last_id is not None:
+                    page = page.where(t.c.cron_id > last_id)
+                async for attempt in self._retry():
+                    with attempt:
+                        async with self._begin_transaction() as conn:
+                            rows = [dict(row) for row in (await self._execute(conn, page)).mappings()]
+
+                if rows:
+                    last_id = rows[-1]["cron_id"]
+                    await self._resolve_payloads(rows)
+                    yield rows
+                if len(rows) < batch_size:
+                    return
+
+        async with self._engine.connect() as conn:
+            result = await conn.stream(query.execution_options(yield_per=batch_size))
+            async for partition in result.mappings().partitions():
+                rows = [dict(row) for row in partition]
+                await self._resolve_payloads(rows)
+                yield rows
+
+    async def get_payload(self, digest: str) -> dict[str, Any] | None:
+        """Return a copy of the payload stored under a digest, or ``None`` if there is none."""
+        payloads = await self._get_payloads([digest])
+        return payloads.get(digest)
+
+    async def _get_payloads(self, digests: Iterable[str]) -> dict[str, dict[str, Any]]:
+        """Return the payloads stored under the given digests, decoded from the cache where possible"""
+        payloads: dict[str, dict[str, Any]] = {}
+        missing: list[str] = []
+        for digest in dict.fromkeys(digests):
+            data = self._payload_cache.get(digest)
+            if data is None:
+                missing.append(digest)
+            else:
+                payloads[digest] = json.loads(data)
+
+        if missing:
+            t = self._t_payloads
+            query = select(t.c.digest, t.c.data, t.c.compressed).where(t.c.digest.in_(missing))
+            async for attempt in self._retry():
+                with attempt:
+                    async with self._begin_transaction() as conn:
+                        stored = (await self._execute(conn, query)).all()
+
+            for digest, data, compressed in stored:
+                data = decompress_payload(data, compressed)
+                self._payload_cache.put(digest, data)
+                payloads[digest] = json.loads(data)
+
+        return payloads
+
+    async def _resolve_payloads(self, rows: list[dict[str, Any]]) -> None:
+        """Replace the payload digests of cron rows with the payloads they refer to.
+
+        Payloads are fetched once per distinct digest rather than joined, as many crons
+        may share a large one.
+        """
+        digests = [row["payload_digest"] for row in rows if row.get("payload_digest")]
+        payloads = await self._get_payloads(digests) if digests else {}
+        for row in rows:
+            digest = row.pop("payload_digest", None)
+            if digest is not None:
+                row["payload"] = payloads.get(digest, {})
+
+    async def count_crons(self, *, assistant_id: UUID | None, thread_id: UUID | None) -> int:
+        """Count crons, optionally of an assistant and/or a thread.
+
+        Counts per assistant or thread are read from the ``cron_counts`` table, and
+        the total is the sum of the counts per assistant plus the crons without an
+        assistant, found through the index on ``assistant_id``. Counting the crons of
+        both an assistant and a thread falls back to a COUNT over that index.
+        """
+        t, counts = self._t_cron, self._t_cron_counts
+        queries: list[Any]
+        if assistant_id and thread_id:
+            queries = [
+                select(func.count())
+                .select_from(t)
+                .where(t.c.assistant_id == assistant_id, t.c.thread_id == thread_id)
+            ]
+        elif assistant_id:
+            queries = [select(counts.c.crons).where(counts.c.scope == "assistant_id", counts.c.scope_id == assistant_id)]
+        elif thread_id:
+            queries = [select(counts.c.crons).where(counts.c.scope == "thread_id", counts.c.scope_id == thread_id)]
+        else:
+            queries = [
+                select(func.sum(counts.c.crons)).where(counts.c.scope == "assistant_id"),
+                select(func.count()).select_from(t).where(t.c.assistant_id.is_(None)),
+            ]
+
+        async for attempt in self._retry():
+            with attempt:
+                async with self._begin_transaction() as conn:
+                    count = 0
+                    for query in queries:
+                        count += (await self._execute(conn, query)).scalar() or 0
+
+        return count
+
+    async def add_schedule(
+        self, schedule: Schedule, conflict_policy: ConflictPolicy
+    ) -> None:
+        """Add a schedule, its cron row and a reference to its payload in a single transaction."""
+        event: ScheduleAdded | ScheduleUpdated
+        payloads = self._take_payloads([schedule])
+        schedule_values = self._convert_outgoing_fire_times(schedule.marshal(self.serializer))
+        if self.shards:
+            schedule_values["shard_key"] = shard_key(schedule.id)
+        cron_values = self._cron_values(
+            schedule, schedule.next_fire_time, datetime.now(timezone.utc)
+        )
+        references = Counter([cron_values["payload_digest"]])
         try:
-            if isinstance(event, ScheduleAdded):
-                await self._add_cron(event)
-            elif isinstance(event, ScheduleUpdated):
-                await self._update_cron(event)
-            elif isinstance(event, ScheduleRemoved):
-                await self._remove_cron(event)
+            async for attempt in self._retry():
+                with attempt:
+                    async with self._begin_transaction() as conn:
+                        await self._execute(conn, self._t_schedules.insert().values(**schedule_values))
+                        await self._execute(conn, self._t_cron.insert().values(**cron_values))
+                        await self._update_cron_counts(conn, _count_changes([cron_values]))
+                        await self._update_payload_references(conn, references, payloads)
+        except IntegrityError:
+            if conflict_policy is ConflictPolicy.exception:
+                raise ConflictingIdError(schedule.id) from None
+            elif conflict_policy is ConflictPolicy.replace:
+                update = (
+                    self._t_schedules.update()
+                    .where(self._t_schedules.c.id == schedule.id)
+                    .values({key: value for key, value in schedule_values.items() if key != "id"})
+                )
+                # Keep the creation time of the cron being replaced
+                cron_update = (
+                    self._t_cron.update()
+                    .where(self._t_cron.c.cron_id == UUID(schedule.id))
+                    .values({key: value for key, value in cron_values.items() if key not in ("cron_id", "created_at")})
+                )
+                replaced = select(
+                    self._t_cron.c.assistant_id,
+                    self._t_cron.c.thread_id,
+                    self._t_cron.c.payload_digest,
+                ).where(self._t_cron.c.cron_id == UUID(schedule.id))
+                async for attempt in self._retry():
+                    with attempt:
+                        async with self._begin_transaction() as conn:
+                            references = Counter([cron_values["payload_digest"]])
+                            old = (await self._execute(conn, replaced)).mappings().first()
+                            # The conflict may be with a cron row whose schedule is gone, or the reverse
+                            schedule_replaced = (await self._execute(conn, update)).rowcount > 0
+                            if not schedule_replaced:
+                                await self._execute(conn, self._t_schedules.insert().values(**schedule_values))
+                            if old is None:
+                                await self._execute(conn, self._t_cron.insert().values(**cron_values))
+                                await self._update_cron_counts(conn, _count_changes([cron_values]))
+                            else:
+                                await self._execute(conn, cron_update)
+                                await self._update_cron_counts(conn, _count_changes([cron_values], [old]))
+                                references[old["payload_digest"]] -= 1
+                            await self._update_payload_references(conn, references, payloads)
 
-        except Exception as e:
-            self._logger.error(f"Failed to sync schedule to cron: {e}")
+                event = (ScheduleUpdated if schedule_replaced else ScheduleAdded)(
+                    schedule_id=schedule.id,
+                    task_id=schedule.task_id,
+                    next_fire_time=schedule.next_fire_time,
+                )
+                # The replaced cron may have belonged to another assistant or thread
+                self._invalidate_cached_searches(UUID(schedule.id))
+                self._invalidate_cached_searches(UUID(schedule.id), cron_values)
+                await self._event_broker.publish(event)
+        else:
+            self._logger.info(f"Added schedule {schedule.id} to cron table")
+            self._invalidate_cached_searches(cron_values["cron_id"], cron_values)
+            event = ScheduleAdded(
+                schedule_id=schedule.id,
+                task_id=schedule.task_id,
+                next_fire_time=schedule.next_fire_time,
+            )
+            await self._event_broker.publish(event)
 
-    async def _add_cron(self, event: ScheduleAdded) -> None:
-        """Add new schedule to cron table with full schedule details."""
-        # Get the full schedule object to access all details
-        schedules = await self.get_schedules({event.schedule_id})
+    async def add_schedules(self, schedules: Sequence[Schedule]) -> None:
+        """Insert many schedules and their cron rows in a single transaction."""
         if not schedules:
-            self._logger.warning(f"Schedule {event.schedule_id} not found")
             return
 
-        schedule: Schedule = schedules[0]
+        now = datetime.now(timezone.utc)
+        payloads = self._take_payloads(schedules)
+        schedule_values = [
+            self._convert_outgoing_fire_times(schedule.marshal(self.serializer))
+            for schedule in schedules
+        ]
+        if self.shards:
+            for values in schedule_values:
+                values["shard_key"] = shard_key(values["id"])
+        cron_values = [
+            self._cron_values(schedule, schedule.next_fire_time, now)
+            for schedule in schedules
+        ]
 
-        # Extract metadata from schedule
-        metadata = schedule.metadata or {}
+        async for attempt in self._retry():
+            with attempt:
+                async with self._begin_transaction() as conn:
+                    await self._execute(conn, self._t_schedules.insert(), schedule_values)
+                    await self._execute(conn, self._t_cron.insert(), cron_values)
+                    await self._update_cron_counts(conn, _count_changes(cron_values))
+                    await self._update_payload_references(
+                        conn, Counter(row["payload_digest"] for row in cron_values), payloads
+                    )
+
+        self._logger.info(f"Added {len(schedules)} schedules to cron table")
+        for row in cron_values:
+            self._invalidate_cached_searches(row["cron_id"], row)
+
+        for schedule in schedules:
+            await self._event_broker.publish(
+                ScheduleAdded(
+                    schedule_id=schedule.id,
+                    task_id=schedule.task_id,
+                    next_fire_time=schedule.next_fire_time,
+                )
+            )
+
+    async def update_schedule(self, schedule: Schedule) -> Cron:
+        """Update an existing schedule and its cron row in place, in a single transaction.
+
+        The creation time and the assistant and thread of the cron are left as they are.
+
+        :return: the updated cron
+        :raises ScheduleLookupError: if the schedule does not exist
+        :raises ScheduleChangedError: if the schedule is acquired by a scheduler, or was
+            released with a new fire time since it was read
+        """
+        payloads = self._take_payloads([schedule])
+        schedule_values = self._convert_outgoing_fire_times(schedule.marshal(self.serializer))
+        for key in ("id", "acquired_by", "acquired_until"):
+            schedule_values.pop(key, None)
 
-        # Prepare cron table data
-        data = {
-            "cron_id": schedule.id,
-            "assistant_id": metadata.get("assistant_id"),
-            "thread_id": metadata.get("thread_id"),
+        cron_id = UUID(schedule.id)
+        cron_values = self._cron_values(schedule, schedule.next_fire_time, datetime.now(timezone.utc))
+        cron_values = {
+            name: cron_values[name]
+            for name in ("payload", "payload_digest", "schedule", "next_run_date", "end_time", "updated_at", "metadata")
+        }
+
+        # Releasing a schedule overwrites its trigger and fire times, so the update only
+        # applies to a schedule that is not being processed and still has the fire times
+        # it was read with
+        s, t = self._t_schedules, self._t_cron
+        last_fire_time = schedule_values["last_fire_time"]
+        exists = select(s.c.id).where(s.c.id == schedule.id)
+        replaced = select(t.c.payload_digest).where(t.c.cron_id == cron_id)
+        cron_update = t.update().where(t.c.cron_id == cron_id).values(**cron_values)
+        async for attempt in self._retry():
+            with attempt:
+                async with self._begin_transaction() as conn:
+                    update = (
+                        s.update()
+                        .where(
+                            s.c.id == schedule.id,
+                            s.c.last_fire_time.is_(None) if last_fire_time is None else s.c.last_fire_time == last_fire_time,
+                            or_(s.c.acquired_until.is_(None), s.c.acquired_until < datetime.now(timezone.utc)),
+                        )
+                        .values(**schedule_values)
+                    )
+                    if (await self._execute(conn, update)).rowcount == 0:
+                        if (await self._execute(conn, exists)).first() is None:
+                            raise ScheduleLookupError(schedule.id)
+                        raise ScheduleChangedError(schedule.id)
+
+                    old_digest = (await self._execute(conn, replaced)).scalar()
+                    if self._supports_update_returning:
+                        row = (await self._execute(conn, cron_update.returning(*t.columns))).mappings().first()
+                    else:
+                        await self._execute(conn, cron_update)
+                        row = (await self._execute(conn, t.select().where(t.c.cron_id == cron_id))).mappings().first()
+                    if row is None:
+                        raise ScheduleLookupError(schedule.id)
+
+                    references = Counter([cron_values["payload_digest"]])
+                    references[old_digest] -= 1
+                    await self._update_payload_references(conn, references, payloads)
+
+        # A buffered next run date from before the update would overwrite the new one
+        self._pending_cron_updates.pop(cron_id, None)
+        self._invalidate_cached_searches(cron_id)
+        await self._event_broker.publish(
+            ScheduleUpdated(
+                schedule_id=schedule.id,
+                task_id=schedule.task_id,
+                next_fire_time=schedule.next_fire_time,
+            )
+        )
+
+        rows = [dict(row)]
+        await self._resolve_payloads(rows)
+        return Cron.from_mapping(rows[0])
+
+    def _invalidate_cached_searches(
+        self,
+        cron_id: UUID,
+        cron_values: dict[str, Any] | None = None,
+    ) -> None:
+        """Drop the cached searches affected by adding or removing a cron on this scheduler.
+
+        Other schedulers drop theirs when the schedule event reaches them.
+        """
+        if self._search_cache is None:
+            return
+
+        scopes: list[Scope] | None = None
+        if cron_values is not None:
+            scopes = [ALL_CRONS]
+            for field in ("assistant_id", "thread_id"):
+                if cron_values[field] is not None:
+                    scopes.append((field, cron_values[field]))
+
+        self._search_cache.invalidate_cron(cron_id, members=True, scopes=scopes)
+
+    def _take_payloads(self, schedules: Iterable[Schedule]) -> dict[str, dict[str, Any]]:
+        """Move the payloads out of the metadata of new schedules, leaving their digests.
+
+        :return: the payloads by digest
+        """
+        payloads: dict[str, dict[str, Any]] = {}
+        for schedule in schedules:
+            schedule.metadata, digest, payload = split_payload(schedule.metadata or {})
+            if payload is not None:
+                payloads[digest] = payload
+        return payloads
+
+    @staticmethod
+    def _cron_values(
+        schedule: Schedule,
+        next_run_date: datetime | None,
+        now: datetime,
+    ) -> dict[str, Any]:
+        """Build the cron table row mirroring the given schedule."""
+        metadata = schedule.metadata or {}
+        return {
+            "cron_id": UUID(schedule.id),
+            "assistant_id": _uuid(metadata.get("assistant_id")),
+            "thread_id": _uuid(metadata.get("thread_id")),
             "user_id": metadata.get("user_id"),
-            "payload": metadata.get("payload"),
+            "payload": metadata.get("payload") or {},
+            "payload_digest": metadata.get("payload_digest"),
             "schedule": metadata.get("schedule"),
-            "next_run_date": event.next_fire_time,
-            "end_time": getattr(schedule.trigger, "end_time"),
-            "created_at": datetime.now(),
-            "updated_at": datetime.now(),
-            "metadata": metadata.get("metadata"),
+            "next_run_date": _utc(next_run_date),
+            "end_time": _utc(getattr(schedule.trigger, "end_time")),
+            "created_at": now,
+            "updated_at": now,
+            "metadata": metadata.get("metadata") or {},
         }
 
-        # Remove None values
-        data = {k: v for k, v in data.items() if v is not None}
+    def _shard_filter(self, shards: frozenset[int]) -> ColumnElement[bool]:
+        t = self._t_schedules
+        condition = (t.c.shard_key % self.shards).in_(sorted(shards))
+        # Schedules without a shard key yet are taken care of by the owner of shard 0
+        if 0 in shards:
+            condition = or_(condition, t.c.shard_key.is_(None))
+        return condition
 
-        # Insert into cron table
-        insert = self._t_cron.insert().values(**data)
+    def _current_shards(self) -> frozenset[int]:
+        """Return the shards this node holds, or none once their leases may have lapsed"""
+        if time.monotonic() >= self._shards_leased_until:
+            return frozenset()
+        return self._owned_shards
 
+    async def acquire_schedules(
+        self, scheduler_id: str, lease_duration: timedelta, limit: int
+    ) -> list[Schedule]:
+        """Acquire due schedules, only from the shards this node holds when partitioned."""
+        if not self.shards:
+            return await super().acquire_schedules(scheduler_id, lease_duration, limit)
+
+        shards = self._current_shards()
+        if not shards:
+            return []
+
+        # A copy of SQLAlchemyDataStore.acquire_schedules of APScheduler 4.0.0a6, which
+        # has no hook for another predicate, with the shard filter added. Compare it with
+        # upstream when upgrading APScheduler.
+        t = self._t_schedules
         async for attempt in self._retry():
             with attempt:
                 async with self._begin_transaction() as conn:
-                    await self._execute(conn, insert)
-                    self._logger.info(f"Added schedule {schedule.id} to cron table")
+                    now = datetime.now(timezone.utc)
+                    acquired_until = now + lease_duration
+                    if self._supports_tzaware_timestamps:
+                        comparison = t.c.next_fire_time <= now
+                    else:
+                        comparison = t.c.next_fire_time <= int(now.timestamp() * 1000_000)
 
-    async def _update_cron(self, event: ScheduleUpdated) -> None:
-        """Update existing schedule in cron table."""
+                    schedules_cte = (
+                        select(t.c.id)
+                        .where(
+                            t.c.next_fire_time.isnot(None),
+                            comparison,
+                            t.c.paused == false(),
+                            self._shard_filter(shards),
+                            or_(
+                                t.c.acquired_by == scheduler_id,
+                                t.c.acquired_until.is_(None),
+                                t.c.acquired_until < now,
+                            ),
+                        )
+                        .order_by(t.c.next_fire_time)
+                        .limit(limit)
+                        .with_for_update(skip_locked=True)
+                        .cte()
+                    )
+                    update = (
+                        t.update()
+                        .where(t.c.id.in_(select(schedules_cte.c.id)))
+                        .values(acquired_by=scheduler_id, acquired_until=acquired_until)
+                    )
+                    if self._supports_update_returning:
+                        result = await self._execute(conn, update.returning(*t.columns))
+                    else:
+                        await self._execute(conn, update)
+                        query = t.select().where(t.c.acquired_by == scheduler_id)
+                        result = await self._execute(conn, query)
 
-        update_data = {
-            "next_run_date": event.next_fire_time,
-            "updated_at": datetime.now(),
-        }
+                    schedules = await self._deserialize_schedules(result)
+
+        return schedules
+
+    async def get_next_schedule_run_time(self) -> datetime | None:
+        """Return the next fire time among this node's shards when partitioned.
+
+        The result is capped at the next shard rebalance, so that the scheduler also
+        polls shards this node takes over while it sleeps.
+        """
+        if not self.shards:
+            return await super().get_next_schedule_run_time()
 
-        update = (
-            self._t_cron.update()
-            .where(self._t_cron.c.cron_id == event.schedule_id)
-            .values(**update_data)
+        rebalance_at = datetime.now(timezone.utc) + timedelta(seconds=self.shard_lease_duration / 3)
+        shards = self._current_shards()
+        if not shards:
+            return rebalance_at
+
+        t = self._t_schedules
+        columns = [t.c.next_fire_time]
+        if not self._supports_tzaware_timestamps:
+            columns.append(t.c.next_fire_time_utcoffset)
+
+        query = (
+            select(*columns)
+            .where(
+                t.c.next_fire_time.isnot(None),
+                t.c.paused == false(),
+                t.c.acquired_by.is_(None),
+                self._shard_filter(shards),
+            )
+            .order_by(t.c.next_fire_time)
+            .limit(1)
         )
+        async for attempt in self._retry():
+            with attempt:
+                async with self._begin_transaction() as conn:
+                    row = (await self._execute(conn, query)).first()
+
+        if row is None:
+            return rebalance_at
+        if self._supports_tzaware_timestamps:
+            next_fire_time = row[0]
+        else:
+            next_fire_time = datetime.fromtimestamp(
+                row[0] / 1000_000, tz=timezone(timedelta(minutes=row[1]))
+            )
+        return min(next_fire_time, rebalance_at)
 
+    async def release_schedules(
+        self, scheduler_id: str, results: Sequence[ScheduleResult]
+    ) -> None:
+        """Release schedules and buffer the new next run dates of their crons."""
+        await super().release_schedules(scheduler_id, results)
+        if not results:
+            return
+
+        # Schedules whose trigger fails to serialize are removed on release, so their
+        # cron rows go with them
+        schedule_ids = {result.schedule_id for result in results}
         async for attempt in self._retry():
             with attempt:
                 async with self._begin_transaction() as conn:
-                    result = await self._execute(conn, update)
-                    if result.rowcount > 0:
-                        self._logger.debug(f"Updated schedule {event.schedule_id} in cron table")
-
-    async def _remove_cron(self, event: ScheduleRemoved) -> None:
-        """Remove schedule in cron table."""
-        delete = (
-            self._t_cron.delete()
-            .where(self._t_cron.c.cron_id == event.schedule_id)
+                    query = select(self._t_schedules.c.id).where(
+                        self._t_schedules.c.id.in_(schedule_ids)
+                    )
+                    remaining_ids = set((await self._execute(conn, query)).scalars())
+                    await self._delete_crons(conn, schedule_ids - remaining_ids)
+
+        # Only the scheduler that processed a schedule writes its cron row, so the
+        # number of writes does not grow with the number of schedulers
+        now = datetime.now(timezone.utc)
+        for result in results:
+            if result.schedule_id not in remaining_ids:
+                continue
+            if (cron_id := cron_id_of(result.schedule_id)) is not None:
+                self._pending_cron_updates[cron_id] = (_utc(result.next_fire_time), now)
+
+        CRON_TABLE_PENDING_UPDATES.set(len(self._pending_cron_updates))
+        if len(self._pending_cron_updates) >= self.cron_update_batch_size:
+            self._cron_updates_full.set()
+
+    async def remove_schedules(self, ids: Iterable[str]) -> None:
+        """Remove schedules and their cron rows in a single transaction.
+
+        Unlike the base method, removing the cron rows, counts and payload references
+        too cannot leave them behind, and the schedules are deleted in chunks.
+        """
+        ids = list(ids)
+        async for attempt in self._retry():
+            with attempt:
+                async with self._begin_transaction() as conn:
+                    removed_ids = await self._remove_schedules(conn, ids)
+
+        await self._publish_schedules_removed(removed_ids)
+
+    async def delete_crons(
+        self,
+        *,
+        assistant_id: UUID | None = None,
+        thread_id: UUID | None = None,
+        cron_ids: Sequence[UUID] | None = None,
+    ) -> int:
+        """Delete the crons matching every given filter, with their schedules, in a single transaction.
+
+        :return: the number of deleted crons
+        """
+        t = self._t_cron
+        query = select(t.c.cron_id)
+        if assistant_id:
+            query = query.where(t.c.assistant_id == assistant_id)
+        if thread_id:
+            query = query.where(t.c.thread_id == thread_id)
+
+        async for attempt in self._retry():
+            with attempt:
+                async with self._begin_transaction() as conn:
+                    if cron_ids is None:
+                        matched = list((await self._execute(conn, query)).scalars())
+                    else:
+                        matched = []
+                        for i in range(0, len(cron_ids), self.cron_update_batch_size):
+                            chunk = query.where(t.c.cron_id.in_(cron_ids[i : i + self.cron_update_batch_size]))
+                            matched.extend((await self._execute(conn, chunk)).scalars())
+                    removed_ids = await self._remove_schedules(conn, [str(cron_id) for cron_id in matched])
+
+        await self._publish_schedules_removed(removed_ids)
+        return len(removed_ids)
+
+    async def _remove_schedules(
+        self,
+        conn: Connection | AsyncConnection,
+        ids: Sequence[str],
+    ) -> list[tuple[str, str]]:
+        """Delete schedules and their cron rows, in chunks that stay within the bound parameter limits.
+
+        :return: the ID and task ID of every removed schedule
+        """
+        t = self._t_schedules
+        removed_ids: list[tuple[str, str]] = []
+        for i in range(0, len(ids), self.cron_update_batch_size):
+            chunk = ids[i : i + self.cron_update_batch_size]
+            delete = t.delete().where(t.c.id.in_(chunk))
+            if self._supports_update_returning:
+                removed = (await self._execute(conn, delete.returning(t.c.id, t.c.task_id))).all()
+            else:
+                query = select(t.c.id, t.c.task_id).where(t.c.id.in_(chunk))
+                removed = (await self._execute(conn, query)).all()
+                await self._execute(conn, delete)
+
+            removed_ids.extend((schedule_id, task_id) for schedule_id, task_id in removed)
+            await self._delete_crons(conn, [schedule_id for schedule_id, _ in removed])
+
+        return removed_ids
+
+    async def _publish_schedules_removed(self, removed_ids: Iterable[tuple[str, str]]) -> None:
+        for schedule_id, task_id in removed_ids:
+            await self._event_broker.publish(
+                ScheduleRemoved(
+                    schedule_id=schedule_id, task_id=task_id, finished=False
+                )
+            )
+
+    async def cleanup(self) -> None:
+        """Clean up the data store, then remove the cron rows of the finished schedules it removed.
+
+        Finished crons have no next run date, so their rows are found through the index
+        on ``next_run_date`` and removed in one transaction once their schedules are gone.
+        """
+        await super().cleanup()
+
+        cron, schedules = self._t_cron, self._t_schedules
+        finished = {cron_id for cron_id, (next_run_date, _) in self._pending_cron_updates.items() if next_run_date is None}
+        async for attempt in self._retry():
+            with attempt:
+                async with self._begin_transaction() as conn:
+                    query = select(cron.c.cron_id).where(cron.c.next_run_date.is_(None))
+                    candidates = [str(cron_id) for cron_id in finished | set((await self._execute(conn, query)).scalars())]
+                    for i in range(0, len(candidates), self.cron_update_batch_size):
+                        chunk = candidates[i : i + self.cron_update_batch_size]
+                        query = select(schedules.c.id).where(schedules.c.id.in_(chunk))
+                        remaining_ids = set((await self._execute(conn, query)).scalars())
+                        await self._delete_crons(conn, [cron_id for cron_id in chunk if cron_id not in remaining_ids])
+
+    async def _delete_crons(
+        self,
+        conn: Connection | AsyncConnection,
+        schedule_ids: Iterable[str],
+    ) -> None:
+        ids = [cron_id for cron_id in map(cron_id_of, schedule_ids) if cron_id is not None]
+        for cron_id in ids:
+            self._pending_cron_updates.pop(cron_id, None)
+
+        if ids:
+            t = self._t_cron
+            delete = t.delete().where(t.c.cron_id.in_(ids))
+            columns = (t.c.assistant_id, t.c.thread_id, t.c.payload_digest)
+            if self._supports_update_returning:
+                result = await self._execute(conn, delete.returning(*columns))
+                removed = result.mappings().all()
+            else:
+                query = select(*columns).where(t.c.cron_id.in_(ids))
+                removed = (await self._execute(conn, query)).mappings().all()
+                await self._execute(conn, delete)
+            await self._update_cron_counts(conn, _count_changes([], removed))
+            references: Counter[str | None] = Counter()
+            references.subtract(row["payload_digest"] for row in removed)
+            await self._update_payload_references(conn, references)
+            for cron_id in ids:
+                self._invalidate_cached_searches(cron_id)
+            self._logger.info(f"Removed {len(ids)} schedules from cron table")
+
+    async def _update_cron_counts(
+        self,
+        conn: Connection | AsyncConnection,
+        changes: dict[Scope, int],
+    ) -> None:
+        """Add to the counts of the given scopes in the ``cron_counts`` table"""
+        if not changes:
+            return
+
+        # Rows are locked in the same order by every transaction, so they cannot deadlock
+        t = self._t_cron_counts
+        rows = sorted(
+            (
+                {"scope": scope, "scope_id": scope_id, "crons": change}
+                for (scope, scope_id), change in changes.items()
+            ),
+            key=lambda row: (row["scope"], str(row["scope_id"])),
         )
 
+        dialect = self._engine.dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+
+            upsert = insert(t)
+            upsert = upsert.on_conflict_do_update(
+                index_elements=[t.c.scope, t.c.scope_id],
+                set_={"crons": t.c.crons + upsert.excluded.crons},
+            )
+            await self._execute(conn, upsert, rows)
+            return
+
+        for row in rows:
+            update = (
+                t.update()
+                .where(t.c.scope == row["scope"], t.c.scope_id == row["scope_id"])
+                .values(crons=t.c.crons + row["crons"])
+            )
+            if (await self._execute(conn, update)).rowcount == 0:
+                await self._execute(conn, t.insert().values(**row))
+
+    async def _update_payload_references(
+        self,
+        conn: Connection | AsyncConnection,
+        changes: Mapping[str | None, int],
+        payloads: Mapping[str, dict[str, Any]] | None = None,
+    ) -> None:
+        """Add to the reference counts of payloads, storing new ones and deleting unreferenced ones.
+
+        :param changes: how many references to each digest were added or removed
+        :param payloads: the payloads that references are added to, by digest
+        """
+        changes = {digest: change for digest, change in changes.items() if digest and change}
+        if not changes:
+            return
+
+        t = self._t_payloads
+        payloads = payloads or {}
+        dialect = self._engine.dialect.name
+        upsert = None
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+
+            upsert = insert(t)
+            upsert = upsert.on_conflict_do_update(
+                index_elements=[t.c.digest],
+                set_={"refcount": t.c.refcount + upsert.excluded.refcount},
+            )
+
+        # Rows are locked in the same order by every transaction, so they cannot deadlock
+        for digest, change in sorted(changes.items()):
+            update = t.update().where(t.c.digest == digest).values(refcount=t.c.refcount + change)
+            payload = payloads.get(digest) if change > 0 else None
+            if payload is None:
+                await self._execute(conn, update)
+                continue
+
+            data = canonical_json(payload)
+            self._payload_cache.put(digest, data)
+            data, compressed = compress_payload(data, self.payload_compression_threshold)
+            row = {"digest": digest, "data": data, "compressed": compressed, "refcount": change}
+            if upsert is not None:
+                await self._execute(conn, upsert, [row])
+            elif (await self._execute(conn, update)).rowcount == 0:
+                await self._execute(conn, t.insert().values(**row))
+
+        released = [digest for digest, change in changes.items() if change < 0]
+        if released:
+            await self._execute(
+                conn, t.delete().where(t.c.digest.in_(released), t.c.refcount <= 0)
+            )
+
+    async def _count_existing_crons(self) -> None:
+        """Fill the ``cron_counts`` table from the cron table, unless it was filled already"""
+        cron, t = self._t_cron, self._t_cron_counts
+        try:
+            async for attempt in self._retry():
+                with attempt:
+                    async with self._begin_transaction() as conn:
+                        # Earlier versions also kept a count of all crons
+                        await self._execute(conn, t.delete().where(t.c.scope == ALL_CRONS[0]))
+                        if (await self._execute(conn, select(t.c.scope).limit(1))).first() is not None:
+                            return
+
+                        rows: list[dict[str, Any]] = []
+                        for field in ("assistant_id", "thread_id"):
+                            query = (
+                                select(cron.c[field], func.count())
+                                .where(cron.c[field].is_not(None))
+                                .group_by(cron.c[field])
+                            )
+                            rows.extend(
+                                {"scope": field, "scope_id": scope_id, "crons": count}
+                                for scope_id, count in await self._execute(conn, query)
+                            )
+                        if rows:
+                            await self._execute(conn, t.insert(), rows)
+        except IntegrityError:
+            # Another node filled it first
+            return
+
+        if rows:
+            self._logger.info(f"Counted the existing crons of {len(rows)} assistants and threads")
+
+    async def _flush_cron_updates_periodically(self) -> None:
+        while True:
+            with move_on_after(self.cron_update_max_delay):
+                await self._cron_updates_full.wait()
+
+            self._cron_updates_full = Event()
+            await self._flush_cron_updates()
+
+    async def _flush_cron_updates(self) -> None:
+        """Write all buffered cron updates in one transaction."""
+        if not self._pending_cron_updates:
+            return
+
+        pending, self._pending_cron_updates = self._pending_cron_updates, {}
+        rows = [
+            {"cron_id": cron_id, "next_run_date": next_run_date, "updated_at": updated_at}
+            for cron_id, (next_run_date, updated_at) in pending.items()
+        ]
+
+        try:
+            with span("langgraph_cron.flush_cron_updates", rows=len(rows)), timed(CRON_TABLE_FLUSH_LATENCY):
+                async for attempt in self._retry():
+                    with attempt:
+                        async with self._begin_transaction() as conn:
+                            for i in range(0, len(rows), self.cron_update_batch_size):
+                                await self._update_crons(conn, rows[i : i + self.cron_update_batch_size])
+        except Exception as e:
+            self._logger.error(f"Failed to flush {len(rows)} cron updates: {e}")
+            CRON_TABLE_FLUSH_FAILURES.inc()
+            # Retry on the next flush, unless a newer update came in meanwhile
+            for cron_id, update in pending.items():
+                self._pending_cron_updates.setdefault(cron_id, update)
+            return
+        finally:
+            CRON_TABLE_PENDING_UPDATES.set(len(self._pending_cron_updates))
+
+        self._logger.debug(f"Flushed {len(rows)} cron updates to cron table")
+
+    async def _update_crons(
+        self,
+        conn: Connection | AsyncConnection,
+        rows: list[dict[str, Any]],
+    ) -> None:
+        """Set ``next_run_date`` and ``updated_at`` of many crons with one statement.
+
+        Rows changed more recently by another scheduler are left alone, so a delayed
+        flush cannot overwrite a newer next run date.
+        """
+        t = self._t_cron
+        if self._engine.dialect.name == "postgresql":
+            # UPDATE cron SET ... FROM (VALUES ...) AS v WHERE cron.cron_id = v.cron_id
+            v = values(
+                column("cron_id", t.c.cron_id.type),
+                column("next_run_date", t.c.next_run_date.type),
+                column("updated_at", t.c.updated_at.type),
+                name="v",
+            ).data([(row["cron_id"], row["next_run_date"], row["updated_at"]) for row in rows])
+            updated_at = cast(v.c.updated_at, t.c.updated_at.type)
+            update = (
+                t.update()
+                .where(
+                    t.c.cron_id == cast(v.c.cron_id, t.c.cron_id.type),
+                    t.c.updated_at <= updated_at,
+                )
+                .values(
+                    next_run_date=cast(v.c.next_run_date, t.c.next_run_date.type),
+                    updated_at=updated_at,
+                )
+            )
+            await self._execute(conn, update)
+        else:
+            update = (
+                t.update()
+                .where(
+                    t.c.cron_id == bindparam("b_cron_id"),
+                    t.c.updated_at <= bindparam("b_updated_at"),
+                )
+                .values(
+                    next_run_date=bindparam("b_next_run_date"),
+                    updated_at=bindparam("b_updated_at"),
+                )
+            )
+            await self._execute(conn, update, [{f"b_{key}": value for key, value in row.items()} for row in rows])
+
+    async def _create_shards(self) -> None:
+        """Insert the lease rows of shards that do not have one yet"""
+        t = self._t_shards
         async for attempt in self._retry():
             with attempt:
                 async with self._begin_transaction() as conn:
-                    await self._execute(conn, delete)
-                    self._logger.info(f"Removed schedule {event.schedule_id} from cron table")
+                    existing = set((await self._execute(conn, select(t.c.shard))).scalars())
+                    missing = [{"shard": shard} for shard in range(self.shards) if shard not in existing]
+                    if missing:
+                        try:
+                            await self._execute(conn, t.insert(), missing)
+                        except IntegrityError:
+                            # Another node inserted them first
+                            pass
+
+    async def _rebalance_shards_periodically(self) -> None:
+        while True:
+            await sleep(self.shard_lease_duration / 3)
+            try:
+                await self._rebalance_shards()
+            except Exception as e:
+                self._logger.error(f"Failed to renew shard leases: {e}")
+
+    async def _rebalance_shards(self) -> None:
+        """Renew this node's heartbeat and shard leases, claiming or giving up shards as nodes come and go.
+
+        Live nodes are sorted by ID and node ``i`` of ``n`` is assigned the shards ``s`` with ``s % n == i``. A node
+        only claims a shard once its previous owner gave it up or let its lease lapse, so no two nodes poll the same
+        shard; schedule leases still keep a schedule from being processed twice while shards change hands.
+        """
+        nodes_table, shards_table = self._t_nodes, self._t_shards
+        started_at = time.monotonic()
+        now = datetime.now(timezone.utc)
+        lease_until = now + timedelta(seconds=self.shard_lease_duration)
+        async for attempt in self._retry():
+            with attempt:
+                async with self._begin_transaction() as conn:
+                    heartbeat = (
+                        nodes_table.update()
+                        .where(nodes_table.c.node_id == self.node_id)
+                        .values(seen_until=lease_until)
+                    )
+                    if (await self._execute(conn, heartbeat)).rowcount == 0:
+                        await self._execute(
+                            conn,
+                            nodes_table.insert().values(node_id=self.node_id, seen_until=lease_until),
+                        )
+                    await self._execute(conn, nodes_table.delete().where(nodes_table.c.seen_until < now))
+
+                    nodes = sorted((await self._execute(conn, select(nodes_table.c.node_id))).scalars())
+                    index = nodes.index(self.node_id)
+                    assigned = [shard for shard in range(self.shards) if shard % len(nodes) == index]
+
+                    release = (
+                        shards_table.update()
+                        .where(shards_table.c.owner == self.node_id, shards_table.c.shard.not_in(assigned))
+                        .values(owner=None, lease_until=None)
+                    )
+                    await self._execute(conn, release)
+                    claim = (
+                        shards_table.update()
+                        .where(
+                            shards_table.c.shard.in_(assigned),
+                            or_(
+                                shards_table.c.owner.is_(None),
+                                shards_table.c.owner == self.node_id,
+                                shards_table.c.lease_until < now,
+                            ),
+                        )
+                        .values(owner=self.node_id, lease_until=lease_until)
+                    )
+                    await self._execute(conn, claim)
+
+                    query = select(shards_table.c.shard).where(shards_table.c.owner == self.node_id)
+                    owned = frozenset((await self._execute(conn, query)).scalars())
+
+        if owned != self._owned_shards:
+            self._logger.info(
+                f"Node {self.node_id} holds {len(owned)} of {self.shards} shards "
+                f"({len(nodes)} nodes)"
+            )
+        self._owned_shards = owned
+        self._shards_leased_until = started_at + self.shard_lease_duration
+
+    async def _leave_shards(self) -> None:
+        """Give up this node's shards so that the remaining nodes take them over right away"""
+        self._owned_shards = frozenset()
+        self._shards_leased_until = 0.0
+        try:
+            async for attempt in self._retry():
+                with attempt:
+                    async with self._begin_transaction() as conn:
+                        release = (
+                            self._t_shards.update()
+                            .where(self._t_shards.c.owner == self.node_id)
+                            .values(owner=None, lease_until=None)
+                        )
+                        await self._execute(conn, release)
+                        await self._execute(
+                            conn,
+                            self._t_nodes.delete().where(self._t_nodes.c.node_id == self.node_id),
+                        )
+        except Exception as e:
+            self._logger.error(f"Failed to release shards of node {self.node_id}: {e}")
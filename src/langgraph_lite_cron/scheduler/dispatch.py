@@ -0,0 +1,489 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, Deque, Dict, List, Set, Tuple, TypeVar
+
+import anyio
+import httpx
+from langgraph_sdk.schema import Run
+
+from langgraph_lite_cron.metrics import (
+    CIRCUIT_OPEN,
+    DISPATCH_CONCURRENCY_LIMIT,
+    DISPATCH_RETRIES,
+    RUNS_CREATE_LATENCY,
+)
+from langgraph_lite_cron.scheduler.client import get_langgraph_client
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# Responses with which the LangGraph server sheds load
+_OVERLOAD_STATUS_CODES = (429, 502, 503, 504)
+# Of those, the ones that guarantee the run was not created, so that sending it again cannot duplicate it
+_REJECTED_STATUS_CODES = (429, 503)
+
+
+class TokenBucket:
+    """A token bucket refilled at ``rate`` tokens per second, holding up to ``burst`` tokens.
+
+    Callers reserve a token right away and then wait until it is due, so waiters are served in arrival order. A
+    waiter that is cancelled gives its token back.
+    """
+
+    def __init__(self, *, rate: float, burst: float | None = None) -> None:
+        self.rate = rate
+        self.burst = burst or max(rate, 1.0)
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    @property
+    def idle(self) -> bool:
+        """Whether the bucket is full, so dropping it would not change the rate."""
+        self._refill()
+        return self._tokens >= self.burst
+
+    async def acquire(self) -> None:
+        self._refill()
+        self._tokens -= 1
+        if self._tokens < 0:
+            try:
+                await anyio.sleep(-self._tokens / self.rate)
+            except anyio.get_cancelled_exc_class():
+                self._tokens += 1
+                raise
+
+
+class DispatchRateLimiter:
+    """Limits how fast cron runs are dispatched, overall and per assistant.
+
+    A rate of ``None`` or 0 leaves that limit off.
+    """
+
+    # Number of per-assistant buckets above which idle buckets are dropped
+    _MAX_IDLE_BUCKETS = 1024
+
+    def __init__(
+        self,
+        *,
+        rate: float | None = None,
+        burst: float | None = None,
+        assistant_rate: float | None = None,
+        assistant_burst: float | None = None,
+    ) -> None:
+        self._bucket = TokenBucket(rate=rate, burst=burst) if rate else None
+        self._assistant_rate = assistant_rate
+        self._assistant_burst = assistant_burst
+        self._assistant_buckets: Dict[str, TokenBucket] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._bucket is not None or bool(self._assistant_rate)
+
+    async def acquire(self, assistant_id: str) -> None:
+        """Wait until a run of the given assistant may be dispatched."""
+        if self._assistant_rate:
+            bucket = self._assistant_buckets.get(assistant_id)
+            if bucket is None:
+                if len(self._assistant_buckets) >= self._MAX_IDLE_BUCKETS:
+                    self._assistant_buckets = {
+                        key: bucket for key, bucket in self._assistant_buckets.items() if not bucket.idle
+                    }
+                bucket = self._assistant_buckets[assistant_id] = TokenBucket(
+                    rate=self._assistant_rate, burst=self._assistant_burst
+                )
+            await bucket.acquire()
+
+        # Take the global token last, so that runs held back by their assistant do not use up the global rate
+        if self._bucket is not None:
+            await self._bucket.acquire()
+
+
+def _is_overload(exc: BaseException) -> bool:
+    """Whether an error means the LangGraph server is overloaded or unreachable"""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in _OVERLOAD_STATUS_CODES
+    return isinstance(exc, httpx.TransportError)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Whether a request certainly did not create a run, so that it can be sent again"""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in _REJECTED_STATUS_CODES
+    return isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    if isinstance(exc, httpx.HTTPStatusError):
+        try:
+            return float(exc.response.headers["Retry-After"])
+        except (KeyError, ValueError):
+            return None
+    return None
+
+
+class AdaptiveConcurrencyLimiter:
+    """Limits the number of concurrent requests, adapting the limit to how the server copes (AIMD).
+
+    The limit grows by one for every ``limit`` requests answered within ``latency_tolerance`` times the lowest
+    latency seen, and is multiplied by ``backoff_ratio`` when a request is slower than that or fails from
+    overload, at most once per round trip.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_limit: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 100,
+        latency_tolerance: float = 2.0,
+        backoff_ratio: float = 0.5,
+    ) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.backoff_ratio = backoff_ratio
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        DISPATCH_CONCURRENCY_LIMIT.set(self.limit)
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future[None]] = deque()
+        self._min_latency: float | None = None
+        self._decreased_at = 0.0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self) -> None:
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait was cancelled, so pass it on
+                self._in_flight -= 1
+                self._wake()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, *, latency: float | None = None, overloaded: bool = False) -> None:
+        """Give back a slot, reporting how the request went
+
+        :param latency: how long the server took to answer, if it did
+        :param overloaded: whether the request failed because the server is overloaded
+        """
+        self._in_flight -= 1
+        if overloaded:
+            self._decrease(latency)
+        elif latency is not None:
+            # Let the baseline drift up slowly, so that it follows a server that got slower for good
+            if self._min_latency is None or latency < self._min_latency:
+                self._min_latency = latency
+            else:
+                self._min_latency += (latency - self._min_latency) * 0.01
+
+            if latency > self._min_latency * self.latency_tolerance:
+                self._decrease(latency)
+            else:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+        DISPATCH_CONCURRENCY_LIMIT.set(self.limit)
+        self._wake()
+
+    def _decrease(self, latency: float | None) -> None:
+        now = time.monotonic()
+        if now - self._decreased_at < (latency or self._min_latency or 0.0):
+            return
+
+        self._decreased_at = now
+        limit = max(self.min_limit, self._limit * self.backoff_ratio)
+        if int(limit) < self.limit:
+            logger.info(f"Lowering run dispatch concurrency from {self.limit} to {int(limit)}")
+        self._limit = limit
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a run is not sent because the LangGraph server keeps failing"""
+
+
+class CircuitBreaker:
+    """Stops sending requests for ``reset_timeout`` seconds after ``failure_threshold`` overload failures in a row.
+
+    Once the timeout has passed, a single request is let through to probe the server; it closes the circuit if it
+    succeeds and opens it again otherwise.
+    """
+
+    def __init__(self, *, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing_since: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def enter(self) -> float:
+        """Return 0 if a request may be sent now, or else the number of seconds to wait before asking again"""
+        if self._opened_at is None:
+            return 0.0
+
+        now = time.monotonic()
+        remaining = self._opened_at + self.reset_timeout - now
+        if remaining > 0:
+            return remaining
+        # A probe that never reported back (e.g. it was cancelled) is given up on after the timeout
+        if self._probing_since is not None and now - self._probing_since < self.reset_timeout:
+            return min(self.reset_timeout, 1.0)
+
+        self._probing_since = now
+        return 0.0
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info("LangGraph server recovered, resuming run dispatch")
+            CIRCUIT_OPEN.set(0)
+        self._failures = 0
+        self._opened_at = None
+        self._probing_since = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._probing_since is not None or (self._opened_at is None and self._failures >= self.failure_threshold):
+            logger.warning(
+                f"LangGraph server failed {self._failures} times in a row, "
+                f"pausing run dispatch for {self.reset_timeout} seconds"
+            )
+            self._opened_at = time.monotonic()
+            CIRCUIT_OPEN.set(1)
+        self._probing_since = None
+
+
+class RunDispatcher:
+    """Sends runs to the LangGraph server with adaptive concurrency, a circuit breaker and retries.
+
+    Requests rejected for overload (429, 503) or that could not connect are retried up to ``max_retries`` times with
+    exponential backoff and full jitter, honouring ``Retry-After``. Requests that may have reached the server, such
+    as ones that timed out while waiting for the answer, are not retried so as not to create a run twice. At most
+    ``retry_queue_size`` runs wait for a retry or for the circuit to close at once; beyond that runs fail right away.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: AdaptiveConcurrencyLimiter | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        max_retries: int = 3,
+        retry_queue_size: int = 100,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+    ) -> None:
+        self.concurrency = concurrency or AdaptiveConcurrencyLimiter()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.retry_queue_size = retry_queue_size
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._waiting = 0
+
+    async def _wait(self, delay: float, error: BaseException) -> None:
+        """Wait in the retry queue, or raise the error if the queue is full"""
+        if self._waiting >= self.retry_queue_size:
+            raise error
+
+        self._waiting += 1
+        try:
+            await anyio.sleep(delay)
+        finally:
+            self._waiting -= 1
+
+    async def dispatch(self, send: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            delay = self.circuit_breaker.enter()
+            if delay:
+                await self._wait(delay, CircuitOpenError("LangGraph server is unavailable, run not sent"))
+                continue
+
+            await self.concurrency.acquire()
+            started_at = time.monotonic()
+            try:
+                result = await send()
+            except Exception as e:
+                overloaded = _is_overload(e)
+                RUNS_CREATE_LATENCY.labels("error").observe(time.monotonic() - started_at)
+                latency = time.monotonic() - started_at if isinstance(e, httpx.HTTPStatusError) else None
+                self.concurrency.release(latency=latency, overloaded=overloaded)
+                if not overloaded:
+                    # The server answered, so it is up even if it did not like the request
+                    self.circuit_breaker.record_success()
+                    raise
+
+                self.circuit_breaker.record_failure()
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+
+                attempt += 1
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+                retry_after = _retry_after(e)
+                if retry_after is not None:
+                    delay = max(delay, min(retry_after, self.max_backoff))
+                logger.debug(f"Retrying run dispatch in {delay:.2f} seconds after {e!r} (attempt {attempt})")
+                DISPATCH_RETRIES.inc()
+                await self._wait(delay, e)
+            except BaseException:
+                self.concurrency.release()
+                raise
+            else:
+                latency = time.monotonic() - started_at
+                RUNS_CREATE_LATENCY.labels("success").observe(latency)
+                self.concurrency.release(latency=latency)
+                self.circuit_breaker.record_success()
+                return result
+
+
+# A run to create, as the keyword arguments of runs.create(), with the future of its result
+_PendingRun = Tuple[Dict[str, Any], "asyncio.Future[Run]"]
+
+
+class RunBatcher:
+    """Groups the runs dispatched within ``window`` seconds of each other into batched submissions.
+
+    Runs are grouped by assistant, multitask strategy and whether they run on a thread. Stateless runs are sent
+    with one ``runs.create_batch`` request per group of up to ``max_batch_size`` runs; runs on threads, which the
+    batch endpoint does not take, are sent concurrently over the client's pooled connections once their window
+    closes. Every run still gets its own result or error: if a batch is refused for a reason other than overload,
+    its runs are sent one by one so that a single bad run does not fail the others.
+    """
+
+    def __init__(
+        self,
+        *,
+        dispatcher: RunDispatcher | None = None,
+        window: float = 0.05,
+        max_batch_size: int = 100,
+    ) -> None:
+        self.dispatcher = dispatcher or RunDispatcher()
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._batches: Dict[Hashable, List[_PendingRun]] = {}
+        self._tasks: Set[asyncio.Task[None]] = set()
+        self._windows: Set[asyncio.Task[None]] = set()
+
+    async def submit(self, run: Dict[str, Any]) -> Run:
+        """Create a run with the given ``runs.create()`` arguments, along with the others due in the same window"""
+        stateless = run.get("thread_id") is None
+        key = (str(run["assistant_id"]), run.get("multitask_strategy"), stateless)
+        future: asyncio.Future[Run] = asyncio.get_running_loop().create_future()
+
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = []
+            window = self._spawn(self._flush_later(key, batch))
+            self._windows.add(window)
+            window.add_done_callback(self._windows.discard)
+        batch.append((run, future))
+        if len(batch) >= self.max_batch_size:
+            del self._batches[key]
+            self._spawn(self._flush(batch, stateless=stateless))
+
+        return await future
+
+    async def aclose(self) -> None:
+        """Send the runs still waiting for their window to close, and wait for all batches to finish"""
+        for window in self._windows:
+            window.cancel()
+        batches, self._batches = self._batches, {}
+        for (_, _, stateless), batch in batches.items():
+            self._spawn(self._flush(batch, stateless=stateless))
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _spawn(self, coro: Awaitable[None]) -> "asyncio.Task[None]":
+        flush_task = asyncio.ensure_future(coro)
+        self._tasks.add(flush_task)
+        flush_task.add_done_callback(self._tasks.discard)
+        return flush_task
+
+    async def _flush_later(self, key: Hashable, batch: List[_PendingRun]) -> None:
+        await anyio.sleep(self.window)
+        # The batch may have been sent already for being full. It is sent from a task of its own, so that closing
+        # the batcher cancels windows without cancelling the runs of a batch being sent.
+        if self._batches.get(key) is batch:
+            del self._batches[key]
+            self._spawn(self._flush(batch, stateless=key[2]))
+
+    async def _flush(self, batch: List[_PendingRun], *, stateless: bool) -> None:
+        # Runs whose jobs were cancelled while waiting are not sent
+        batch = [(run, future) for run, future in batch if not future.done()]
+        try:
+            await self._send_batch(batch, stateless=stateless)
+        finally:
+            for _, future in batch:
+                if not future.done():
+                    future.cancel()
+
+    async def _send_batch(self, batch: List[_PendingRun], *, stateless: bool) -> None:
+        if stateless and len(batch) > 1:
+            runs = [run for run, _ in batch]
+            try:
+                results = await self.dispatcher.dispatch(lambda: get_langgraph_client().runs.create_batch(runs))
+            except Exception as e:
+                if _is_overload(e):
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    return
+
+                logger.info(f"Batch of {len(batch)} runs was refused ({e!r}), sending them one by one")
+            else:
+                if len(results) != len(batch):
+                    error = RuntimeError(f"Expected {len(batch)} runs from the batch, got {len(results)}")
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(error)
+                    return
+
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+                return
+
+        await asyncio.gather(*(self._send(run, future) for run, future in batch))
+
+    async def _send(self, run: Dict[str, Any], future: "asyncio.Future[Run]") -> None:
+        try:
+            result = await self.dispatcher.dispatch(lambda: get_langgraph_client().runs.create(**run))
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
@@ -1,10 +1,41 @@
 from __future__ import annotations
 
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections.abc import Mapping
 from datetime import datetime
 from typing import Any
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+
+# The fields of a cron returned by the API, as in CronPublic
+PUBLIC_CRON_FIELDS = ("cron_id", "thread_id", "end_time", "schedule", "created_at", "updated_at", "payload")
+# The fields of an exported cron, which also names the assistant it runs
+EXPORTED_CRON_FIELDS = (*PUBLIC_CRON_FIELDS, "assistant_id")
+
+# A scope is either every cron or the crons sharing an assistant or thread ID
+Scope = tuple[str, Any]
+ALL_CRONS: Scope = ("all", None)
+
+
+class ScheduleChangedError(Exception):
+    """Raised when updating a schedule that a scheduler is processing, or that a scheduler processed after it was read.
+
+    Writing the update would lose either it or the processing, so the schedule should be read again.
+    """
+
+    def __init__(self, schedule_id: str):
+        super().__init__(f"Schedule {schedule_id!r} is being processed or changed since it was read")
+        self.schedule_id = schedule_id
+
+
+def cron_id_of(schedule_id: str) -> UUID | None:
+    """Return the cron ID of a schedule, or ``None`` if the schedule is not a cron."""
+    try:
+        return UUID(schedule_id)
+    except ValueError:
+        return None
 
 
 class Cron(BaseModel):
@@ -25,3 +56,54 @@ class Cron(BaseModel):
     @classmethod
     def from_mapping(cls, row: dict[str, Any]) -> "Cron":
         return cls.model_validate(row)
+
+
+class CronCursor(BaseModel):
+    """Position after the last cron of a search page, used for keyset pagination."""
+
+    sort_by: str
+    sort_order: str
+    value: Any = None
+    cron_id: UUID
+
+    @classmethod
+    def after(cls, cron: Cron | Mapping[str, Any], *, sort_by: str, sort_order: str) -> "CronCursor":
+        fields = cron_fields(cron)
+        return cls(
+            sort_by=sort_by,
+            sort_order=sort_order,
+            value=fields[sort_by],
+            cron_id=fields["cron_id"],
+        )
+
+    def encode(self) -> str:
+        return urlsafe_b64encode(self.model_dump_json().encode()).decode()
+
+    @classmethod
+    def decode(cls, cursor: str) -> "CronCursor":
+        """Decode an opaque cursor, restoring the sort value to its field type."""
+        try:
+            data = json.loads(urlsafe_b64decode(cursor.encode()))
+            decoded = cls.model_validate(data)
+            field = Cron.model_fields[decoded.sort_by]
+            decoded.value = TypeAdapter(field.annotation).validate_python(decoded.value)
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+
+        return decoded
+
+
+def cron_fields(cron: Cron | Mapping[str, Any]) -> Mapping[str, Any]:
+    """Return the fields of a cron, which may also be a plain row of cron fields."""
+    return cron if isinstance(cron, Mapping) else cron.__dict__
+
+
+def cron_scopes(cron: Cron | Mapping[str, Any]) -> list[Scope]:
+    """Return the scopes a cron belongs to."""
+    fields = cron_fields(cron)
+    scopes = [ALL_CRONS]
+    if fields["assistant_id"] is not None:
+        scopes.append(("assistant_id", fields["assistant_id"]))
+    if fields["thread_id"] is not None:
+        scopes.append(("thread_id", fields["thread_id"]))
+    return scopes
@@ -0,0 +1,60 @@
+"""Content-addressed storage of cron payloads.
+
+The input of a cron is stored once per distinct content, keyed by the SHA-256 digest of
+its canonical JSON encoding. Schedules only carry the digest: their keyword arguments
+pass it to the task, which loads the payload when the cron fires, and their metadata
+keeps it for the cron entry. Data stores count the schedules referencing each payload
+and delete it along with the last one.
+"""
+
+import hashlib
+import json
+import zlib
+from typing import Any, Dict, Tuple
+
+
+def canonical_json(payload: Dict[str, Any]) -> bytes:
+    """Return the encoding of a payload that its digest is computed from"""
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def payload_digest(payload: Dict[str, Any]) -> str:
+    """Return the content address of a payload"""
+    return hashlib.sha256(canonical_json(payload)).hexdigest()
+
+
+def compress_payload(data: bytes, compression_threshold: int) -> Tuple[bytes, bool]:
+    """Compress the canonical JSON of a payload for storage once it exceeds the threshold (0 never compresses).
+
+    :return: the stored data, and whether it is compressed
+    """
+    if compression_threshold and len(data) > compression_threshold:
+        compressed = zlib.compress(data)
+        if len(compressed) < len(data):
+            return compressed, True
+    return data, False
+
+
+def decompress_payload(data: bytes, compressed: bool) -> bytes:
+    """Return the canonical JSON of a stored payload"""
+    return zlib.decompress(data) if compressed else data
+
+
+def split_payload(metadata: Dict[str, Any]) -> Tuple[Dict[str, Any], str | None, Dict[str, Any] | None]:
+    """Take the payload out of the metadata of a new schedule.
+
+    :return: the metadata with the payload replaced by its digest, the digest, and the
+        payload, which is ``None`` if the metadata holds none
+    """
+    if "payload" not in metadata:
+        return metadata, metadata.get("payload_digest"), None
+
+    metadata = dict(metadata)
+    payload = metadata.pop("payload")
+    if payload is None:
+        return metadata, None, None
+
+    digest = metadata.get("payload_digest") or payload_digest(payload)
+    metadata["payload_digest"] = digest
+    return metadata, digest, payload
+
@@ -0,0 +1,65 @@
+from contextlib import AsyncExitStack
+from datetime import timedelta
+
+import attrs
+from apscheduler import AsyncScheduler, CoalescePolicy
+from langgraph_sdk.client import LangGraphClient
+
+from langgraph_lite_cron.scheduler.client import (
+    create_langgraph_client,
+    set_langgraph_client,
+)
+from langgraph_lite_cron.scheduler.dispatch import (
+    DispatchRateLimiter,
+    RunBatcher,
+    RunDispatcher,
+)
+
+
+def _as_timedelta(value: timedelta | float | None) -> timedelta | None:
+    if isinstance(value, (int, float)):
+        return timedelta(seconds=value)
+    return value
+
+
+def _as_coalesce_policy(value: CoalescePolicy | str) -> CoalescePolicy:
+    if isinstance(value, str):
+        return CoalescePolicy[value]
+    return value
+
+
+@attrs.define(eq=False, repr=False)
+class LanggraphAsyncScheduler(AsyncScheduler):
+    """
+    An asynchronous scheduler that owns the LangGraph client used by its jobs.
+
+    The client is installed as the process-wide client while the scheduler's services are running and closed once
+    they stop.
+
+    :param langgraph_client: the LangGraph client shared by jobs and API requests
+    :param default_max_jitter: the jitter of crons that do not set their own
+    :param default_coalesce: the coalescing policy of crons that do not set their own
+    :param dispatch_limiter: limits the rate at which cron runs are sent to the LangGraph server
+    :param run_dispatcher: sends cron runs to the LangGraph server, adapting concurrency and retrying on overload
+    :param run_batcher: if set, groups cron runs due at the same time into batched submissions
+    """
+
+    langgraph_client: LangGraphClient = attrs.field(kw_only=True, factory=create_langgraph_client)
+    default_max_jitter: timedelta | None = attrs.field(kw_only=True, converter=_as_timedelta, default=None)
+    default_coalesce: CoalescePolicy = attrs.field(
+        kw_only=True, converter=_as_coalesce_policy, default=CoalescePolicy.latest
+    )
+    dispatch_limiter: DispatchRateLimiter | None = attrs.field(kw_only=True, default=None)
+    run_dispatcher: RunDispatcher = attrs.field(kw_only=True, factory=RunDispatcher)
+    run_batcher: RunBatcher | None = attrs.field(kw_only=True, default=None)
+
+    async def _ensure_services_initialized(self, exit_stack: AsyncExitStack) -> None:
+        if not self._services_initialized:
+            # Registered first so that the client is closed only after the data store and event broker have stopped
+            exit_stack.push_async_callback(self.langgraph_client.http.client.aclose)
+            exit_stack.callback(set_langgraph_client, None)
+            set_langgraph_client(self.langgraph_client)
+            if self.run_batcher is not None:
+                exit_stack.push_async_callback(self.run_batcher.aclose)
+
+        await super()._ensure_services_initialized(exit_stack)
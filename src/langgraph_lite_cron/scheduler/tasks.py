@@ -1,12 +1,18 @@
-from collections.abc import Sequence
+from collections.abc import Awaitable, Sequence
+from datetime import datetime, timezone
+from typing import Any
 from uuid import UUID
 
-from apscheduler import task
-from langgraph_sdk import get_client
-from langgraph_sdk.schema import All, Config, Context, MultitaskStrategy
+from apscheduler import current_async_scheduler, current_job, task
+from langgraph_sdk.schema import All, Config, Context, MultitaskStrategy, Run
 
+from langgraph_lite_cron.metrics import FIRE_LAG, RUNS, RUNS_IN_FLIGHT, span
+from langgraph_lite_cron.scheduler.client import get_langgraph_client
+from langgraph_lite_cron.scheduler.dispatch import RunBatcher, RunDispatcher
 
-@task(job_executor="async", max_running_jobs=10)
+
+# Concurrency is left to the scheduler's run dispatcher, which adapts it to the LangGraph server
+@task(job_executor="async", max_running_jobs=None)
 async def runs_create(
     *,
     thread_id: UUID | None,
@@ -18,15 +24,69 @@ async def runs_create(
     interrupt_before: All | Sequence[str] | None,
     interrupt_after: All | Sequence[str] | None,
     multitask_strategy: MultitaskStrategy | None,
+    payload_digest: str | None = None,
 ):
-    return await get_client().runs.create(
-        thread_id=thread_id,
-        assistant_id=assistant_id,
-        input=input,
-        metadata=metadata,
-        config=config,
-        context=context,
-        interrupt_before=interrupt_before,
-        interrupt_after=interrupt_after,
-        multitask_strategy=multitask_strategy,
-    )
+    job = current_job.get(None)
+    if job is not None and job.scheduled_fire_time is not None:
+        fire_time = job.scheduled_fire_time + job.jitter
+        FIRE_LAG.observe(max(0.0, (datetime.now(timezone.utc) - fire_time).total_seconds()))
+
+    run = {
+        "thread_id": thread_id,
+        "assistant_id": assistant_id,
+        "input": input,
+        "metadata": metadata,
+        "config": config,
+        "context": context,
+        "interrupt_before": interrupt_before,
+        "interrupt_after": interrupt_after,
+        "multitask_strategy": multitask_strategy,
+    }
+
+    RUNS_IN_FLIGHT.inc()
+    try:
+        with span(
+            "langgraph_cron.runs_create",
+            cron_id=job.schedule_id if job else None,
+            assistant_id=assistant_id,
+            thread_id=thread_id,
+        ):
+            if payload_digest is not None:
+                run["input"] = await _load_payload(payload_digest)
+            result = await _dispatch_run(run)
+    except BaseException:
+        RUNS.labels("error").inc()
+        raise
+    finally:
+        RUNS_IN_FLIGHT.dec()
+
+    RUNS.labels("success").inc()
+    return result
+
+
+async def _load_payload(digest: str) -> dict[str, Any]:
+    """Load the input of a run from the payloads stored by the scheduler's data store"""
+    data_store = current_async_scheduler.get().data_store
+    payload = await data_store.get_payload(digest)
+    if payload is None:
+        raise LookupError(f"Payload {digest} not found")
+    return payload
+
+
+async def _dispatch_run(run: dict[str, Any]) -> Run:
+    scheduler = current_async_scheduler.get()
+    dispatch_limiter = getattr(scheduler, "dispatch_limiter", None)
+    if dispatch_limiter is not None:
+        await dispatch_limiter.acquire(str(run["assistant_id"]))
+
+    run_batcher: RunBatcher | None = getattr(scheduler, "run_batcher", None)
+    if run_batcher is not None:
+        return await run_batcher.submit(run)
+
+    def send() -> Awaitable[Run]:
+        return get_langgraph_client().runs.create(**run)
+
+    run_dispatcher: RunDispatcher | None = getattr(scheduler, "run_dispatcher", None)
+    if run_dispatcher is None:
+        return await send()
+    return await run_dispatcher.dispatch(send)
@@ -1,16 +1,25 @@
+import logging
 import os
 import re
 
-from apscheduler import AsyncScheduler
+from apscheduler import TaskDefaults
+from apscheduler.abc import DataStore, EventBroker, Serializer
 from apscheduler.eventbrokers.local import LocalEventBroker
-from apscheduler.eventbrokers.redis import RedisEventBroker
 from apscheduler.serializers.cbor import CBORSerializer
-from sqlalchemy.exc import ArgumentError, NoSuchModuleError, OperationalError
+from langgraph_sdk.client import LangGraphClient
 
+from langgraph_lite_cron.scheduler.client import create_langgraph_client
 from langgraph_lite_cron.scheduler.datastores.memory import LanggraphMemoryDataStore
-from langgraph_lite_cron.scheduler.datastores.sqlalchemy import (
-    LanggraphSQLAlchemyDataStore,
+from langgraph_lite_cron.scheduler.dispatch import (
+    AdaptiveConcurrencyLimiter,
+    CircuitBreaker,
+    DispatchRateLimiter,
+    RunBatcher,
+    RunDispatcher,
 )
+from langgraph_lite_cron.scheduler.scheduler import LanggraphAsyncScheduler
+
+logger = logging.getLogger(__name__)
 
 
 def _normalize_database_uri(uri: str | None) -> str | None:
@@ -21,28 +30,108 @@ def _normalize_database_uri(uri: str | None) -> str | None:
     return uri
 
 
-def create_scheduler() -> AsyncScheduler:
-    serializer = CBORSerializer()
-    database_uri = _normalize_database_uri(os.getenv("DATABASE_URI") or os.getenv("POSTGRES_URI"))
+def _float_env(name: str) -> float | None:
+    """Read a number of seconds or a rate from the environment, treating unset, empty or 0 as no value"""
+    value = os.getenv(name)
+    return (float(value) or None) if value else None
+
+
+def _create_sqlalchemy_data_store(database_uri: str, serializer: Serializer) -> DataStore | None:
+    # SQLAlchemy and the database drivers are only imported when a database is configured
+    from sqlalchemy.exc import ArgumentError, NoSuchModuleError, OperationalError
+
+    from langgraph_lite_cron.scheduler.datastores.sqlalchemy import (
+        LanggraphSQLAlchemyDataStore,
+    )
 
     try:
-        data_store = LanggraphSQLAlchemyDataStore(
+        return LanggraphSQLAlchemyDataStore(
             engine_or_url=database_uri,
             serializer=serializer,
+            search_cache_ttl=float(os.getenv("CRON_SEARCH_CACHE_TTL", "0")),
+            shards=int(os.getenv("CRON_SHARDS", "0")),
+            shard_lease_duration=float(os.getenv("CRON_SHARD_LEASE_DURATION", "30")),
+            payload_compression_threshold=int(os.getenv("CRON_PAYLOAD_COMPRESSION_THRESHOLD", "1024")),
         )
-    except (ArgumentError, NoSuchModuleError, OperationalError):
-        data_store = LanggraphMemoryDataStore()
+    except (ArgumentError, NoSuchModuleError, OperationalError) as e:
+        logger.warning(f"Cannot use the database data store, falling back to the memory data store: {e}")
+        return None
+
 
+def _create_redis_event_broker(redis_uri: str, serializer: Serializer) -> EventBroker | None:
     try:
-        event_broker = RedisEventBroker(
-            client_or_url=os.getenv("REDIS_URI"),
+        from apscheduler.eventbrokers.redis import RedisEventBroker
+
+        return RedisEventBroker(client_or_url=redis_uri, serializer=serializer)
+    except Exception as e:
+        logger.warning(f"Cannot use the Redis event broker, falling back to the local event broker: {e}")
+        return None
+
+
+def create_scheduler(*, langgraph_client: LangGraphClient | None = None) -> LanggraphAsyncScheduler:
+    """Create a scheduler configured from the environment.
+
+    :param langgraph_client: the LangGraph client of the scheduler, created from the environment if not given
+    """
+    serializer = CBORSerializer()
+    database_uri = _normalize_database_uri(os.getenv("DATABASE_URI") or os.getenv("POSTGRES_URI"))
+
+    data_store = _create_sqlalchemy_data_store(database_uri, serializer) if database_uri else None
+    if data_store is None:
+        data_store = LanggraphMemoryDataStore(
+            persistence_path=os.getenv("MEMORY_DATASTORE_PATH") or None,
             serializer=serializer,
         )
-    except Exception:
-        event_broker = LocalEventBroker()
 
-    scheduler = AsyncScheduler(
+    redis_uri = os.getenv("REDIS_URI")
+    event_broker = (_create_redis_event_broker(redis_uri, serializer) if redis_uri else None) or LocalEventBroker()
+
+    dispatch_limiter = DispatchRateLimiter(
+        rate=_float_env("CRON_DISPATCH_RATE"),
+        burst=_float_env("CRON_DISPATCH_BURST"),
+        assistant_rate=_float_env("CRON_DISPATCH_RATE_PER_ASSISTANT"),
+        assistant_burst=_float_env("CRON_DISPATCH_BURST_PER_ASSISTANT"),
+    )
+
+    run_dispatcher = RunDispatcher(
+        concurrency=AdaptiveConcurrencyLimiter(
+            initial_limit=int(os.getenv("CRON_DISPATCH_CONCURRENCY", "10")),
+            min_limit=int(os.getenv("CRON_DISPATCH_MIN_CONCURRENCY", "1")),
+            max_limit=int(os.getenv("CRON_DISPATCH_MAX_CONCURRENCY", "100")),
+            latency_tolerance=float(os.getenv("CRON_DISPATCH_LATENCY_TOLERANCE", "2.0")),
+        ),
+        circuit_breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("CRON_CIRCUIT_FAILURE_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("CRON_CIRCUIT_RESET_TIMEOUT", "30")),
+        ),
+        max_retries=int(os.getenv("CRON_DISPATCH_MAX_RETRIES", "3")),
+        retry_queue_size=int(os.getenv("CRON_DISPATCH_RETRY_QUEUE_SIZE", "100")),
+        backoff=float(os.getenv("CRON_DISPATCH_BACKOFF", "0.5")),
+        max_backoff=float(os.getenv("CRON_DISPATCH_MAX_BACKOFF", "30")),
+    )
+
+    batch_window = _float_env("CRON_DISPATCH_BATCH_WINDOW")
+    run_batcher = (
+        RunBatcher(
+            dispatcher=run_dispatcher,
+            window=batch_window,
+            max_batch_size=int(os.getenv("CRON_DISPATCH_BATCH_SIZE", "100")),
+        )
+        if batch_window
+        else None
+    )
+
+    scheduler = LanggraphAsyncScheduler(
         data_store=data_store,
         event_broker=event_broker,
+        task_defaults=TaskDefaults(misfire_grace_time=_float_env("CRON_MISFIRE_GRACE_TIME")),
+        langgraph_client=langgraph_client or create_langgraph_client(),
+        default_max_jitter=_float_env("CRON_MAX_JITTER"),
+        default_coalesce=os.getenv("CRON_COALESCE") or "latest",
+        dispatch_limiter=dispatch_limiter if dispatch_limiter.enabled else None,
+        run_dispatcher=run_dispatcher,
+        run_batcher=run_batcher,
+        # Leave room for runs waiting on a dispatch slot or a retry, so that they do not hold up the others
+        max_concurrent_jobs=run_dispatcher.concurrency.max_limit + run_dispatcher.retry_queue_size,
     )
     return scheduler
@@ -1,8 +1,9 @@
 from datetime import datetime
 from uuid import UUID
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from langgraph_sdk.schema import All, Context, MultitaskStrategy
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 from typing_extensions import Any, Literal, TypedDict
 
 
@@ -12,6 +13,27 @@ class Config(TypedDict, total=False):
     configurable: dict[str, Any]
 
 
+def _check_schedule(value: str | None) -> str | None:
+    if value is not None:
+        # Imported here, as the scheduler is not needed to load the schemas otherwise
+        from apscheduler.triggers.cron import CronTrigger
+
+        try:
+            CronTrigger.from_crontab(value, timezone="UTC")
+        except ValueError as e:
+            raise ValueError(f"Invalid cron schedule {value!r}: {e}") from e
+    return value
+
+
+def _check_timezone(value: str | None) -> str | None:
+    if value is not None:
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError) as e:
+            raise ValueError(f"Unknown time zone: {value}") from e
+    return value
+
+
 class CronCreate(BaseModel):
     schedule: str = Field(
         ...,
@@ -21,6 +43,10 @@ class CronCreate(BaseModel):
         None,
         description="The end date to stop running the cron."
     )
+    timezone: str | None = Field(
+        None,
+        description="The IANA time zone to evaluate the schedule in, e.g. 'Europe/Paris'. Defaults to the server's local time zone.",
+    )
     assistant_id: UUID | str = Field(
         ...,
         description="The assistant ID or graph name to run. If using graph name, will default to the assistant automatically created from that graph by the server.",
@@ -57,6 +83,68 @@ class CronCreate(BaseModel):
         None,
         description="Multitask strategy to use. Must be one of 'reject', 'interrupt', 'rollback', or 'enqueue'."
     )
+    max_jitter: float | None = Field(
+        None,
+        ge=0,
+        description="The maximum number of seconds to randomly delay each run by, to spread out crons sharing a schedule. Defaults to the server's setting.",
+    )
+    misfire_grace_time: float | None = Field(
+        None,
+        gt=0,
+        description="The maximum number of seconds a run may start late before it is skipped. Defaults to the server's setting.",
+    )
+    coalesce: Literal["earliest", "latest", "all"] | None = Field(
+        None,
+        description="Which of several runs missed while the server was down to start: 'earliest', 'latest' or 'all'. Defaults to the server's setting.",
+    )
+
+    @field_validator("schedule")
+    @classmethod
+    def _validate_schedule(cls, value: str | None) -> str | None:
+        return _check_schedule(value)
+
+    @field_validator("timezone")
+    @classmethod
+    def _validate_timezone(cls, value: str | None) -> str | None:
+        return _check_timezone(value)
+
+
+class ThreadCronCreate(CronCreate):
+    thread_id: UUID | None = Field(
+        None,
+        description="The thread ID to run the cron on. If omitted, each run is created on a new thread."
+    )
+
+
+class CronUpdate(BaseModel):
+    """Changes to a cron; fields left out keep their current value."""
+
+    schedule: str | None = Field(
+        None,
+        description="The new cron schedule to execute this job on."
+    )
+    end_time: datetime | None = Field(
+        None,
+        description="The new end date to stop running the cron, or null to run it indefinitely."
+    )
+    timezone: str | None = Field(
+        None,
+        description="The new IANA time zone to evaluate the schedule in, e.g. 'Europe/Paris'.",
+    )
+    input: dict | None = Field(
+        None,
+        description="The new input to the graph."
+    )
+
+    @field_validator("schedule")
+    @classmethod
+    def _validate_schedule(cls, value: str | None) -> str | None:
+        return _check_schedule(value)
+
+    @field_validator("timezone")
+    @classmethod
+    def _validate_timezone(cls, value: str | None) -> str | None:
+        return _check_timezone(value)
 
 
 class CronSearch(BaseModel):
@@ -83,6 +171,11 @@ class CronSearch(BaseModel):
         title="Offset",
         description="The number of results to skip.",
     )
+    cursor: str | None = Field(
+        default=None,
+        title="Cursor",
+        description="The X-Next-Cursor header of a previous search with the same sort, to resume after its last result.",
+    )
     sort_by: Literal[
         "cron_id",
         "assistant_id",
@@ -103,6 +196,64 @@ class CronSearch(BaseModel):
     )
 
 
+class CronCount(BaseModel):
+    assistant_id: str | None = Field(
+        default=None,
+        title="Assistant Id",
+        description="The assistant ID or graph name to count the crons of.",
+    )
+    thread_id: UUID | None = Field(
+        default=None,
+        title="Thread Id",
+        description="The thread ID to count the crons of.",
+    )
+
+
+class CronExport(BaseModel):
+    assistant_id: str | None = Field(
+        default=None,
+        title="Assistant Id",
+        description="The assistant ID or graph name to export the crons of.",
+    )
+    thread_id: UUID | None = Field(
+        default=None,
+        title="Thread Id",
+        description="The thread ID to export the crons of.",
+    )
+
+
+class CronBulkDelete(BaseModel):
+    assistant_id: str | None = Field(
+        default=None,
+        title="Assistant Id",
+        description="The assistant ID or graph name to delete the crons of.",
+    )
+    thread_id: UUID | None = Field(
+        default=None,
+        title="Thread Id",
+        description="The thread ID to delete the crons of.",
+    )
+    cron_ids: list[UUID] | None = Field(
+        default=None,
+        title="Cron Ids",
+        description="The IDs of the crons to delete.",
+    )
+
+    @model_validator(mode="after")
+    def _require_filter(self) -> "CronBulkDelete":
+        # Deleting every cron takes an explicit filter
+        if self.assistant_id is None and self.thread_id is None and self.cron_ids is None:
+            raise ValueError("At least one of assistant_id, thread_id or cron_ids is required")
+        return self
+
+
+class CronBulkDeleteResult(BaseModel):
+    deleted: int = Field(
+        ...,
+        description="The number of crons deleted.",
+    )
+
+
 class CronPublic(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -1,15 +1,28 @@
 import asyncio
-from datetime import datetime
-from uuid import UUID
+import os
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime, tzinfo
+from functools import lru_cache
+from typing import Any
+from uuid import UUID, uuid4
+from zoneinfo import ZoneInfo
 
-from apscheduler import AsyncScheduler
+import attrs
+from apscheduler import AsyncScheduler, CoalescePolicy, Schedule
 from apscheduler.triggers.cron import CronTrigger
 from fastapi import Request
-from langgraph_sdk import get_client
 from tzlocal import get_localzone
 
+from langgraph_lite_cron.cache import AsyncTTLCache
+from langgraph_lite_cron.metrics import API_REQUEST_LATENCY, timed
+from langgraph_lite_cron.scheduler.client import get_langgraph_client
+from langgraph_lite_cron.scheduler.models import ScheduleChangedError
+from langgraph_lite_cron.scheduler.payloads import payload_digest
 from langgraph_lite_cron.scheduler.tasks import runs_create
-from langgraph_lite_cron.shcemas import CronCreate, CronPublic
+from langgraph_lite_cron.shcemas import CronCreate, CronPublic, CronUpdate
+
+# Seconds to wait before applying a cron update again, while a scheduler processes the cron
+_UPDATE_RETRY_DELAYS = (0.05, 0.2, 0.5)
 
 
 def get_scheduler(request: Request) -> AsyncScheduler:
@@ -20,9 +33,39 @@ def get_now() -> datetime:
     return datetime.now()
 
 
+async def observe_request(request: Request) -> AsyncIterator[None]:
+    """Record how long a request to a cron endpoint takes"""
+    route = request.scope.get("route")
+    endpoint = f"{request.method} {getattr(route, 'path', request.url.path)}"
+    with timed(API_REQUEST_LATENCY.labels(endpoint)):
+        yield
+
+
+_assistant_id_cache: AsyncTTLCache[str | UUID, UUID] = AsyncTTLCache(
+    ttl=float(os.getenv("ASSISTANT_CACHE_TTL", "300")),
+    maxsize=int(os.getenv("ASSISTANT_CACHE_MAXSIZE", "1024")),
+)
+
+
 async def resolve_assistant_id(graph_id_or_assistant_id: str | UUID) -> UUID:
-    """Resolve the assistant ID from a graph ID or directly return the assistant ID if it's already in UUID format"""
-    client = get_client()
+    """Resolve the assistant ID from a graph ID or directly return the assistant ID if it's already in UUID format
+
+    Results are cached for ``ASSISTANT_CACHE_TTL`` seconds (default 300, 0 disables the cache) and concurrent lookups
+    of the same ID share one request to the LangGraph server.
+    """
+    return await _assistant_id_cache.get_or_load(
+        graph_id_or_assistant_id,
+        lambda: _resolve_assistant_id(graph_id_or_assistant_id),
+    )
+
+
+def invalidate_assistant_id(graph_id_or_assistant_id: str | UUID | None = None) -> None:
+    """Forget a cached assistant ID resolution, or all of them if no ID is given"""
+    _assistant_id_cache.invalidate(graph_id_or_assistant_id)
+
+
+async def _resolve_assistant_id(graph_id_or_assistant_id: str | UUID) -> UUID:
+    client = get_langgraph_client()
     if isinstance(graph_id_or_assistant_id, UUID):
         try:
             assistant = await client.assistants.get(assistant_id=graph_id_or_assistant_id)
@@ -44,6 +87,101 @@ async def resolve_assistant_id(graph_id_or_assistant_id: str | UUID) -> UUID:
     return UUID(assistants[0]["assistant_id"])
 
 
+@lru_cache(maxsize=None)
+def _local_timezone() -> tzinfo:
+    """Resolve the local time zone once per process"""
+    return get_localzone()
+
+
+@lru_cache(maxsize=int(os.getenv("CRON_TRIGGER_CACHE_MAXSIZE", "1024")))
+def _compile_crontab(expr: str, timezone: tzinfo) -> CronTrigger:
+    """Parse a crontab expression into a trigger template, without start or end time"""
+    return CronTrigger.from_crontab(expr=expr, timezone=timezone)
+
+
+def _cron_trigger(cron: CronCreate) -> CronTrigger:
+    """Build the trigger of a cron from a cached template of its schedule"""
+    timezone = ZoneInfo(cron.timezone) if cron.timezone else _local_timezone()
+    return _build_trigger(cron.schedule, timezone, cron.end_time)
+
+
+def _build_trigger(schedule: str, timezone: tzinfo, end_time: datetime | None) -> CronTrigger:
+    template = _compile_crontab(schedule, timezone)
+
+    # Copy attribute by attribute, as copy.copy() would parse the expression again through __setstate__
+    trigger = CronTrigger.__new__(CronTrigger)
+    for field in attrs.fields(CronTrigger):
+        value = getattr(template, field.name)
+        if field.name == "_fields":
+            # Give every trigger a list of its own rather than that of the template
+            value = list(value)
+        object.__setattr__(trigger, field.name, value)
+    trigger.start_time = datetime.now()
+    trigger.end_time = end_time
+    return trigger
+
+
+def _schedule_kwargs(
+    thread_id: UUID | None,
+    assistant_id: UUID,
+    cron: CronCreate,
+    digest: str | None,
+) -> dict[str, Any]:
+    # The input is stored by the data store under its digest, and loaded when the cron fires
+    return {
+        "thread_id": thread_id,
+        "assistant_id": assistant_id,
+        "input": None,
+        "payload_digest": digest,
+        "metadata": cron.metadata,
+        "config": cron.config,
+        "context": cron.context,
+        "interrupt_before": cron.interrupt_before,
+        "interrupt_after": cron.interrupt_after,
+        "multitask_strategy": cron.multitask_strategy,
+    }
+
+
+def _schedule_metadata(
+    thread_id: UUID | None,
+    assistant_id: UUID,
+    cron: CronCreate,
+    digest: str | None,
+) -> dict[str, Any]:
+    # The data store moves the payload into its payload table, keeping the digest
+    return {
+        "thread_id": str(thread_id) if thread_id else None,
+        "assistant_id": str(assistant_id),
+        "user_id": None,  # FIXME: Set user_id if available
+        "payload": cron.input,
+        "payload_digest": digest,
+        "schedule": cron.schedule,
+        "metadata": cron.metadata,
+    }
+
+
+def _schedule_options(scheduler: AsyncScheduler, cron: CronCreate) -> dict[str, Any]:
+    """Pick the jitter, coalescing and misfire settings of a cron, falling back to the scheduler's defaults
+
+    The misfire grace time is left out unless the cron sets it, so that the task's own setting applies.
+    """
+    options: dict[str, Any] = {
+        "coalesce": (
+            CoalescePolicy[cron.coalesce]
+            if cron.coalesce
+            else getattr(scheduler, "default_coalesce", CoalescePolicy.latest)
+        ),
+        "max_jitter": (
+            cron.max_jitter
+            if cron.max_jitter is not None
+            else getattr(scheduler, "default_max_jitter", None)
+        ),
+    }
+    if cron.misfire_grace_time is not None:
+        options["misfire_grace_time"] = cron.misfire_grace_time
+    return options
+
+
 async def create_cron_job(
     *,
     scheduler: AsyncScheduler,
@@ -52,34 +190,15 @@ async def create_cron_job(
     cron: CronCreate,
     now: datetime,
 ) -> CronPublic:
-    trigger = CronTrigger.from_crontab(
-        expr=cron.schedule,
-        end_time=cron.end_time,
-        timezone=await asyncio.to_thread(get_localzone),
-    )
+    trigger = _cron_trigger(cron)
+    digest = payload_digest(cron.input) if cron.input is not None else None
 
     cron_id = await scheduler.add_schedule(
         func_or_task_id=runs_create,
         trigger=trigger,
-        kwargs={
-            "thread_id": thread_id,
-            "assistant_id": assistant_id,
-            "input": cron.input,
-            "metadata": cron.metadata,
-            "config": cron.config,
-            "context": cron.context,
-            "interrupt_before": cron.interrupt_before,
-            "interrupt_after": cron.interrupt_after,
-            "multitask_strategy": cron.multitask_strategy,
-        },
-        metadata={
-            "thread_id": str(thread_id) if thread_id else None,
-            "assistant_id": str(assistant_id),
-            "user_id": None,  # FIXME: Set user_id if available
-            "payload": cron.input,
-            "schedule": cron.schedule,
-            "metadata": cron.metadata,
-        },
+        kwargs=_schedule_kwargs(thread_id, assistant_id, cron, digest),
+        metadata=_schedule_metadata(thread_id, assistant_id, cron, digest),
+        **_schedule_options(scheduler, cron),
     )
 
     return CronPublic(
@@ -89,5 +208,107 @@ async def create_cron_job(
         schedule=cron.schedule,
         created_at=now,
         updated_at=now,
-        payload=cron.input,
+        payload=cron.input or {},
     )
+
+
+async def create_cron_jobs(
+    *,
+    scheduler: AsyncScheduler,
+    jobs: Sequence[tuple[UUID | None, UUID, CronCreate]],
+    now: datetime,
+) -> list[CronPublic]:
+    """Create many cron jobs, writing all of their schedules to the data store at once.
+
+    Each job is a ``(thread_id, assistant_id, cron)`` tuple with an already resolved
+    assistant ID.
+    """
+    task = await scheduler.configure_task(runs_create)
+
+    schedules: list[Schedule] = []
+    crons: list[CronPublic] = []
+    for thread_id, assistant_id, cron in jobs:
+        trigger = _cron_trigger(cron)
+        options = _schedule_options(scheduler, cron)
+        options.setdefault("misfire_grace_time", task.misfire_grace_time)
+        digest = payload_digest(cron.input) if cron.input is not None else None
+        schedule = Schedule(
+            id=str(uuid4()),
+            task_id=task.id,
+            trigger=trigger,
+            kwargs=_schedule_kwargs(thread_id, assistant_id, cron, digest),
+            metadata={**task.metadata, **_schedule_metadata(thread_id, assistant_id, cron, digest)},
+            job_executor=task.job_executor,
+            **options,
+        )
+        schedule.next_fire_time = trigger.next()
+        schedules.append(schedule)
+        crons.append(
+            CronPublic(
+                cron_id=UUID(schedule.id),
+                thread_id=thread_id,
+                end_time=trigger.end_time,
+                schedule=cron.schedule,
+                created_at=now,
+                updated_at=now,
+                payload=cron.input or {},
+            )
+        )
+
+    await scheduler.data_store.add_schedules(schedules)
+    return crons
+
+
+async def update_cron_job(
+    *,
+    scheduler: AsyncScheduler,
+    cron_id: UUID,
+    update: CronUpdate,
+) -> CronPublic:
+    """Apply changes to a cron in place, keeping its ID.
+
+    The trigger and next run date are only recomputed when the schedule, time zone or
+    end time change. While a scheduler is processing the cron, the changes are applied
+    again to the cron as it is released, retrying with a short delay.
+
+    Raises :exc:`~apscheduler.ScheduleLookupError` if there is no such cron, and
+    :exc:`ScheduleChangedError` if it stays acquired by a scheduler.
+    """
+    for delay in (*_UPDATE_RETRY_DELAYS, None):
+        schedule = await scheduler.get_schedule(str(cron_id))
+        try:
+            cron = await scheduler.data_store.update_schedule(_updated_schedule(schedule, update))
+        except ScheduleChangedError:
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+        else:
+            return CronPublic.model_validate(cron)
+
+
+def _updated_schedule(schedule: Schedule, update: CronUpdate) -> Schedule:
+    """Return a copy of the schedule of a cron with the changes applied."""
+    changes = update.model_fields_set
+    metadata = dict(schedule.metadata)
+    kwargs = dict(schedule.kwargs)
+    trigger = schedule.trigger
+    next_fire_time = schedule.next_fire_time
+
+    if changes & {"schedule", "timezone", "end_time"}:
+        if not isinstance(trigger, CronTrigger):
+            raise ValueError(f"Schedule {schedule.id} does not run on a cron schedule")
+        expression = update.schedule or metadata["schedule"]
+        timezone = ZoneInfo(update.timezone) if update.timezone else trigger.timezone
+        end_time = update.end_time if "end_time" in changes else trigger.end_time
+        trigger = _build_trigger(expression, timezone, end_time)
+        next_fire_time = trigger.next()
+        metadata["schedule"] = expression
+
+    if "input" in changes:
+        digest = payload_digest(update.input) if update.input is not None else None
+        kwargs.update(input=None, payload_digest=digest)
+        metadata.update(payload=update.input, payload_digest=digest)
+
+    updated = attrs.evolve(schedule, trigger=trigger, kwargs=kwargs, metadata=metadata)
+    updated.next_fire_time = next_fire_time
+    return updated
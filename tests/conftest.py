@@ -0,0 +1,108 @@
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TypeVar
+
+import attrs
+import httpx
+import pytest
+from apscheduler import ConflictPolicy
+from apscheduler.abc import DataStore
+from fake_langgraph import FakeLangGraph
+from fastapi import FastAPI
+from langgraph_sdk.client import LangGraphClient
+
+from langgraph_lite_cron import crons
+from langgraph_lite_cron.scheduler import LanggraphAsyncScheduler
+from langgraph_lite_cron.scheduler.client import set_langgraph_client
+from langgraph_lite_cron.scheduler.datastores.memory import LanggraphMemoryDataStore
+from langgraph_lite_cron.scheduler.datastores.sqlalchemy import (
+    LanggraphSQLAlchemyDataStore,
+)
+from langgraph_lite_cron.utils import invalidate_assistant_id
+
+T = TypeVar("T")
+
+
+def sqlite_uri(path: Path) -> str:
+    return f"sqlite+aiosqlite:///{path}"
+
+
+@asynccontextmanager
+async def in_own_task(context_manager: AbstractAsyncContextManager[T]) -> AsyncIterator[T]:
+    """Enter and exit an async context manager in a task of its own.
+
+    pytest-asyncio sets async fixtures up and tears them down in different tasks, which the
+    anyio cancel scopes of schedulers and data stores do not allow.
+    """
+    entered: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+    exit_event = asyncio.Event()
+
+    async def hold() -> None:
+        async with context_manager as value:
+            entered.set_result(value)
+            await exit_event.wait()
+
+    task = asyncio.create_task(hold())
+    await asyncio.wait([task, entered], return_when=asyncio.FIRST_COMPLETED)
+    if not entered.done():
+        task.result()
+    try:
+        yield entered.result()
+    finally:
+        exit_event.set()
+        await task
+
+
+@pytest.fixture
+def fake_langgraph() -> FakeLangGraph:
+    return FakeLangGraph()
+
+
+@pytest.fixture
+async def langgraph_client(fake_langgraph: FakeLangGraph) -> AsyncIterator[LangGraphClient]:
+    """A client of the fake LangGraph server, installed as the process-wide client"""
+    client = fake_langgraph.client()
+    set_langgraph_client(client)
+    yield client
+    set_langgraph_client(None)
+    await client.http.client.aclose()
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def data_store(request: pytest.FixtureRequest, tmp_path: Path) -> DataStore:
+    if request.param == "memory":
+        return LanggraphMemoryDataStore()
+    return LanggraphSQLAlchemyDataStore(engine_or_url=sqlite_uri(tmp_path / "crons.sqlite"))
+
+
+@pytest.fixture
+async def scheduler(data_store: DataStore, fake_langgraph: FakeLangGraph) -> AsyncIterator[LanggraphAsyncScheduler]:
+    """A scheduler whose services are initialized, but which does not process schedules until started"""
+    invalidate_assistant_id()
+    scheduler = LanggraphAsyncScheduler(data_store=data_store, langgraph_client=fake_langgraph.client())
+    async with in_own_task(scheduler):
+        yield scheduler
+
+
+@pytest.fixture
+async def api(scheduler: LanggraphAsyncScheduler) -> AsyncIterator[httpx.AsyncClient]:
+    app = FastAPI()
+    app.state.scheduler = scheduler
+    app.include_router(crons.router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://crons.test") as client:
+        yield client
+
+
+@pytest.fixture
+def make_due(scheduler: LanggraphAsyncScheduler) -> Callable[[str], Awaitable[None]]:
+    """Return a function that moves the next fire time of a cron a minute into the past"""
+
+    async def make_due(cron_id: str) -> None:
+        due = attrs.evolve(await scheduler.get_schedule(cron_id))
+        due.next_fire_time = datetime.now(timezone.utc) - timedelta(minutes=1)
+        await scheduler.data_store.add_schedule(due, ConflictPolicy.replace)
+
+    return make_due
@@ -0,0 +1,106 @@
+import asyncio
+import time
+from typing import Any, Dict
+
+import httpx
+import pytest
+from fake_langgraph import FakeLangGraph
+from langgraph_sdk.client import LangGraphClient
+
+from langgraph_lite_cron.scheduler.dispatch import RunBatcher, RunDispatcher
+
+
+def _run(i: int, **extra: Any) -> Dict[str, Any]:
+    return {"thread_id": None, "assistant_id": "agent", "input": {"i": i}, **extra}
+
+
+async def test_runs_of_a_window_are_sent_in_one_batch(
+    fake_langgraph: FakeLangGraph, langgraph_client: LangGraphClient
+) -> None:
+    batcher = RunBatcher(window=0.1)
+    started_at = time.monotonic()
+    runs = await asyncio.gather(*(batcher.submit(_run(i)) for i in range(3)))
+
+    assert time.monotonic() - started_at >= 0.1
+    assert fake_langgraph.requests == 1
+    assert [run["input"] for run in runs] == [{"i": i} for i in range(3)]
+    assert len({run["run_id"] for run in runs}) == 3
+
+
+async def test_runs_are_grouped_by_assistant_and_thread(
+    fake_langgraph: FakeLangGraph, langgraph_client: LangGraphClient
+) -> None:
+    batcher = RunBatcher(window=0.05)
+    runs = await asyncio.gather(
+        batcher.submit(_run(0)),
+        batcher.submit(_run(1)),
+        batcher.submit(_run(2, assistant_id="other")),
+        batcher.submit(_run(3, thread_id="00000000-0000-0000-0000-000000000001")),
+    )
+
+    # One batch, and one run each for the lone assistant run and the thread run
+    assert fake_langgraph.requests == 3
+    assert [run["input"] for run in runs] == [{"i": i} for i in range(4)]
+    assert runs[3]["thread_id"] == "00000000-0000-0000-0000-000000000001"
+
+
+async def test_full_batch_is_sent_before_its_window_closes(
+    fake_langgraph: FakeLangGraph, langgraph_client: LangGraphClient
+) -> None:
+    batcher = RunBatcher(window=10, max_batch_size=2)
+    runs = await asyncio.wait_for(asyncio.gather(batcher.submit(_run(0)), batcher.submit(_run(1))), 1)
+
+    assert fake_langgraph.requests == 1
+    assert [run["input"] for run in runs] == [{"i": 0}, {"i": 1}]
+    await batcher.aclose()
+
+
+async def test_cancelled_runs_are_left_out_of_the_batch(
+    fake_langgraph: FakeLangGraph, langgraph_client: LangGraphClient
+) -> None:
+    batcher = RunBatcher(window=0.1)
+    submitted = [asyncio.create_task(batcher.submit(_run(i))) for i in range(3)]
+    await asyncio.sleep(0.01)
+    submitted[1].cancel()
+
+    results = await asyncio.gather(*submitted, return_exceptions=True)
+    assert isinstance(results[1], asyncio.CancelledError)
+    assert [run["input"] for run in fake_langgraph.runs] == [{"i": 0}, {"i": 2}]
+
+
+async def test_aclose_sends_the_waiting_runs(fake_langgraph: FakeLangGraph, langgraph_client: LangGraphClient) -> None:
+    batcher = RunBatcher(window=10)
+    submitted = [asyncio.create_task(batcher.submit(_run(i))) for i in range(2)]
+    await asyncio.sleep(0.01)
+    assert fake_langgraph.requests == 0
+
+    await asyncio.wait_for(batcher.aclose(), 1)
+    runs = await asyncio.gather(*submitted)
+    assert [run["input"] for run in runs] == [{"i": 0}, {"i": 1}]
+    assert fake_langgraph.requests == 1
+
+
+async def test_failed_batch_fails_every_run(fake_langgraph: FakeLangGraph, langgraph_client: LangGraphClient) -> None:
+    batcher = RunBatcher(dispatcher=RunDispatcher(max_retries=0), window=0.05)
+    fake_langgraph.error_rate = 1.0
+
+    results = await asyncio.gather(*(batcher.submit(_run(i)) for i in range(3)), return_exceptions=True)
+
+    assert fake_langgraph.requests == 1
+    assert all(isinstance(result, httpx.HTTPStatusError) for result in results)
+    assert {result.response.status_code for result in results} == {503}
+
+
+async def test_refused_batch_is_sent_run_by_run(
+    fake_langgraph: FakeLangGraph, langgraph_client: LangGraphClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def refuse(*args: Any, **kwargs: Any) -> None:
+        request = httpx.Request("POST", "http://langgraph.fake/runs/batch")
+        raise httpx.HTTPStatusError("Unprocessable", request=request, response=httpx.Response(422, request=request))
+
+    monkeypatch.setattr(langgraph_client.runs, "create_batch", refuse)
+    batcher = RunBatcher(window=0.05)
+    runs = await asyncio.gather(*(batcher.submit(_run(i)) for i in range(3)))
+
+    assert [run["input"] for run in runs] == [{"i": i} for i in range(3)]
+    assert fake_langgraph.requests == 3
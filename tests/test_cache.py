@@ -0,0 +1,111 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import List
+from uuid import UUID
+
+import pytest
+from fake_langgraph import FakeLangGraph, assistant_id_of
+from langgraph_sdk.client import LangGraphClient
+
+from langgraph_lite_cron.cache import AsyncTTLCache
+from langgraph_lite_cron.utils import invalidate_assistant_id, resolve_assistant_id
+
+
+class Loader:
+    """Loads the value of a key, once ``release`` is set if it is given"""
+
+    def __init__(self, release: asyncio.Event | None = None) -> None:
+        self.release = release
+        self.calls: List[str] = []
+
+    def __call__(self, key: str, value: str | None = None) -> Callable[[], Awaitable[str]]:
+        async def load() -> str:
+            self.calls.append(key)
+            if self.release is not None:
+                await self.release.wait()
+            if value is None:
+                raise LookupError(key)
+            return value
+
+        return load
+
+
+async def test_concurrent_misses_share_one_load() -> None:
+    cache: AsyncTTLCache[str, str] = AsyncTTLCache(ttl=60, maxsize=8)
+    loader = Loader(asyncio.Event())
+    waiters = [asyncio.create_task(cache.get_or_load("a", loader("a", "A"))) for _ in range(10)]
+    await asyncio.sleep(0)
+    loader.release.set()
+    assert await asyncio.gather(*waiters) == ["A"] * 10
+    assert await cache.get_or_load("a", loader("a", "other")) == "A"
+    assert loader.calls == ["a"]
+
+
+async def test_a_cancelled_caller_does_not_fail_the_others() -> None:
+    cache: AsyncTTLCache[str, str] = AsyncTTLCache(ttl=60, maxsize=8)
+    loader = Loader(asyncio.Event())
+    first = asyncio.create_task(cache.get_or_load("a", loader("a", "A")))
+    second = asyncio.create_task(cache.get_or_load("a", loader("a", "A")))
+    await asyncio.sleep(0)
+    first.cancel()
+    loader.release.set()
+    assert await second == "A"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert cache.get("a") == "A"
+
+
+async def test_failed_loads_are_not_cached() -> None:
+    cache: AsyncTTLCache[str, str] = AsyncTTLCache(ttl=60, maxsize=8)
+    loader = Loader()
+    with pytest.raises(LookupError):
+        await cache.get_or_load("a", loader("a"))
+    assert await cache.get_or_load("a", loader("a", "A")) == "A"
+    assert loader.calls == ["a", "a"]
+
+
+async def test_entries_expire_and_the_least_recently_used_are_evicted() -> None:
+    cache: AsyncTTLCache[str, str] = AsyncTTLCache(ttl=0.05, maxsize=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("A", None, "C")
+
+    await asyncio.sleep(0.1)
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+    disabled: AsyncTTLCache[str, str] = AsyncTTLCache(ttl=0, maxsize=2)
+    disabled.put("a", "A")
+    assert disabled.get("a") is None
+
+
+async def test_a_load_invalidated_while_running_is_not_cached() -> None:
+    cache: AsyncTTLCache[str, str] = AsyncTTLCache(ttl=60, maxsize=8)
+    loader = Loader(asyncio.Event())
+    stale = asyncio.create_task(cache.get_or_load("a", loader("a", "stale")))
+    await asyncio.sleep(0)
+    cache.invalidate("a")
+    loader.release.set()
+    assert await stale == "stale"
+    assert cache.get("a") is None
+
+    cache.put("a", "A")
+    cache.put("b", "B")
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+async def test_assistant_ids_are_resolved_once_until_invalidated(
+    fake_langgraph: FakeLangGraph, langgraph_client: LangGraphClient
+) -> None:
+    invalidate_assistant_id()
+    resolved = await asyncio.gather(*(resolve_assistant_id("agent") for _ in range(10)))
+    assert resolved == [UUID(assistant_id_of("agent"))] * 10
+    assert await resolve_assistant_id("agent") == resolved[0]
+    assert fake_langgraph.requests == 1
+
+    invalidate_assistant_id("agent")
+    assert await resolve_assistant_id("agent") == resolved[0]
+    assert fake_langgraph.requests == 2
@@ -0,0 +1,73 @@
+from collections.abc import AsyncIterator
+from typing import Any, List
+
+import httpx
+import pytest
+from langgraph_sdk.client import LangGraphClient
+
+from langgraph_lite_cron.scheduler.client import create_langgraph_client
+
+
+@pytest.fixture
+def transports(monkeypatch: pytest.MonkeyPatch) -> List[Any]:
+    """Record the keyword arguments of every HTTP transport created"""
+    created: List[Any] = []
+    transport_class = httpx.AsyncHTTPTransport
+
+    def record(**kwargs: Any) -> httpx.AsyncHTTPTransport:
+        created.append(kwargs)
+        return transport_class(**kwargs)
+
+    monkeypatch.setattr(httpx, "AsyncHTTPTransport", record)
+    for name in ["LANGGRAPH_API_URL", "LANGGRAPH_API_KEY", "LANGSMITH_API_KEY", "LANGCHAIN_API_KEY"]:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("LANGGRAPH_MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("LANGGRAPH_MAX_KEEPALIVE_CONNECTIONS", "3")
+    monkeypatch.setenv("LANGGRAPH_KEEPALIVE_EXPIRY", "9")
+    return created
+
+
+@pytest.fixture
+async def clients() -> AsyncIterator[List[LangGraphClient]]:
+    created: List[LangGraphClient] = []
+    yield created
+    for client in created:
+        await client.http.client.aclose()
+
+
+async def test_limits_default_to_the_environment(
+    monkeypatch: pytest.MonkeyPatch, transports: List[Any], clients: List[LangGraphClient]
+) -> None:
+    monkeypatch.setenv("LANGGRAPH_API_URL", "http://langgraph.test")
+    monkeypatch.setenv("LANGSMITH_API_KEY", "'secret'")
+    clients.append(create_langgraph_client())
+
+    [transport] = transports
+    assert transport["limits"] == httpx.Limits(max_connections=7, max_keepalive_connections=3, keepalive_expiry=9)
+    http_client = clients[0].http.client
+    assert http_client.base_url == "http://langgraph.test"
+    assert http_client.headers["x-api-key"] == "secret"
+
+
+async def test_explicit_limits_override_the_environment_even_when_zero(
+    transports: List[Any], clients: List[LangGraphClient]
+) -> None:
+    clients.append(
+        create_langgraph_client(
+            url="http://langgraph.test", max_connections=5, max_keepalive_connections=0, keepalive_expiry=0
+        )
+    )
+
+    [transport] = transports
+    assert transport["limits"] == httpx.Limits(max_connections=5, max_keepalive_connections=0, keepalive_expiry=0)
+    assert "x-api-key" not in clients[0].http.client.headers
+
+
+async def test_without_a_url_the_client_is_the_one_of_langgraph_sdk(
+    transports: List[Any], clients: List[LangGraphClient]
+) -> None:
+    clients.append(create_langgraph_client())
+
+    # Only the client of langgraph_sdk.get_client was created, with its own transport
+    assert len(transports) == 1
+    assert "limits" not in transports[0]
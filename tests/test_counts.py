@@ -0,0 +1,93 @@
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+from uuid import UUID
+
+import httpx
+import pytest
+from sqlalchemy import select
+
+from langgraph_lite_cron.scheduler import LanggraphAsyncScheduler
+from langgraph_lite_cron.scheduler.datastores.sqlalchemy import (
+    LanggraphSQLAlchemyDataStore,
+)
+
+THREAD_ID = "00000000-0000-0000-0000-000000000001"
+FILTERS: List[Dict[str, Any]] = [
+    {},
+    {"assistant_id": "graph-0"},
+    {"assistant_id": "graph-1"},
+    {"thread_id": THREAD_ID},
+    {"assistant_id": "graph-1", "thread_id": THREAD_ID},
+]
+
+
+async def _create_cron(api: httpx.AsyncClient, assistant_id: str, **cron: Any) -> str:
+    thread_id = cron.pop("thread_id", None)
+    path = f"/threads/{thread_id}/runs/crons" if thread_id else "/runs/crons"
+    response = await api.post(path, json={"schedule": "0 0 1 1 *", "assistant_id": assistant_id, **cron})
+    assert response.status_code == 200, response.text
+    return response.json()["cron_id"]
+
+
+async def _counts(api: httpx.AsyncClient) -> List[int]:
+    counts = []
+    for filters in FILTERS:
+        response = await api.post("/runs/crons/count", json=filters)
+        assert response.status_code == 200, response.text
+        searched = (await api.post("/runs/crons/search", json={**filters, "limit": 1000})).json()
+        assert response.json() == len(searched), filters
+        counts.append(response.json())
+    return counts
+
+
+async def test_counts_match_the_crons_after_every_change(
+    api: httpx.AsyncClient, scheduler: LanggraphAsyncScheduler, make_due: Callable[[str], Awaitable[None]]
+) -> None:
+    assert await _counts(api) == [0, 0, 0, 0, 0]
+    cron_ids = [await _create_cron(api, "graph-0") for _ in range(2)]
+    cron_ids += [await _create_cron(api, "graph-1", thread_id=THREAD_ID) for _ in range(2)]
+    ended = datetime.now(timezone.utc) - timedelta(days=1)
+    finished_id = await _create_cron(api, "graph-1", thread_id=THREAD_ID, end_time=ended.isoformat())
+    assert await _counts(api) == [5, 2, 3, 3, 3]
+
+    # Replacing a schedule, as processing it does, keeps its count
+    await make_due(cron_ids[0])
+    await make_due(cron_ids[2])
+    assert await _counts(api) == [5, 2, 3, 3, 3]
+
+    response = await api.patch(f"/runs/crons/{cron_ids[2]}", json={"schedule": "30 0 * * *", "input": {"a": 2}})
+    assert response.status_code == 200, response.text
+    assert await _counts(api) == [5, 2, 3, 3, 3]
+
+    # Cleanup removes the schedule that will not fire again
+    await scheduler.data_store.cleanup()
+    assert await _counts(api) == [4, 2, 2, 2, 2]
+    searched = (await api.post("/runs/crons/search", json={"limit": 1000})).json()
+    assert finished_id not in {cron["cron_id"] for cron in searched}
+
+    await api.delete(f"/runs/crons/{cron_ids[0]}")
+    assert await _counts(api) == [3, 1, 2, 2, 2]
+    response = await api.post("/runs/crons/bulk_delete", json={"assistant_id": "graph-1"})
+    assert response.json() == {"deleted": 2}
+    assert await _counts(api) == [1, 1, 0, 0, 0]
+
+
+@pytest.mark.parametrize("data_store", ["sqlite"], indirect=True)
+async def test_the_count_of_all_crons_left_by_earlier_versions_is_dropped(
+    api: httpx.AsyncClient, scheduler: LanggraphAsyncScheduler
+) -> None:
+    await _create_cron(api, "graph-0")
+    data_store: LanggraphSQLAlchemyDataStore = scheduler.data_store
+    t = data_store._t_cron_counts
+    async with data_store._begin_transaction() as conn:
+        await data_store._execute(conn, t.delete())
+        await data_store._execute(conn, t.insert(), [{"scope": "all", "scope_id": UUID(int=0), "crons": 7}])
+
+    # As on startup
+    await data_store._count_existing_crons()
+
+    async with data_store._begin_transaction() as conn:
+        rows = (await data_store._execute(conn, select(t.c.scope, t.c.crons))).all()
+    assert [tuple(row) for row in rows] == [("assistant_id", 1)]
+    assert await _counts(api) == [1, 1, 0, 0, 0]
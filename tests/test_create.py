@@ -0,0 +1,72 @@
+from typing import Any, Dict, List
+
+import httpx
+import pytest
+
+from langgraph_lite_cron.scheduler import LanggraphAsyncScheduler
+
+THREAD_ID = "00000000-0000-0000-0000-000000000001"
+INVALID_SCHEDULES = ["61 * * * *", "* * *", "every day"]
+
+
+def _cron(**cron: Any) -> Dict[str, Any]:
+    return {"schedule": "0 0 1 1 *", "assistant_id": "agent", **cron}
+
+
+async def _searched(api: httpx.AsyncClient, **query: Any) -> List[Dict[str, Any]]:
+    response = await api.post("/runs/crons/search", json={"limit": 1000, **query})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_batch_creates_crons_on_their_threads_or_new_ones(
+    api: httpx.AsyncClient, scheduler: LanggraphAsyncScheduler
+) -> None:
+    response = await api.post(
+        "/runs/crons/batch",
+        json=[
+            _cron(input={"i": 0}),
+            _cron(input={"i": 1}, thread_id=THREAD_ID, schedule="30 6 * * *"),
+            _cron(input={"i": 2}, thread_id=THREAD_ID, end_time="2999-01-01T00:00:00Z"),
+        ],
+    )
+    assert response.status_code == 200, response.text
+    created = response.json()
+    assert [cron["payload"] for cron in created] == [{"i": 0}, {"i": 1}, {"i": 2}]
+    assert [cron["thread_id"] for cron in created] == [None, THREAD_ID, THREAD_ID]
+    assert created[2]["end_time"].startswith("2999-01-01")
+
+    assert {cron["cron_id"] for cron in await _searched(api)} == {cron["cron_id"] for cron in created}
+    on_thread = await _searched(api, thread_id=THREAD_ID)
+    assert {cron["cron_id"] for cron in on_thread} == {created[1]["cron_id"], created[2]["cron_id"]}
+
+    # The schedules fire like those of crons created one at a time
+    single = (await api.post(f"/threads/{THREAD_ID}/runs/crons", json=_cron(schedule="30 6 * * *"))).json()
+    batched_schedule = await scheduler.get_schedule(created[1]["cron_id"])
+    single_schedule = await scheduler.get_schedule(single["cron_id"])
+    assert batched_schedule.next_fire_time == single_schedule.next_fire_time
+    assert batched_schedule.task_id == single_schedule.task_id
+
+
+@pytest.mark.parametrize("schedule", INVALID_SCHEDULES)
+async def test_a_batch_with_an_invalid_schedule_is_rejected_whole(api: httpx.AsyncClient, schedule: str) -> None:
+    response = await api.post(
+        "/runs/crons/batch", json=[_cron(), _cron(schedule=schedule, thread_id=THREAD_ID)]
+    )
+    assert response.status_code == 422, response.text
+    assert (await api.post("/runs/crons/count", json={})).json() == 0
+
+
+@pytest.mark.parametrize("path", ["/runs/crons", f"/threads/{THREAD_ID}/runs/crons"])
+@pytest.mark.parametrize("schedule", INVALID_SCHEDULES)
+async def test_crons_with_an_invalid_schedule_are_rejected(api: httpx.AsyncClient, path: str, schedule: str) -> None:
+    response = await api.post(path, json=_cron(schedule=schedule))
+    assert response.status_code == 422, response.text
+    assert "Invalid cron schedule" in response.text
+
+
+async def test_updates_with_an_invalid_schedule_are_rejected(api: httpx.AsyncClient) -> None:
+    cron_id = (await api.post("/runs/crons", json=_cron())).json()["cron_id"]
+    response = await api.patch(f"/runs/crons/{cron_id}", json={"schedule": "61 * * * *"})
+    assert response.status_code == 422, response.text
+    assert [cron["schedule"] for cron in await _searched(api)] == ["0 0 1 1 *"]
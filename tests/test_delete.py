@@ -0,0 +1,75 @@
+from typing import Any, Dict, List
+
+import httpx
+import pytest
+from apscheduler import Event, ScheduleLookupError, ScheduleRemoved
+
+from langgraph_lite_cron.scheduler import LanggraphAsyncScheduler
+from langgraph_lite_cron.scheduler.datastores.sqlalchemy import (
+    LanggraphSQLAlchemyDataStore,
+)
+
+THREAD_IDS = ["00000000-0000-0000-0000-000000000001", "00000000-0000-0000-0000-000000000002"]
+MISSING_ID = "00000000-0000-0000-0000-0000000000ff"
+
+
+@pytest.fixture
+async def cron_ids(api: httpx.AsyncClient) -> List[str]:
+    """Crons of two graphs on two threads, three of each pair"""
+    crons = [
+        {"schedule": "0 0 1 1 *", "assistant_id": f"graph-{i % 2}", "thread_id": THREAD_IDS[i // 2 % 2]}
+        for i in range(12)
+    ]
+    response = await api.post("/runs/crons/batch", json=crons)
+    assert response.status_code == 200, response.text
+    return [cron["cron_id"] for cron in response.json()]
+
+
+async def _bulk_delete(api: httpx.AsyncClient, **filters: Any) -> int:
+    response = await api.post("/runs/crons/bulk_delete", json=filters)
+    assert response.status_code == 200, response.text
+    return response.json()["deleted"]
+
+
+async def _remaining(api: httpx.AsyncClient) -> List[str]:
+    crons = (await api.post("/runs/crons/search", json={"limit": 1000})).json()
+    return sorted(cron["cron_id"] for cron in crons)
+
+
+async def test_bulk_delete_removes_the_crons_matching_every_filter(
+    api: httpx.AsyncClient, scheduler: LanggraphAsyncScheduler, cron_ids: List[str]
+) -> None:
+    if isinstance(scheduler.data_store, LanggraphSQLAlchemyDataStore):
+        # Explicit IDs are matched in several chunks
+        scheduler.data_store.cron_update_batch_size = 2
+
+    removed: List[Event] = []
+    scheduler.subscribe(removed.append, {ScheduleRemoved})
+
+    assert await _bulk_delete(api, assistant_id="graph-0", thread_id=THREAD_IDS[0]) == 3
+    expected = [cron_id for i, cron_id in enumerate(cron_ids) if i % 2 or i // 2 % 2]
+    assert await _remaining(api) == sorted(expected)
+
+    # Explicit IDs are narrowed down by the other filters, and unknown IDs are skipped
+    assert await _bulk_delete(api, thread_id=THREAD_IDS[1], cron_ids=[*cron_ids[:6], MISSING_ID]) == 2
+    expected = [cron_id for cron_id in expected if cron_id not in cron_ids[2:4]]
+    assert await _remaining(api) == sorted(expected)
+
+    assert await _bulk_delete(api, assistant_id="graph-1") == 5
+    assert await _remaining(api) == sorted([cron_ids[6], cron_ids[10]])
+    assert await _bulk_delete(api, cron_ids=cron_ids) == 2
+    assert await _remaining(api) == []
+    assert (await api.post("/runs/crons/count", json={})).json() == 0
+
+    assert sorted(event.schedule_id for event in removed) == sorted(cron_ids)
+    with pytest.raises(ScheduleLookupError):
+        await scheduler.get_schedule(cron_ids[0])
+
+
+@pytest.mark.parametrize("filters", [{}, {"assistant_id": None, "thread_id": None}])
+async def test_bulk_delete_requires_a_filter(
+    api: httpx.AsyncClient, cron_ids: List[str], filters: Dict[str, Any]
+) -> None:
+    response = await api.post("/runs/crons/bulk_delete", json=filters)
+    assert response.status_code == 422
+    assert len(await _remaining(api)) == len(cron_ids)
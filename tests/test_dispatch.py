@@ -0,0 +1,203 @@
+import asyncio
+import time
+from typing import Any, Dict
+
+import httpx
+import pytest
+from fake_langgraph import FakeLangGraph
+from langgraph_sdk.client import LangGraphClient
+from langgraph_sdk.schema import Run
+
+from langgraph_lite_cron.scheduler.dispatch import (
+    AdaptiveConcurrencyLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    DispatchRateLimiter,
+    RunDispatcher,
+)
+
+RUN: Dict[str, Any] = {"thread_id": None, "assistant_id": "agent", "input": {"a": 1}}
+
+
+async def _dispatch(dispatcher: RunDispatcher, client: LangGraphClient) -> Run:
+    return await dispatcher.dispatch(lambda: client.runs.create(**RUN))
+
+
+async def test_concurrency_limit_decreases_on_overload_and_recovers(
+    fake_langgraph: FakeLangGraph, langgraph_client: LangGraphClient
+) -> None:
+    # Only overload lowers the limit, not jitter in the latency of the fake server
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=16, latency_tolerance=100)
+    dispatcher = RunDispatcher(
+        concurrency=limiter, circuit_breaker=CircuitBreaker(failure_threshold=100), max_retries=0
+    )
+    fake_langgraph.latency = 0.01
+    await _dispatch(dispatcher, langgraph_client)
+    assert limiter.limit == 8
+
+    fake_langgraph.error_rate = 1.0
+    with pytest.raises(httpx.HTTPStatusError) as exc_info:
+        await _dispatch(dispatcher, langgraph_client)
+    assert exc_info.value.response.status_code == 503
+    assert limiter.limit == 4
+
+    fake_langgraph.error_rate = 0.0
+    # The limit grows by one every round of limit successes
+    for _ in range(5):
+        await _dispatch(dispatcher, langgraph_client)
+    assert limiter.limit == 5
+    assert limiter.in_flight == 0
+
+
+async def test_overloaded_runs_are_retried(fake_langgraph: FakeLangGraph, langgraph_client: LangGraphClient) -> None:
+    dispatcher = RunDispatcher(max_retries=3, backoff=0.01)
+    fake_langgraph.error_rate = 0.5
+    fake_langgraph.random.seed(1)
+
+    for _ in range(5):
+        await _dispatch(dispatcher, langgraph_client)
+
+    assert len(fake_langgraph.runs) == 5
+    assert fake_langgraph.errors > 0
+    assert fake_langgraph.requests == 5 + fake_langgraph.errors
+
+
+async def test_circuit_opens_probes_once_and_closes(
+    fake_langgraph: FakeLangGraph, langgraph_client: LangGraphClient
+) -> None:
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+    dispatcher = RunDispatcher(circuit_breaker=breaker, max_retries=0)
+
+    # Open after the failure threshold
+    fake_langgraph.error_rate = 1.0
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            await _dispatch(dispatcher, langgraph_client)
+    assert breaker.is_open
+    assert breaker.enter() > 0
+
+    # Half-open: once the timeout has passed, a failed probe opens the circuit again
+    await asyncio.sleep(0.2)
+    with pytest.raises(httpx.HTTPStatusError):
+        await _dispatch(dispatcher, langgraph_client)
+    assert breaker.is_open
+    assert fake_langgraph.requests == 3
+
+    # Runs wait for the timeout, then only the probe is sent until it succeeds and closes the circuit
+    fake_langgraph.error_rate = 0.0
+    fake_langgraph.latency = 0.1
+    started_at = time.monotonic()
+    runs = [asyncio.create_task(_dispatch(dispatcher, langgraph_client)) for _ in range(3)]
+    await asyncio.sleep(0.25)
+    assert fake_langgraph.requests == 4
+
+    await asyncio.gather(*runs)
+    assert not breaker.is_open
+    assert fake_langgraph.requests == 6
+    assert time.monotonic() - started_at >= 0.2
+
+
+async def test_open_circuit_fails_runs_once_the_retry_queue_is_full(
+    fake_langgraph: FakeLangGraph, langgraph_client: LangGraphClient
+) -> None:
+    dispatcher = RunDispatcher(
+        circuit_breaker=CircuitBreaker(failure_threshold=1, reset_timeout=10), max_retries=0, retry_queue_size=1
+    )
+    fake_langgraph.error_rate = 1.0
+    with pytest.raises(httpx.HTTPStatusError):
+        await _dispatch(dispatcher, langgraph_client)
+
+    waiting = asyncio.create_task(_dispatch(dispatcher, langgraph_client))
+    await asyncio.sleep(0.01)
+    assert not waiting.done()
+
+    with pytest.raises(CircuitOpenError):
+        await _dispatch(dispatcher, langgraph_client)
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert fake_langgraph.requests == 1
+
+    # The cancelled run left the queue
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(_dispatch(dispatcher, langgraph_client), 0.05)
+
+
+async def test_cancelled_runs_release_their_concurrency_slot(
+    fake_langgraph: FakeLangGraph, langgraph_client: LangGraphClient
+) -> None:
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+    dispatcher = RunDispatcher(concurrency=limiter)
+    fake_langgraph.latency = 10
+
+    sending = asyncio.create_task(_dispatch(dispatcher, langgraph_client))
+    waiting = asyncio.create_task(_dispatch(dispatcher, langgraph_client))
+    await asyncio.sleep(0.01)
+    assert limiter.in_flight == 1
+    assert fake_langgraph.requests == 1
+
+    # A run cancelled while waiting for a slot gives up its place
+    waiting.cancel()
+    await asyncio.gather(waiting, return_exceptions=True)
+    assert limiter.in_flight == 1
+
+    # A run cancelled while it is being sent frees its slot for the next one
+    sending.cancel()
+    await asyncio.gather(sending, return_exceptions=True)
+    assert limiter.in_flight == 0
+
+    fake_langgraph.latency = 0
+    run = await asyncio.wait_for(_dispatch(dispatcher, langgraph_client), 1)
+    assert run["assistant_id"] == "agent"
+    assert limiter.in_flight == 0
+
+
+async def _acquire_time(limiter: DispatchRateLimiter, assistant_id: str = "agent") -> float:
+    started_at = time.monotonic()
+    await limiter.acquire(assistant_id)
+    return time.monotonic() - started_at
+
+
+def test_rate_limits_of_none_or_zero_are_off() -> None:
+    assert not DispatchRateLimiter().enabled
+    assert not DispatchRateLimiter(rate=0, assistant_rate=0).enabled
+    assert DispatchRateLimiter(rate=1).enabled
+    assert DispatchRateLimiter(assistant_rate=1).enabled
+
+
+async def test_dispatch_waits_for_the_overall_rate_after_a_burst() -> None:
+    limiter = DispatchRateLimiter(rate=20, burst=2)
+    assert await _acquire_time(limiter) < 0.02
+    assert await _acquire_time(limiter) < 0.02
+    # Each further run waits for a token refilled at 20 per second
+    assert 0.04 <= await _acquire_time(limiter) < 0.1
+
+
+async def test_assistants_are_limited_independently() -> None:
+    limiter = DispatchRateLimiter(assistant_rate=20, assistant_burst=1)
+    assert await _acquire_time(limiter, "a") < 0.02
+    assert await _acquire_time(limiter, "b") < 0.02
+    assert await _acquire_time(limiter, "a") >= 0.04
+
+
+async def test_cancelled_waiters_give_their_token_back() -> None:
+    limiter = DispatchRateLimiter(rate=10, burst=1)
+    await limiter.acquire("agent")
+    waiting = asyncio.create_task(limiter.acquire("agent"))
+    await asyncio.sleep(0.01)
+    waiting.cancel()
+    await asyncio.gather(waiting, return_exceptions=True)
+
+    # The next run waits for one token, not for the one the cancelled run reserved too
+    assert await _acquire_time(limiter) < 0.15
+
+
+async def test_idle_assistant_buckets_are_dropped(monkeypatch: pytest.MonkeyPatch) -> None:
+    limiter = DispatchRateLimiter(assistant_rate=1000, assistant_burst=10)
+    monkeypatch.setattr(limiter, "_MAX_IDLE_BUCKETS", 2)
+    await limiter.acquire("a")
+    await limiter.acquire("b")
+    await asyncio.sleep(0.05)
+    await limiter.acquire("c")
+    assert list(limiter._assistant_buckets) == ["c"]
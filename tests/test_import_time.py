@@ -0,0 +1,9 @@
+import pytest
+from import_time import ENTRY_POINTS, measure
+
+
+@pytest.mark.parametrize("module", list(ENTRY_POINTS))
+def test_entry_points_do_not_load_the_backends_they_must_not(module: str) -> None:
+    # Only the packages loaded are checked, as import times vary too much between machines
+    result = measure(module, ENTRY_POINTS[module], repeat=1, budget=None)
+    assert result["violations"] == []
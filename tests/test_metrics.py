@@ -0,0 +1,74 @@
+from typing import Dict
+
+import httpx
+import pytest
+
+from langgraph_lite_cron.metrics import Counter, Gauge, Histogram, Registry, _Metric
+
+
+def _samples(text: str) -> Dict[str, float]:
+    return {
+        name: float(value)
+        for name, _, value in (line.rpartition(" ") for line in text.splitlines() if not line.startswith("#"))
+    }
+
+
+def test_metrics_must_implement_their_samples() -> None:
+    with pytest.raises(TypeError):
+        _Metric("langgraph_cron_test", "Test.")  # type: ignore[abstract]
+
+
+def test_label_values_are_escaped() -> None:
+    counter = Counter("langgraph_cron_test", "Test.", ["endpoint"])
+    counter.labels('GET "a\\b"\nc').inc(2)
+
+    assert counter.render().splitlines() == [
+        "# HELP langgraph_cron_test Test.",
+        "# TYPE langgraph_cron_test counter",
+        'langgraph_cron_test_total{endpoint="GET \\"a\\\\b\\"\\nc"} 2',
+    ]
+
+
+def test_histograms_render_cumulative_buckets_sum_and_count() -> None:
+    histogram = Histogram("langgraph_cron_test_seconds", "Test.", ["outcome"], buckets=[1, 0.5])
+    for value in [0.25, 0.5, 1, 3]:
+        histogram.labels("ok").observe(value)
+
+    assert histogram.render().splitlines()[2:] == [
+        'langgraph_cron_test_seconds_bucket{outcome="ok",le="0.5"} 2',
+        'langgraph_cron_test_seconds_bucket{outcome="ok",le="1"} 3',
+        'langgraph_cron_test_seconds_bucket{outcome="ok",le="+Inf"} 4',
+        'langgraph_cron_test_seconds_sum{outcome="ok"} 4.75',
+        'langgraph_cron_test_seconds_count{outcome="ok"} 4',
+    ]
+
+
+def test_registry_renders_metrics_without_labels() -> None:
+    registry = Registry()
+    gauge = registry.register(Gauge("langgraph_cron_test", "Test."))
+    gauge.inc(3)
+    gauge.dec()
+    histogram = registry.register(Histogram("langgraph_cron_test_seconds", "Test.", buckets=[1]))
+    histogram.observe(0.5)
+
+    text = registry.render()
+    assert text.endswith("\n")
+    assert _samples(text) == {
+        "langgraph_cron_test": 2,
+        'langgraph_cron_test_seconds_bucket{le="1"}': 1,
+        'langgraph_cron_test_seconds_bucket{le="+Inf"}': 1,
+        "langgraph_cron_test_seconds_sum": 0.5,
+        "langgraph_cron_test_seconds_count": 1,
+    }
+
+
+async def test_metrics_endpoint_exposes_the_latency_of_api_requests(api: httpx.AsyncClient) -> None:
+    sample = 'langgraph_cron_api_request_seconds_count{endpoint="POST /runs/crons/count"}'
+    before = _samples((await api.get("/runs/crons/metrics")).text).get(sample, 0)
+    for _ in range(2):
+        assert (await api.post("/runs/crons/count", json={})).status_code == 200
+
+    response = await api.get("/runs/crons/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert _samples(response.text)[sample] == before + 2
@@ -0,0 +1,135 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any, Dict
+
+import httpx
+import pytest
+from anyio import fail_after
+from fake_langgraph import FakeLangGraph
+from sqlalchemy import select
+
+from langgraph_lite_cron.scheduler import LanggraphAsyncScheduler
+from langgraph_lite_cron.scheduler.datastores.memory import LanggraphMemoryDataStore
+from langgraph_lite_cron.scheduler.datastores.sqlalchemy import (
+    LanggraphSQLAlchemyDataStore,
+)
+from langgraph_lite_cron.scheduler.payloads import payload_digest
+
+SHARED = {"messages": [{"role": "user", "content": "hello"}]}
+
+
+async def _references(scheduler: LanggraphAsyncScheduler) -> Dict[str, int]:
+    """Return the stored payloads of the scheduler's data store with their reference counts"""
+    data_store = scheduler.data_store
+    if isinstance(data_store, LanggraphMemoryDataStore):
+        assert data_store._payloads.keys() == data_store._payload_references.keys()
+        return dict(data_store._payload_references)
+
+    t = data_store._t_payloads
+    async with data_store._begin_transaction() as conn:
+        return dict((await data_store._execute(conn, select(t.c.digest, t.c.refcount))).all())
+
+
+async def _create_cron(api: httpx.AsyncClient, payload: Dict[str, Any] | None = SHARED) -> str:
+    response = await api.post("/runs/crons", json={"schedule": "0 0 1 1 *", "assistant_id": "agent", "input": payload})
+    assert response.status_code == 200, response.text
+    return response.json()["cron_id"]
+
+
+async def _payload_of(api: httpx.AsyncClient, cron_id: str) -> Dict[str, Any]:
+    crons = (await api.post("/runs/crons/search", json={"limit": 1000})).json()
+    return next(cron["payload"] for cron in crons if cron["cron_id"] == cron_id)
+
+
+async def test_crons_share_a_payload_until_the_last_is_deleted(
+    api: httpx.AsyncClient, scheduler: LanggraphAsyncScheduler
+) -> None:
+    first_id, second_id = await _create_cron(api), await _create_cron(api)
+    response = await api.post("/runs/crons/batch", json=[{"schedule": "0 0 1 1 *", "assistant_id": "agent", "input": SHARED}])
+    third_id = response.json()[0]["cron_id"]
+    await _create_cron(api, None)
+    assert await _references(scheduler) == {payload_digest(SHARED): 3}
+
+    await api.delete(f"/runs/crons/{first_id}")
+    assert await _references(scheduler) == {payload_digest(SHARED): 2}
+    assert await _payload_of(api, second_id) == SHARED
+
+    await api.post("/runs/crons/bulk_delete", json={"cron_ids": [second_id, third_id]})
+    assert await _references(scheduler) == {}
+
+
+async def test_cron_fires_with_a_payload_shared_with_a_deleted_cron(
+    api: httpx.AsyncClient,
+    scheduler: LanggraphAsyncScheduler,
+    fake_langgraph: FakeLangGraph,
+    make_due: Callable[[str], Awaitable[None]],
+) -> None:
+    deleted_id, cron_id = await _create_cron(api), await _create_cron(api)
+    await api.delete(f"/runs/crons/{deleted_id}")
+    await make_due(cron_id)
+
+    await scheduler.start_in_background()
+    with fail_after(5):
+        while not fake_langgraph.runs:
+            await asyncio.sleep(0.05)
+
+    assert [run["input"] for run in fake_langgraph.runs] == [SHARED]
+
+
+async def test_update_moves_the_reference_to_the_new_payload(
+    api: httpx.AsyncClient, scheduler: LanggraphAsyncScheduler
+) -> None:
+    cron_id, other_id = await _create_cron(api), await _create_cron(api)
+    changed = {"messages": [{"role": "user", "content": "bye"}]}
+
+    response = await api.patch(f"/runs/crons/{cron_id}", json={"schedule": "0 0 * * *"})
+    assert response.json()["payload"] == SHARED
+    assert await _references(scheduler) == {payload_digest(SHARED): 2}
+
+    response = await api.patch(f"/runs/crons/{cron_id}", json={"input": changed})
+    assert response.json()["payload"] == changed
+    assert await _references(scheduler) == {payload_digest(SHARED): 1, payload_digest(changed): 1}
+
+    await api.patch(f"/runs/crons/{other_id}", json={"input": changed})
+    assert await _references(scheduler) == {payload_digest(changed): 2}
+    assert await _payload_of(api, cron_id) == await _payload_of(api, other_id) == changed
+
+    await api.patch(f"/runs/crons/{cron_id}", json={"input": None})
+    assert await _references(scheduler) == {payload_digest(changed): 1}
+    assert await _payload_of(api, cron_id) == {}
+
+
+async def test_every_caller_gets_its_own_copy_of_a_payload(
+    api: httpx.AsyncClient, scheduler: LanggraphAsyncScheduler
+) -> None:
+    cron_id = await _create_cron(api)
+    digest = payload_digest(SHARED)
+    first = await scheduler.data_store.get_payload(digest)
+    assert first == SHARED
+    first["messages"].append({"role": "user", "content": "changed"})
+
+    assert await scheduler.data_store.get_payload(digest) == SHARED
+    assert await _payload_of(api, cron_id) == SHARED
+    assert await scheduler.data_store.get_payload("0" * 64) is None
+
+
+@pytest.mark.parametrize("data_store", ["sqlite"], indirect=True)
+async def test_cached_payloads_are_bounded_and_compressed_ones_are_read_back(
+    api: httpx.AsyncClient, scheduler: LanggraphAsyncScheduler
+) -> None:
+    data_store: LanggraphSQLAlchemyDataStore = scheduler.data_store
+    data_store.payload_compression_threshold = 16
+    data_store._payload_cache.maxsize = 1
+    payloads = [{"text": str(i) * 100} for i in range(2)]
+    for payload in payloads:
+        await _create_cron(api, payload)
+    assert len(data_store._payload_cache) == 1
+
+    t = data_store._t_payloads
+    async with data_store._begin_transaction() as conn:
+        assert (await data_store._execute(conn, select(t.c.compressed))).scalars().all() == [True, True]
+
+    data_store._payload_cache.invalidate()
+    for payload in payloads:
+        assert await data_store.get_payload(payload_digest(payload)) == payload
+    assert len(data_store._payload_cache) == 1
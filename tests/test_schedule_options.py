@@ -0,0 +1,81 @@
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+from uuid import uuid4
+
+import pytest
+from apscheduler import CoalescePolicy
+from conftest import in_own_task
+from fake_langgraph import FakeLangGraph
+
+from langgraph_lite_cron.scheduler import LanggraphAsyncScheduler
+from langgraph_lite_cron.scheduler.datastores.memory import LanggraphMemoryDataStore
+from langgraph_lite_cron.shcemas import CronCreate
+from langgraph_lite_cron.utils import create_cron_job, create_cron_jobs
+
+ASSISTANT_ID = uuid4()
+OPTIONS = {"max_jitter": 5, "misfire_grace_time": 30, "coalesce": "all"}
+
+
+@pytest.fixture
+async def scheduler(fake_langgraph: FakeLangGraph) -> AsyncIterator[LanggraphAsyncScheduler]:
+    """A scheduler with defaults for the crons that set no options of their own"""
+    scheduler = LanggraphAsyncScheduler(
+        data_store=LanggraphMemoryDataStore(),
+        langgraph_client=fake_langgraph.client(),
+        default_max_jitter=2,
+        default_coalesce="earliest",
+    )
+    async with in_own_task(scheduler):
+        yield scheduler
+
+
+async def _create(scheduler: LanggraphAsyncScheduler, batched: bool, **options: Any) -> str:
+    cron = CronCreate(schedule="0 0 * * *", assistant_id=str(ASSISTANT_ID), **options)
+    now = datetime.now(timezone.utc)
+    if batched:
+        [created] = await create_cron_jobs(scheduler=scheduler, jobs=[(None, ASSISTANT_ID, cron)], now=now)
+    else:
+        created = await create_cron_job(scheduler=scheduler, assistant_id=ASSISTANT_ID, cron=cron, now=now)
+    return str(created.cron_id)
+
+
+def test_scheduler_defaults_are_converted(fake_langgraph: FakeLangGraph) -> None:
+    client = fake_langgraph.client()
+    scheduler = LanggraphAsyncScheduler(langgraph_client=client, default_max_jitter=1.5, default_coalesce="all")
+    assert scheduler.default_max_jitter == timedelta(seconds=1.5)
+    assert scheduler.default_coalesce is CoalescePolicy.all
+    scheduler = LanggraphAsyncScheduler(langgraph_client=client)
+    assert scheduler.default_max_jitter is None
+    assert scheduler.default_coalesce is CoalescePolicy.latest
+
+
+@pytest.mark.parametrize("batched", [False, True], ids=["single", "batch"])
+async def test_crons_set_their_own_jitter_coalescing_and_misfire_grace_time(
+    scheduler: LanggraphAsyncScheduler, batched: bool
+) -> None:
+    schedule = await scheduler.get_schedule(await _create(scheduler, batched, **OPTIONS))
+    assert schedule.max_jitter == timedelta(seconds=5)
+    assert schedule.misfire_grace_time == timedelta(seconds=30)
+    assert schedule.coalesce is CoalescePolicy.all
+
+
+@pytest.mark.parametrize("batched", [False, True], ids=["single", "batch"])
+async def test_crons_fall_back_to_the_defaults_of_the_scheduler_and_task(
+    scheduler: LanggraphAsyncScheduler, batched: bool
+) -> None:
+    schedule = await scheduler.get_schedule(await _create(scheduler, batched))
+    [task] = await scheduler.get_tasks()
+    assert schedule.max_jitter == timedelta(seconds=2)
+    assert schedule.misfire_grace_time == task.misfire_grace_time
+    assert schedule.coalesce is CoalescePolicy.earliest
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{"max_jitter": -1}, {"misfire_grace_time": 0}, {"coalesce": "never"}],
+    ids=["max_jitter", "misfire_grace_time", "coalesce"],
+)
+def test_invalid_options_are_rejected(options: Dict[str, Any]) -> None:
+    with pytest.raises(ValueError):
+        CronCreate(schedule="0 0 * * *", assistant_id="agent", **options)
@@ -0,0 +1,178 @@
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+from uuid import UUID
+
+import httpx
+import pytest
+
+from langgraph_lite_cron.scheduler import LanggraphAsyncScheduler
+from langgraph_lite_cron.scheduler.datastores.memory import LanggraphMemoryDataStore
+from langgraph_lite_cron.scheduler.models import (
+    EXPORTED_CRON_FIELDS,
+    PUBLIC_CRON_FIELDS,
+)
+from langgraph_lite_cron.shcemas import CronPublic
+
+SORT_FIELDS = ["cron_id", "assistant_id", "thread_id", "next_run_date", "end_time", "created_at", "updated_at"]
+THREAD_IDS = ["00000000-0000-0000-0000-000000000001", "00000000-0000-0000-0000-000000000002"]
+NOW = datetime.now(timezone.utc)
+
+
+def _cron(i: int) -> Dict[str, Any]:
+    cron: Dict[str, Any] = {"schedule": "0 0 1 1 *", "assistant_id": f"graph-{i % 2}", "input": {"i": i}}
+    # Crons without a thread, or an end time, or a next run (their end time has passed) sort their nulls
+    # among many ties on the other fields
+    if i % 3:
+        cron["thread_id"] = THREAD_IDS[i % 2]
+    if i % 4 == 1:
+        cron["end_time"] = (NOW + timedelta(days=3650)).isoformat()
+    elif i % 4 == 2:
+        cron["end_time"] = (NOW - timedelta(days=1)).isoformat()
+    return cron
+
+
+@pytest.fixture
+async def cron_ids(api: httpx.AsyncClient) -> List[str]:
+    # Crons created in one batch share their creation time
+    response = await api.post("/runs/crons/batch", json=[_cron(i) for i in range(20)])
+    assert response.status_code == 200
+    ids = [cron["cron_id"] for cron in response.json()]
+    for i in range(20, 25):
+        cron = _cron(i)
+        thread_id = cron.pop("thread_id", None)
+        path = f"/threads/{thread_id}/runs/crons" if thread_id else "/runs/crons"
+        response = await api.post(path, json=cron)
+        assert response.status_code == 200
+        ids.append(response.json()["cron_id"])
+    return ids
+
+
+async def _search(api: httpx.AsyncClient, **query: Any) -> httpx.Response:
+    response = await api.post("/runs/crons/search", json=query)
+    assert response.status_code == 200, response.text
+    return response
+
+
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+@pytest.mark.parametrize("sort_by", SORT_FIELDS)
+@pytest.mark.parametrize(
+    "filters",
+    [{}, {"assistant_id": "graph-1"}, {"thread_id": THREAD_IDS[0]}, {"assistant_id": "graph-0", "thread_id": THREAD_IDS[0]}],
+    ids=["all", "assistant", "thread", "assistant-and-thread"],
+)
+async def test_cursor_pages_cover_every_cron_once(
+    api: httpx.AsyncClient, cron_ids: List[str], sort_by: str, sort_order: str, filters: Dict[str, Any]
+) -> None:
+    query = {**filters, "sort_by": sort_by, "sort_order": sort_order}
+    expected = [cron["cron_id"] for cron in (await _search(api, **query, limit=1000)).json()]
+    assert len(expected) == len(set(expected))
+    if not filters:
+        assert sorted(expected) == sorted(cron_ids)
+
+    paged: List[str] = []
+    cursor = None
+    while True:
+        response = await _search(api, **query, limit=3, **({"cursor": cursor} if cursor else {}))
+        paged.extend(cron["cron_id"] for cron in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert paged == expected
+
+
+async def test_filters_match_the_created_crons(api: httpx.AsyncClient, cron_ids: List[str]) -> None:
+    crons = (await _search(api, assistant_id="graph-1", thread_id=THREAD_IDS[1], limit=1000)).json()
+    expected = {cron_ids[i] for i in range(25) if i % 2 == 1 and i % 3}
+    assert {cron["cron_id"] for cron in crons} == expected
+    assert all(cron["thread_id"] == THREAD_IDS[1] for cron in crons)
+
+
+async def test_cursor_must_match_the_sort(api: httpx.AsyncClient, cron_ids: List[str]) -> None:
+    cursor = (await _search(api, sort_by="end_time", limit=2)).headers["X-Next-Cursor"]
+    response = await api.post("/runs/crons/search", json={"sort_by": "created_at", "cursor": cursor})
+    assert response.status_code == 400
+
+
+async def _export(api: httpx.AsyncClient, **query: Any) -> List[Dict[str, Any]]:
+    response = await api.post("/runs/crons/export", json=query)
+    assert response.status_code == 200, response.text
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+async def test_export_rows_are_the_searched_crons_with_their_assistant(
+    api: httpx.AsyncClient, cron_ids: List[str]
+) -> None:
+    exported = await _export(api)
+    searched = (await _search(api, sort_by="cron_id", sort_order="asc", limit=1000)).json()
+    assert [cron["cron_id"] for cron in exported] == sorted(cron_ids)
+    assert all(set(cron) == set(EXPORTED_CRON_FIELDS) for cron in exported)
+    assert [{name: cron[name] for name in PUBLIC_CRON_FIELDS} for cron in exported] == searched
+
+    graph_crons = await _export(api, assistant_id="graph-1")
+    assert {cron["cron_id"] for cron in graph_crons} == {cron_ids[i] for i in range(25) if i % 2 == 1}
+    assert len({cron["assistant_id"] for cron in graph_crons}) == 1
+    assert {cron["payload"]["i"] % 2 for cron in graph_crons} == {1}
+
+
+async def _check_memory_pages(data_store: LanggraphMemoryDataStore, sort_by: str) -> None:
+    """Check the pages of every filter and sort order against a full sort of the crons"""
+    rows = list(data_store._cron_rows.values())
+    assistant_id, thread_id = rows[-1].assistant_id, UUID(THREAD_IDS[0])
+    for filters in [{}, {"assistant_id": assistant_id}, {"thread_id": thread_id}, {"assistant_id": assistant_id, "thread_id": thread_id}]:
+        matching = [row for row in rows if all(getattr(row, name) == value for name, value in filters.items())]
+        for sort_order in ["asc", "desc"]:
+            # Null values sort last, and ties are broken by cron ID
+            expected = sorted(
+                matching,
+                key=lambda row: (getattr(row, sort_by) is None, getattr(row, sort_by), row.cron_id),
+                reverse=sort_order == "desc",
+            )
+            for offset in [0, 4, len(matching) - 1, len(matching) + 1]:
+                crons = await data_store.get_crons(
+                    assistant_id=filters.get("assistant_id"),
+                    thread_id=filters.get("thread_id"),
+                    limit=5,
+                    offset=offset,
+                    sort_by=sort_by,
+                    sort_order=sort_order,
+                )
+                assert [cron.cron_id for cron in crons] == [row.cron_id for row in expected[offset:offset + 5]]
+
+
+@pytest.mark.parametrize("data_store", ["memory"], indirect=True)
+@pytest.mark.parametrize("sort_by", SORT_FIELDS)
+async def test_memory_pages_follow_a_full_sort_as_crons_change(
+    api: httpx.AsyncClient, scheduler: LanggraphAsyncScheduler, cron_ids: List[str], sort_by: str
+) -> None:
+    await _check_memory_pages(scheduler.data_store, sort_by)
+
+    for cron_id in cron_ids[:3]:
+        assert (await api.delete(f"/runs/crons/{cron_id}")).status_code == 200
+    for cron_id in cron_ids[3:6]:
+        response = await api.patch(f"/runs/crons/{cron_id}", json={"schedule": "30 6 * * *"})
+        assert response.status_code == 200, response.text
+    assert len(scheduler.data_store._cron_rows) == len(cron_ids) - 3
+    await _check_memory_pages(scheduler.data_store, sort_by)
+
+
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+@pytest.mark.parametrize("sort_by", ["created_at", "next_run_date"])
+@pytest.mark.parametrize("thread_id", [None, THREAD_IDS[0]], ids=["all", "thread"])
+async def test_searched_rows_match_the_validated_crons(
+    api: httpx.AsyncClient,
+    scheduler: LanggraphAsyncScheduler,
+    cron_ids: List[str],
+    sort_by: str,
+    sort_order: str,
+    thread_id: str | None,
+) -> None:
+    assert PUBLIC_CRON_FIELDS == tuple(CronPublic.model_fields)
+    query = {"sort_by": sort_by, "sort_order": sort_order, "offset": 2, "limit": 10}
+    searched = (await _search(api, **query, **({"thread_id": thread_id} if thread_id else {}))).json()
+
+    crons = await scheduler.data_store.get_crons(
+        assistant_id=None, thread_id=UUID(thread_id) if thread_id else None, **query
+    )
+    assert searched == [CronPublic.model_validate(cron).model_dump(mode="json") for cron in crons]
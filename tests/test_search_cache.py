@@ -0,0 +1,216 @@
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import attrs
+import httpx
+import pytest
+from anyio import fail_after
+from apscheduler import ConflictPolicy, ScheduleResult
+from apscheduler.abc import EventBroker
+from apscheduler.eventbrokers.local import LocalEventBroker
+from apscheduler.eventbrokers.redis import RedisEventBroker
+from conftest import in_own_task, sqlite_uri
+from fake_langgraph import FakeLangGraph
+from fakeredis import FakeAsyncRedis, FakeServer
+from fastapi import FastAPI
+
+from langgraph_lite_cron import crons
+from langgraph_lite_cron.scheduler import LanggraphAsyncScheduler
+from langgraph_lite_cron.scheduler.datastores.sqlalchemy import (
+    LanggraphSQLAlchemyDataStore,
+)
+from langgraph_lite_cron.utils import invalidate_assistant_id
+
+Node = Tuple[LanggraphAsyncScheduler, httpx.AsyncClient]
+CRON = {"schedule": "0 0 1 1 *", "assistant_id": "agent", "input": {"a": 1}}
+
+
+@pytest.fixture(params=["local", "redis"])
+def event_brokers(request: pytest.FixtureRequest) -> Callable[[], EventBroker]:
+    """Return a function that creates the event broker of a node, connected to those of the other nodes if external"""
+    if request.param == "local":
+        return LocalEventBroker
+
+    server = FakeServer()
+    return lambda: RedisEventBroker(FakeAsyncRedis(server=server), stop_check_interval=0.05)
+
+
+@pytest.fixture
+async def nodes(
+    tmp_path: Path, fake_langgraph: FakeLangGraph, event_brokers: Callable[[], EventBroker]
+) -> AsyncIterator[Callable[..., Awaitable[Node]]]:
+    """Return a function that starts a node caching searches of one shared SQLite database.
+
+    Searches are only cached once buffered cron updates may have been flushed, which takes
+    ``cron_update_max_delay`` seconds.
+    """
+    invalidate_assistant_id()
+    contexts: List[Any] = []
+
+    async def start_node(cron_update_max_delay: float = 0.05) -> Node:
+        data_store = LanggraphSQLAlchemyDataStore(
+            engine_or_url=sqlite_uri(tmp_path / "crons.sqlite"),
+            search_cache_ttl=60,
+            cron_update_max_delay=cron_update_max_delay,
+        )
+        scheduler = LanggraphAsyncScheduler(
+            data_store=data_store, event_broker=event_brokers(), langgraph_client=fake_langgraph.client()
+        )
+        context = in_own_task(scheduler)
+        await context.__aenter__()
+        contexts.append(context)
+
+        app = FastAPI()
+        app.state.scheduler = scheduler
+        app.include_router(crons.router)
+        api = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://crons.test")
+        contexts.append(api)
+        return scheduler, api
+
+    yield start_node
+
+    for context in reversed(contexts):
+        await context.__aexit__(None, None, None)
+
+
+async def _search(api: httpx.AsyncClient, **query: Any) -> List[Dict[str, Any]]:
+    response = await api.post("/runs/crons/search", json=query)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def _searched_ids(api: httpx.AsyncClient) -> List[str]:
+    return [cron["cron_id"] for cron in await _search(api, sort_by="cron_id", sort_order="asc")]
+
+
+async def _cache(node: Node, search: Callable[[httpx.AsyncClient], Awaitable[Any]]) -> Any:
+    """Search until the result gets cached, once the latest change has settled"""
+    scheduler, api = node
+    cache = scheduler.data_store._search_cache
+    with fail_after(5):
+        while True:
+            result = await search(api)
+            if len(cache):
+                return result
+            await asyncio.sleep(0.05)
+
+
+async def _schedules(api: httpx.AsyncClient) -> List[str]:
+    return [cron["schedule"] for cron in await _search(api)]
+
+
+async def _create_cron(api: httpx.AsyncClient) -> str:
+    response = await api.post("/runs/crons", json=CRON)
+    assert response.status_code == 200, response.text
+    return response.json()["cron_id"]
+
+
+async def _eventually(check: Callable[[], Awaitable[bool]]) -> None:
+    """Wait for a check to pass, as events from other nodes arrive asynchronously"""
+    with fail_after(5):
+        while not await check():
+            await asyncio.sleep(0.05)
+
+
+async def test_adds_and_deletes_drop_cached_searches(nodes: Callable[..., Awaitable[Node]]) -> None:
+    node = await nodes()
+    _, api = node
+    first_id = await _create_cron(api)
+    assert await _cache(node, _searched_ids) == [first_id]
+
+    second_id = await _create_cron(api)
+    assert await _searched_ids(api) == sorted([first_id, second_id])
+
+    await _cache(node, _searched_ids)
+    await api.delete(f"/runs/crons/{first_id}")
+    assert await _searched_ids(api) == [second_id]
+
+    await _cache(node, _searched_ids)
+    await api.post("/runs/crons/bulk_delete", json={"cron_ids": [second_id]})
+    assert await _searched_ids(api) == []
+
+
+async def test_patch_drops_cached_searches(nodes: Callable[..., Awaitable[Node]]) -> None:
+    node = await nodes()
+    _, api = node
+    cron_id = await _create_cron(api)
+    assert await _cache(node, _schedules) == ["0 0 1 1 *"]
+
+    response = await api.patch(f"/runs/crons/{cron_id}", json={"schedule": "30 0 * * *"})
+    assert response.status_code == 200, response.text
+    assert await _schedules(api) == ["30 0 * * *"]
+
+
+async def test_searches_read_before_released_next_run_dates_are_flushed_are_not_cached(
+    nodes: Callable[..., Awaitable[Node]],
+) -> None:
+    # Buffered cron updates are only flushed when the test does
+    _, creating_api = await nodes(cron_update_max_delay=30)
+    cron_id = await _create_cron(creating_api)
+    scheduler, _ = await nodes(cron_update_max_delay=30)
+    data_store: LanggraphSQLAlchemyDataStore = scheduler.data_store
+    due = attrs.evolve(await scheduler.get_schedule(cron_id))
+    due.next_fire_time = datetime.now(timezone.utc) - timedelta(minutes=1)
+    await data_store.add_schedule(due, ConflictPolicy.replace)
+
+    async def next_run_dates() -> List[datetime | None]:
+        crons = await data_store.get_crons(
+            assistant_id=None, thread_id=None, limit=10, offset=0, sort_by="next_run_date", sort_order="asc"
+        )
+        return [cron.next_run_date for cron in crons]
+
+    [schedule] = await data_store.acquire_schedules("scheduler", timedelta(minutes=1), 100)
+    next_fire_time = schedule.trigger.next()
+    await data_store.release_schedules(
+        "scheduler",
+        [
+            ScheduleResult(
+                schedule_id=cron_id,
+                task_id=schedule.task_id,
+                trigger=schedule.trigger,
+                last_fire_time=schedule.next_fire_time,
+                next_fire_time=next_fire_time,
+            )
+        ],
+    )
+
+    # The new next run date is still buffered, so the search reads the old one
+    assert await next_run_dates() == [due.next_fire_time]
+    assert len(data_store._search_cache) == 0
+    await data_store._flush_cron_updates()
+    assert await next_run_dates() == [next_fire_time]
+
+
+@pytest.mark.parametrize("event_brokers", ["redis"], indirect=True)
+async def test_changes_on_one_node_drop_the_cached_searches_of_another(
+    nodes: Callable[..., Awaitable[Node]],
+) -> None:
+    node, (_, other_api) = await nodes(), await nodes()
+    _, api = node
+    assert await _cache(node, _searched_ids) == []
+
+    cron_id = await _create_cron(other_api)
+
+    async def sees_the_cron() -> bool:
+        return await _searched_ids(api) == [cron_id]
+
+    await _eventually(sees_the_cron)
+
+    await _cache(node, _schedules)
+    await other_api.patch(f"/runs/crons/{cron_id}", json={"schedule": "30 0 * * *"})
+
+    async def sees_the_patch() -> bool:
+        return await _schedules(api) == ["30 0 * * *"]
+
+    await _eventually(sees_the_patch)
+
+    await _cache(node, _searched_ids)
+    await other_api.delete(f"/runs/crons/{cron_id}")
+
+    async def sees_the_delete() -> bool:
+        return await _searched_ids(api) == []
+
+    await _eventually(sees_the_delete)
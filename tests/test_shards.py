@@ -0,0 +1,166 @@
+import hashlib
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
+from inspect import getsource
+from pathlib import Path
+from typing import List, Tuple
+from uuid import uuid4
+
+import pytest
+from apscheduler import Schedule
+from apscheduler.datastores.sqlalchemy import SQLAlchemyDataStore
+from apscheduler.triggers.cron import CronTrigger
+from conftest import in_own_task, sqlite_uri
+from fake_langgraph import FakeLangGraph
+from sqlalchemy import func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from langgraph_lite_cron.scheduler import LanggraphAsyncScheduler
+from langgraph_lite_cron.scheduler.datastores.sqlalchemy import (
+    LanggraphSQLAlchemyDataStore,
+)
+from langgraph_lite_cron.scheduler.tasks import runs_create
+
+SHARDS = 4
+LEASE = timedelta(seconds=30)
+
+
+@pytest.fixture
+async def schedulers(tmp_path: Path, fake_langgraph: FakeLangGraph) -> AsyncIterator[List[LanggraphAsyncScheduler]]:
+    """Two schedulers whose data stores partition the schedules of one SQLite database"""
+    schedulers: List[LanggraphAsyncScheduler] = []
+    contexts = []
+    for node_id in ("node-a", "node-b"):
+        store = LanggraphSQLAlchemyDataStore(
+            engine_or_url=sqlite_uri(tmp_path / "crons.sqlite"), shards=SHARDS, node_id=node_id
+        )
+        scheduler = LanggraphAsyncScheduler(data_store=store, langgraph_client=fake_langgraph.client())
+        context = in_own_task(scheduler)
+        await context.__aenter__()
+        contexts.append(context)
+        schedulers.append(scheduler)
+
+    yield schedulers
+
+    for context in reversed(contexts):
+        await context.__aexit__(None, None, None)
+
+
+async def _add_due_schedules(scheduler: LanggraphAsyncScheduler, count: int) -> None:
+    task = await scheduler.configure_task(runs_create)
+    schedules = []
+    for _ in range(count):
+        schedule = Schedule(
+            id=str(uuid4()),
+            task_id=task.id,
+            job_executor=task.job_executor,
+            trigger=CronTrigger(month=1, day=1),
+            metadata={"schedule": "0 0 1 1 *"},
+        )
+        schedule.next_fire_time = datetime.now(timezone.utc) - timedelta(minutes=1)
+        schedules.append(schedule)
+    await scheduler.data_store.add_schedules(schedules)
+
+
+async def _rebalance(stores: List[LanggraphSQLAlchemyDataStore]) -> None:
+    # Nodes give up the shards assigned to others before those can claim them
+    for _ in range(2):
+        for store in stores:
+            await store._rebalance_shards()
+
+
+@pytest.fixture
+def stores(schedulers: List[LanggraphAsyncScheduler]) -> List[LanggraphSQLAlchemyDataStore]:
+    return [scheduler.data_store for scheduler in schedulers]
+
+
+async def test_nodes_hold_disjoint_shards_and_acquire_only_their_schedules(
+    schedulers: List[LanggraphAsyncScheduler], stores: List[LanggraphSQLAlchemyDataStore]
+) -> None:
+    first, second = stores
+    await _rebalance(stores)
+    assert first._owned_shards and second._owned_shards
+    assert first._owned_shards.isdisjoint(second._owned_shards)
+    assert first._owned_shards | second._owned_shards == set(range(SHARDS))
+
+    await _add_due_schedules(schedulers[0], 40)
+    acquired = [
+        {schedule.id for schedule in await store.acquire_schedules(store.node_id, LEASE, 100)} for store in stores
+    ]
+    assert acquired[0] and acquired[1]
+    assert acquired[0].isdisjoint(acquired[1])
+    assert len(acquired[0] | acquired[1]) == 40
+
+
+async def test_node_takes_over_the_shards_of_a_node_that_left(stores: List[LanggraphSQLAlchemyDataStore]) -> None:
+    first, second = stores
+    await _rebalance(stores)
+
+    await first._leave_shards()
+    await second._rebalance_shards()
+    assert first._owned_shards == frozenset()
+    assert second._owned_shards == set(range(SHARDS))
+
+
+async def test_node_takes_over_the_shards_of_a_node_whose_lease_expired(
+    stores: List[LanggraphSQLAlchemyDataStore],
+) -> None:
+    first, second = stores
+    await _rebalance(stores)
+
+    # The first node stops renewing its leases, as if it crashed
+    expired = datetime.now(timezone.utc) - timedelta(seconds=1)
+    async with first._begin_transaction() as conn:
+        await first._execute(
+            conn, first._t_nodes.update().where(first._t_nodes.c.node_id == first.node_id).values(seen_until=expired)
+        )
+        await first._execute(
+            conn, first._t_shards.update().where(first._t_shards.c.owner == first.node_id).values(lease_until=expired)
+        )
+
+    await second._rebalance_shards()
+    assert second._owned_shards == set(range(SHARDS))
+
+
+async def test_unpartitioned_store_leaves_the_schedules_table_alone(
+    tmp_path: Path, fake_langgraph: FakeLangGraph
+) -> None:
+    store = LanggraphSQLAlchemyDataStore(engine_or_url=sqlite_uri(tmp_path / "crons.sqlite"))
+    scheduler = LanggraphAsyncScheduler(data_store=store, langgraph_client=fake_langgraph.client())
+    async with in_own_task(scheduler):
+        await _add_due_schedules(scheduler, 3)
+        async with store._begin_transaction() as conn:
+            columns = await conn.run_sync(lambda conn: [column["name"] for column in inspect(conn).get_columns("schedules")])
+            assert "shard_key" not in columns
+            assert (await store._execute(conn, select(func.count()).select_from(store._t_schedules))).scalar() == 3
+
+    # Enabling partitioning later adds the shard keys of the existing schedules
+    store = LanggraphSQLAlchemyDataStore(engine_or_url=sqlite_uri(tmp_path / "crons.sqlite"), shards=SHARDS)
+    async with in_own_task(LanggraphAsyncScheduler(data_store=store, langgraph_client=fake_langgraph.client())):
+        t = store._t_schedules
+        async with store._begin_transaction() as conn:
+            assert (await store._execute(conn, select(func.count()).where(t.c.shard_key.is_(None)))).scalar() == 0
+        assert len(await store.acquire_schedules("node", LEASE, 100)) == 3
+
+
+def test_acquire_schedules_copies_the_pinned_apscheduler() -> None:
+    # The partitioned acquire_schedules copies APScheduler's; compare them again when this changes
+    source = getsource(SQLAlchemyDataStore.acquire_schedules)
+    assert hashlib.sha256(source.encode()).hexdigest() == (
+        "fa67dbc83361ea2435ff966377fc2083d613f29b5e98bf89620dd5853df620a3"
+    )
+
+
+async def test_only_engines_created_by_the_store_get_sqlite_listeners(tmp_path: Path) -> None:
+    def listeners(engine: AsyncEngine) -> Tuple[int, int]:
+        return len(engine.sync_engine.pool.dispatch.connect), len(engine.sync_engine.dispatch.begin)
+
+    engine = create_async_engine(sqlite_uri(tmp_path / "crons.sqlite"))
+    connect_listeners, begin_listeners = listeners(engine)
+    LanggraphSQLAlchemyDataStore(engine_or_url=engine, shards=SHARDS)
+    assert listeners(engine) == (connect_listeners, begin_listeners)
+    await engine.dispose()
+
+    store = LanggraphSQLAlchemyDataStore(engine_or_url=sqlite_uri(tmp_path / "crons.sqlite"), shards=SHARDS)
+    assert listeners(store._engine) == (connect_listeners + 1, begin_listeners + 1)
+    await store._engine.dispose()
@@ -0,0 +1,208 @@
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from importlib.metadata import version
+from pathlib import Path
+from typing import Dict, List, Tuple
+from uuid import uuid4
+
+import attrs
+import httpx
+import pytest
+from apscheduler import ConflictPolicy
+from apscheduler.datastores.memory import MemoryDataStore
+from conftest import in_own_task
+from fake_langgraph import FakeLangGraph
+from fastapi import FastAPI
+
+from langgraph_lite_cron import crons
+from langgraph_lite_cron.scheduler import LanggraphAsyncScheduler
+from langgraph_lite_cron.scheduler.datastores.memory import LanggraphMemoryDataStore
+from langgraph_lite_cron.scheduler.datastores.snapshot import (
+    ChangeLog,
+    ChangeLogCorruptedError,
+)
+from langgraph_lite_cron.scheduler.payloads import payload_digest
+from langgraph_lite_cron.utils import invalidate_assistant_id
+
+SHARED = {"messages": [{"role": "user", "content": "hello"}]}
+
+
+def _load(path: Path) -> Tuple[ChangeLog, Dict[Tuple[str, str], bytes]]:
+    change_log = ChangeLog(path)
+    return change_log, {(kind, key): value for kind, key, value in change_log.load()}
+
+
+def _change_logs(path: Path) -> List[str]:
+    return sorted(name for name in (p.name for p in path.iterdir()) if name.startswith("changes-"))
+
+
+def test_a_torn_record_is_dropped_and_overwritten(tmp_path: Path) -> None:
+    change_log, _ = _load(tmp_path)
+    change_log.append([("task", "a", b"first"), ("task", "b", b"second")])
+    change_log.append([("task", "c", b"third")])
+    change_log.close()
+    log_path = tmp_path / "changes-0.cbor"
+    intact = log_path.stat().st_size
+    with open(log_path, "r+b") as f:
+        f.truncate(intact - 2)
+
+    change_log, records = _load(tmp_path)
+    assert records == {("task", "a"): b"first", ("task", "b"): b"second"}
+    assert change_log.changes == 2
+    change_log.append([("task", "d", b"fourth"), ("task", "a", None)])
+    change_log.close()
+
+    _, records = _load(tmp_path)
+    assert records == {("task", "b"): b"second", ("task", "d"): b"fourth"}
+
+
+@pytest.mark.parametrize("tail", [b"\0" * 64, b"garbage"], ids=["zeros", "garbage"])
+def test_a_garbled_tail_is_dropped(tmp_path: Path, tail: bytes) -> None:
+    change_log, _ = _load(tmp_path)
+    change_log.append([("task", "a", b"first")])
+    change_log.close()
+    with open(tmp_path / "changes-0.cbor", "ab") as f:
+        f.write(tail)
+
+    change_log, records = _load(tmp_path)
+    assert records == {("task", "a"): b"first"}
+    assert change_log.dropped == len(tail)
+    change_log.close()
+
+
+def test_a_record_failing_its_checksum_ends_the_last_change_log(tmp_path: Path) -> None:
+    change_log, _ = _load(tmp_path)
+    change_log.append([("task", "a", b"first"), ("task", "b", b"second"), ("task", "c", b"third")])
+    change_log.close()
+    log_path = tmp_path / "changes-0.cbor"
+    log_path.write_bytes(log_path.read_bytes().replace(b"second", b"sec0nd"))
+
+    change_log, records = _load(tmp_path)
+    assert records == {("task", "a"): b"first"}
+    assert change_log.dropped > 0
+    change_log.close()
+
+
+@pytest.mark.parametrize("file_name", ["snapshot.cbor", "changes-1.cbor"])
+def test_a_corrupted_record_before_the_last_change_log_fails_the_load(tmp_path: Path, file_name: str) -> None:
+    change_log, _ = _load(tmp_path)
+    change_log.append([("task", "a", b"first")])
+    change_log.write_snapshot(change_log.start_compaction())
+    change_log.append([("task", "b", b"second")])
+    change_log.start_compaction()
+    change_log.append([("task", "c", b"third")])
+    change_log.close()
+    path = tmp_path / file_name
+    path.write_bytes(path.read_bytes().replace(b"first", b"f1rst").replace(b"second", b"sec0nd"))
+
+    with pytest.raises(ChangeLogCorruptedError):
+        list(ChangeLog(tmp_path).load())
+
+
+def test_memory_data_store_internals_match_the_pinned_apscheduler() -> None:
+    pyproject = (Path(__file__).parent.parent / "pyproject.toml").read_text()
+    assert f'"apscheduler=={version("apscheduler")}"' in pyproject
+
+    data_store = MemoryDataStore()
+    assert isinstance(data_store._schedules, list)
+    assert isinstance(data_store._schedules_by_id, dict)
+    assert isinstance(data_store._schedules_by_task_id, defaultdict)
+    assert isinstance(data_store._tasks, dict)
+    assert callable(data_store._find_schedule_index)
+
+
+@pytest.mark.parametrize("snapshot_written", [True, False], ids=["compacted", "crashed"])
+def test_replay_across_generations_and_compaction(tmp_path: Path, snapshot_written: bool) -> None:
+    change_log, _ = _load(tmp_path)
+    change_log.append([("schedule", "a", b"1"), ("schedule", "b", b"1"), ("payload", "p", b"x")])
+    snapshot = change_log.start_compaction()
+    change_log.append([("schedule", "a", b"2"), ("schedule", "b", None), ("schedule", "c", b"1")])
+    if snapshot_written:
+        change_log.write_snapshot(snapshot)
+        assert _change_logs(tmp_path) == ["changes-1.cbor"]
+    else:
+        assert _change_logs(tmp_path) == ["changes-0.cbor", "changes-1.cbor"]
+    change_log.close()
+
+    change_log, records = _load(tmp_path)
+    expected = {("schedule", "a"): b"2", ("schedule", "c"): b"1", ("payload", "p"): b"x"}
+    assert records == expected
+
+    # Compact again on top of the restored state, and keep appending afterwards
+    change_log.write_snapshot(change_log.start_compaction())
+    change_log.append([("payload", "p", None), ("schedule", "d", b"1")])
+    change_log.close()
+    assert _change_logs(tmp_path) == ["changes-2.cbor"]
+
+    change_log, records = _load(tmp_path)
+    assert records == {("schedule", "a"): b"2", ("schedule", "c"): b"1", ("schedule", "d"): b"1"}
+    assert change_log.changes == 2
+    change_log.close()
+
+
+@asynccontextmanager
+async def _restarted(path: Path, fake_langgraph: FakeLangGraph) -> AsyncIterator[Tuple[LanggraphAsyncScheduler, httpx.AsyncClient]]:
+    """Run a scheduler on a memory data store persisted in a directory, with an API in front of it"""
+    invalidate_assistant_id()
+    data_store = LanggraphMemoryDataStore(persistence_path=str(path))
+    scheduler = LanggraphAsyncScheduler(data_store=data_store, langgraph_client=fake_langgraph.client())
+    app = FastAPI()
+    app.state.scheduler = scheduler
+    app.include_router(crons.router)
+    async with in_own_task(scheduler):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://crons.test") as api:
+            yield scheduler, api
+
+
+async def _search(api: httpx.AsyncClient, **filters: str) -> Dict[str, Dict]:
+    response = await api.post("/runs/crons/search", json={"limit": 1000, "sort_by": "created_at", **filters})
+    return {cron["cron_id"]: cron for cron in response.json()}
+
+
+async def test_crons_are_restored_on_demand(tmp_path: Path, fake_langgraph: FakeLangGraph) -> None:
+    thread_id = str(uuid4())
+    async with _restarted(tmp_path, fake_langgraph) as (scheduler, api):
+        cron_ids = []
+        for payload in [SHARED, SHARED, None]:
+            response = await api.post("/runs/crons", json={"schedule": "0 0 1 1 *", "assistant_id": "agent", "input": payload})
+            cron_ids.append(response.json()["cron_id"])
+        response = await api.post(
+            f"/threads/{thread_id}/runs/crons", json={"schedule": "0 0 * * *", "assistant_id": "agent", "input": SHARED}
+        )
+        thread_cron_id = response.json()["cron_id"]
+        await api.patch(f"/runs/crons/{cron_ids[1]}", json={"schedule": "30 0 * * *"})
+        await api.delete(f"/runs/crons/{cron_ids[2]}")
+        due = attrs.evolve(await scheduler.get_schedule(thread_cron_id))
+        due.next_fire_time = datetime.now(timezone.utc) - timedelta(minutes=1)
+        await scheduler.data_store.add_schedule(due, ConflictPolicy.replace)
+        before = await _search(api)
+        next_run_time = await scheduler.data_store.get_next_schedule_run_time()
+
+    async with _restarted(tmp_path, fake_langgraph) as (scheduler, api):
+        data_store = scheduler.data_store
+        assert isinstance(data_store, LanggraphMemoryDataStore)
+        assert not data_store._schedules and len(data_store._stored_schedules) == 3
+        assert dict(data_store._payload_references) == {payload_digest(SHARED): 3}
+        assert await data_store.get_next_schedule_run_time() == next_run_time
+
+        assert await _search(api) == before
+        assert (await api.post("/runs/crons/count", json={})).json() == 3
+        assert list(await _search(api, thread_id=thread_id)) == [thread_cron_id]
+        assert before[cron_ids[1]]["schedule"] == "30 0 * * *"
+        assert before[cron_ids[0]]["payload"] == SHARED
+
+        acquired = await data_store.acquire_schedules("scheduler", timedelta(minutes=1), 100)
+        assert [schedule.id for schedule in acquired] == [thread_cron_id]
+        assert len(data_store._stored_schedules) == 2
+        schedule = await scheduler.get_schedule(cron_ids[0])
+        assert schedule.next_fire_time > datetime.now(timezone.utc)
+        assert cron_ids[0] not in data_store._stored_schedules
+
+        await api.post("/runs/crons/bulk_delete", json={"cron_ids": [cron_ids[0], thread_cron_id]})
+        assert dict(data_store._payload_references) == {payload_digest(SHARED): 1}
+
+    async with _restarted(tmp_path, fake_langgraph) as (scheduler, api):
+        assert list(await _search(api)) == [cron_ids[1]]
+        assert dict(scheduler.data_store._payload_references) == {payload_digest(SHARED): 1}
@@ -0,0 +1,170 @@
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+from typing import Any, List
+from uuid import UUID
+
+import httpx
+import pytest
+from apscheduler import ConflictPolicy, ScheduleAdded, ScheduleResult, ScheduleUpdated
+from apscheduler.triggers.cron import CronTrigger
+from sqlalchemy import func, inspect, select, text
+
+from langgraph_lite_cron.scheduler import LanggraphAsyncScheduler
+from langgraph_lite_cron.scheduler.datastores.sqlalchemy import (
+    LanggraphSQLAlchemyDataStore,
+)
+
+pytestmark = pytest.mark.parametrize("data_store", ["sqlite"], indirect=True)
+
+
+async def _scalar(data_store: LanggraphSQLAlchemyDataStore, statement: Any) -> Any:
+    async with data_store._begin_transaction() as conn:
+        return (await data_store._execute(conn, statement)).scalar()
+
+
+async def _create_cron(api: httpx.AsyncClient) -> str:
+    response = await api.post("/runs/crons", json={"schedule": "0 0 1 1 *", "assistant_id": "agent", "input": {"a": 1}})
+    assert response.status_code == 200
+    return response.json()["cron_id"]
+
+
+async def test_replace_restores_the_schedule_of_an_orphaned_cron(
+    api: httpx.AsyncClient, scheduler: LanggraphAsyncScheduler
+) -> None:
+    data_store: LanggraphSQLAlchemyDataStore = scheduler.data_store
+    cron_id = await _create_cron(api)
+    schedule = await scheduler.get_schedule(cron_id)
+    async with data_store._begin_transaction() as conn:
+        await data_store._execute(conn, data_store._t_schedules.delete())
+
+    events: List[Any] = []
+    scheduler.subscribe(events.append, {ScheduleAdded, ScheduleUpdated})
+    await data_store.add_schedule(schedule, ConflictPolicy.replace)
+
+    assert (await scheduler.get_schedule(cron_id)).next_fire_time == schedule.next_fire_time
+    assert await data_store.count_crons(assistant_id=None, thread_id=None) == 1
+    assert await _scalar(data_store, select(data_store._t_payloads.c.refcount)) == 1
+    assert [type(event) for event in events] == [ScheduleAdded]
+
+
+async def test_replace_restores_the_cron_row_of_a_schedule(
+    api: httpx.AsyncClient, scheduler: LanggraphAsyncScheduler
+) -> None:
+    data_store: LanggraphSQLAlchemyDataStore = scheduler.data_store
+    cron_id = await _create_cron(api)
+    schedule = await scheduler.get_schedule(cron_id)
+    async with data_store._begin_transaction() as conn:
+        await data_store._execute(conn, data_store._t_cron.delete())
+
+    await data_store.add_schedule(schedule, ConflictPolicy.replace)
+
+    crons = (await api.post("/runs/crons/search", json={})).json()
+    assert [cron["cron_id"] for cron in crons] == [cron_id]
+    assert crons[0]["payload"] == {"a": 1}
+    assert await _scalar(data_store, select(func.count()).select_from(data_store._t_schedules)) == 1
+
+
+class _UnserializableTrigger(CronTrigger):
+    def __getstate__(self) -> dict[str, Any]:
+        raise TypeError("Cannot serialize this trigger")
+
+
+async def test_release_removes_the_cron_of_a_schedule_removed_on_release(
+    api: httpx.AsyncClient, scheduler: LanggraphAsyncScheduler
+) -> None:
+    data_store: LanggraphSQLAlchemyDataStore = scheduler.data_store
+    kept_id, removed_id = await _create_cron(api), await _create_cron(api)
+    results = []
+    for cron_id, trigger in ((kept_id, CronTrigger(minute="*")), (removed_id, _UnserializableTrigger(minute="*"))):
+        schedule = await scheduler.get_schedule(cron_id)
+        results.append(
+            ScheduleResult(
+                schedule_id=cron_id,
+                task_id=schedule.task_id,
+                trigger=trigger,
+                last_fire_time=schedule.next_fire_time,
+                next_fire_time=trigger.next(),
+            )
+        )
+
+    await data_store.release_schedules(scheduler.identity, results)
+
+    crons = (await api.post("/runs/crons/search", json={})).json()
+    assert [cron["cron_id"] for cron in crons] == [kept_id]
+    assert await data_store.count_crons(assistant_id=None, thread_id=None) == 1
+    assert await _scalar(data_store, select(data_store._t_payloads.c.refcount)) == 1
+    assert list(data_store._pending_cron_updates) == [UUID(kept_id)]
+
+
+async def _stored_cron_ids(data_store: LanggraphSQLAlchemyDataStore) -> List[str]:
+    async with data_store._begin_transaction() as conn:
+        query = select(data_store._t_cron.c.cron_id).order_by(data_store._t_cron.c.cron_id)
+        return [str(cron_id) for cron_id in (await data_store._execute(conn, query)).scalars()]
+
+
+async def test_remove_schedules_removes_the_crons_counts_and_payload_references(
+    api: httpx.AsyncClient, scheduler: LanggraphAsyncScheduler
+) -> None:
+    data_store: LanggraphSQLAlchemyDataStore = scheduler.data_store
+    kept_id, removed_id = await _create_cron(api), await _create_cron(api)
+    assert await _scalar(data_store, select(data_store._t_payloads.c.refcount)) == 2
+
+    await data_store.remove_schedules([removed_id])
+    assert await _stored_cron_ids(data_store) == [kept_id]
+    assert await data_store.count_crons(assistant_id=None, thread_id=None) == 1
+    assert await _scalar(data_store, select(data_store._t_payloads.c.refcount)) == 1
+
+    await data_store.remove_schedules([kept_id])
+    assert await _stored_cron_ids(data_store) == []
+    assert await data_store.count_crons(assistant_id=None, thread_id=None) == 0
+    assert await _scalar(data_store, select(func.count()).select_from(data_store._t_payloads)) == 0
+
+
+async def test_cleanup_removes_the_crons_of_finished_schedules(
+    api: httpx.AsyncClient, scheduler: LanggraphAsyncScheduler, make_due: Callable[[str], Awaitable[None]]
+) -> None:
+    data_store: LanggraphSQLAlchemyDataStore = scheduler.data_store
+    kept_id, released_id = await _create_cron(api), await _create_cron(api)
+    response = await api.post(
+        "/runs/crons",
+        json={"schedule": "0 0 1 1 *", "assistant_id": "agent", "input": {"a": 1}, "end_time": "2000-01-01T00:00:00Z"},
+    )
+    assert response.status_code == 200, response.text
+    # A schedule released without a next fire time, whose cron update is still buffered
+    await make_due(released_id)
+    [schedule] = await data_store.acquire_schedules(scheduler.identity, timedelta(minutes=1), 100)
+    result = ScheduleResult(
+        schedule_id=released_id,
+        task_id=schedule.task_id,
+        trigger=schedule.trigger,
+        last_fire_time=schedule.next_fire_time,
+        next_fire_time=None,
+    )
+    await data_store.release_schedules(scheduler.identity, [result])
+    assert list(data_store._pending_cron_updates) == [UUID(released_id)]
+    assert await _scalar(data_store, select(data_store._t_payloads.c.refcount)) == 3
+
+    await data_store.cleanup()
+    assert await _stored_cron_ids(data_store) == [kept_id]
+    assert await data_store.count_crons(assistant_id=None, thread_id=None) == 1
+    assert await _scalar(data_store, select(data_store._t_payloads.c.refcount)) == 1
+    assert not data_store._pending_cron_updates
+
+
+async def test_cron_table_drops_indexes_it_no_longer_defines(
+    data_store: LanggraphSQLAlchemyDataStore, scheduler: LanggraphAsyncScheduler
+) -> None:
+    t = data_store._t_cron
+    async with data_store._begin_transaction() as conn:
+        await data_store._execute(conn, text("CREATE INDEX ix_cron_assistant_id_updated_at ON cron (assistant_id, updated_at)"))
+        await conn.run_sync(data_store._migrate_tables)
+        indexes = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_indexes(t.name))
+
+    assert {index["name"] for index in indexes} == {
+        "ix_cron_created_at",
+        "ix_cron_next_run_date",
+        "ix_cron_end_time",
+        "ix_cron_assistant_id",
+        "ix_cron_thread_id",
+    }
+    assert len(t.indexes) == 5
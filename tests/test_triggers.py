@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from pydantic import ValidationError
+
+from langgraph_lite_cron.shcemas import CronCreate
+from langgraph_lite_cron.utils import _build_trigger, _cron_trigger
+
+UTC = ZoneInfo("UTC")
+
+
+def test_triggers_built_from_one_template_fire_independently() -> None:
+    first = _build_trigger("0 * * * *", UTC, None)
+    second = _build_trigger("0 * * * *", UTC, None)
+    assert first._fields is not second._fields
+
+    first_fire_time = first.next()
+    assert first_fire_time is not None
+    assert first.next() == first_fire_time + timedelta(hours=1)
+    assert second.next() == first_fire_time
+
+    # A trigger restored from its state keeps firing from where it was
+    restored = _build_trigger("0 * * * *", UTC, None)
+    restored.__setstate__(first.__getstate__())
+    assert restored.next() == first_fire_time + timedelta(hours=2)
+    assert second.next() == first_fire_time + timedelta(hours=1)
+
+
+def test_the_time_zone_and_end_time_of_a_cron_apply_to_its_trigger() -> None:
+    tokyo = ZoneInfo("Asia/Tokyo")
+    trigger = _cron_trigger(CronCreate(schedule="0 9 * * *", assistant_id="agent", timezone="Asia/Tokyo"))
+    assert trigger.timezone == tokyo
+    fire_time = trigger.next()
+    assert fire_time is not None
+    assert fire_time.astimezone(tokyo).hour == 9
+    assert fire_time.astimezone(timezone.utc).hour == 0
+
+    # Other crons of the same schedule in another time zone do not share its template
+    paris = _cron_trigger(CronCreate(schedule="0 9 * * *", assistant_id="agent", timezone="Europe/Paris"))
+    assert paris.timezone == ZoneInfo("Europe/Paris")
+    assert paris.next() != fire_time
+
+    end_time = datetime.now(timezone.utc) + timedelta(minutes=1)
+    ending = _cron_trigger(CronCreate(schedule="0 0 1 1 *", assistant_id="agent", end_time=end_time))
+    assert ending.end_time == end_time
+    assert ending.next() is None
+
+
+@pytest.mark.parametrize("value", ["Mars/Olympus_Mons", "", "../etc/passwd"])
+def test_unknown_time_zones_are_rejected(value: str) -> None:
+    with pytest.raises(ValidationError, match="time zone"):
+        CronCreate(schedule="0 0 * * *", assistant_id="agent", timezone=value)
+
+
+def test_time_zones_are_optional() -> None:
+    assert CronCreate(schedule="0 0 * * *", assistant_id="agent").timezone is None
+    assert CronCreate(schedule="0 0 * * *", assistant_id="agent", timezone="UTC").timezone == "UTC"
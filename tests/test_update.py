@@ -0,0 +1,71 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from apscheduler import ScheduleResult
+
+from langgraph_lite_cron.scheduler import LanggraphAsyncScheduler
+
+LEASE = timedelta(seconds=30)
+
+
+@pytest.fixture
+async def result(
+    api: httpx.AsyncClient, scheduler: LanggraphAsyncScheduler, make_due: Callable[[str], Awaitable[None]]
+) -> ScheduleResult:
+    """Create a cron that is due, acquire it as another scheduler would, and return the result of processing it"""
+    response = await api.post("/runs/crons", json={"schedule": "0 0 1 1 *", "assistant_id": "agent", "input": {"a": 1}})
+    await make_due(response.json()["cron_id"])
+
+    [acquired] = await scheduler.data_store.acquire_schedules("other-scheduler", LEASE, 10)
+    return ScheduleResult(
+        schedule_id=acquired.id,
+        task_id=acquired.task_id,
+        trigger=acquired.trigger,
+        last_fire_time=acquired.next_fire_time,
+        next_fire_time=acquired.trigger.next(),
+    )
+
+
+async def test_update_waits_for_the_release_of_a_running_cron(
+    api: httpx.AsyncClient, scheduler: LanggraphAsyncScheduler, result: ScheduleResult
+) -> None:
+    patch = asyncio.create_task(api.patch(f"/runs/crons/{result.schedule_id}", json={"schedule": "*/5 * * * *"}))
+    await asyncio.sleep(0.1)
+    assert not patch.done()
+
+    await scheduler.data_store.release_schedules("other-scheduler", [result])
+    response = await patch
+    assert response.status_code == 200
+    assert response.json()["schedule"] == "*/5 * * * *"
+
+    # The released trigger does not overwrite the updated one
+    schedule = await scheduler.get_schedule(result.schedule_id)
+    assert schedule.metadata["schedule"] == "*/5 * * * *"
+    assert schedule.next_fire_time.minute % 5 == 0
+    assert schedule.next_fire_time - datetime.now(timezone.utc) <= timedelta(minutes=5)
+    assert schedule.trigger.next() > schedule.next_fire_time
+    assert schedule.last_fire_time == result.last_fire_time
+    assert schedule.acquired_by is None
+
+    [cron] = (await api.post("/runs/crons/search", json={})).json()
+    assert cron["schedule"] == "*/5 * * * *"
+
+
+async def test_update_of_a_cron_that_stays_acquired_conflicts(
+    api: httpx.AsyncClient, scheduler: LanggraphAsyncScheduler, result: ScheduleResult
+) -> None:
+    response = await api.patch(f"/runs/crons/{result.schedule_id}", json={"input": {"b": 2}})
+    assert response.status_code == 409
+
+    schedule = await scheduler.get_schedule(result.schedule_id)
+    assert schedule.acquired_by == "other-scheduler"
+    [cron] = (await api.post("/runs/crons/search", json={})).json()
+    assert cron["payload"] == {"a": 1}
+
+
+async def test_update_of_a_missing_cron_is_not_found(api: httpx.AsyncClient) -> None:
+    response = await api.patch("/runs/crons/00000000-0000-0000-0000-000000000001", json={"schedule": "* * * * *"})
+    assert response.status_code == 404